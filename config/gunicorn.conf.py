@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for gymtracker project.
+
+SERVER_MODE=wsgi (default) runs the classic sync workers; SERVER_MODE=asgi
+serves config.asgi with uvicorn workers, so the async set endpoints can
+interleave many requests per worker.
+
+The cache and the live sync broker live in each worker process unless shared
+backends are configured, so more than one worker needs CACHE_BACKEND=redis
+(or file) and, under ASGI, LIVE_SYNC_BROKER=workouts.live.RedisBroker.
+Without them a single worker is started, and a larger WEB_CONCURRENCY (set
+automatically by Heroku-style platforms) is lowered to 1 with a warning.
+"""
+
+import multiprocessing
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+# The file cache is shared by the workers of one host only, which is all a
+# gunicorn instance runs; several instances behind a balancer need redis
+SHARED_CACHE = os.environ.get('CACHE_BACKEND', 'locmem') in ('redis', 'file')
+# Live sync only streams under ASGI; WSGI workers never hold subscribers
+SHARED_BROKER = SERVER_MODE != 'asgi' or os.environ.get('LIVE_SYNC_BROKER', '').endswith('.RedisBroker')
+SHARED_STATE = SHARED_CACHE and SHARED_BROKER
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+requested_workers = int(os.environ.get(
+    'WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4) if SHARED_STATE else 1
+))
+workers = requested_workers if SHARED_STATE else 1
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+
+
+def on_starting(server):
+    if requested_workers > workers:
+        server.log.warning(
+            'Starting 1 worker instead of %d: more need a shared cache (CACHE_BACKEND=redis or file)%s',
+            requested_workers,
+            '' if SHARED_BROKER else ' and LIVE_SYNC_BROKER=workouts.live.RedisBroker',
+        )
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,11 +59,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request profiling: samples PROFILING_SAMPLE_RATE of requests, adds a
+# Server-Timing header and logs to 'workouts.profiling'; requests slower than
+# PROFILING_SLOW_MS are also stored for the admin, for PROFILING_RETENTION_DAYS
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '1.0'))
+PROFILING_SLOW_MS = float(os.environ.get('PROFILING_SLOW_MS', '500'))
+PROFILING_STORE = os.environ.get('PROFILING_STORE', 'True') == 'True'
+PROFILING_RETENTION_DAYS = int(os.environ.get('PROFILING_RETENTION_DAYS', '30'))
+
+if PROFILING_ENABLED:
+    # After WhiteNoise so static files are not profiled
+    MIDDLEWARE.insert(2, 'workouts.middleware.ProfilingMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The profiling backend is the stock one plus render timing
+        'BACKEND': (
+            'workouts.middleware.ProfilingTemplates' if PROFILING_ENABLED
+            else 'django.template.backends.django.DjangoTemplates'
+        ),
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,20 +101,135 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Use PostgreSQL if DATABASE_URL is set (Railway), otherwise SQLite locally
 if os.environ.get('DATABASE_URL'):
+    DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
     DATABASES = {
         'default': dj_database_url.config(
             default=os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
+            # Pooled connections are returned to the pool instead of persisting
+            conn_max_age=0 if DB_POOL else 600,
             conn_health_checks=True,
         )
     }
+    DATABASES['default']['OPTIONS'] = {
+        # Abort runaway queries instead of letting them hold a worker
+        'options': f"-c statement_timeout={os.environ.get('DB_STATEMENT_TIMEOUT_MS', '15000')}",
+    }
+    if DB_POOL:
+        # requirements.txt installs psycopg2, which has no pool support
+        if not (find_spec('psycopg') and find_spec('psycopg_pool')):
+            raise ImproperlyConfigured('DB_POOL=True needs psycopg 3 with its pool: pip install "psycopg[binary,pool]"')
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        }
+    # Exports stream through server-side cursors; they must be turned off
+    # behind a transaction-mode pgbouncer
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = (
+        os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True'
+    )
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # On disk rather than in memory, so tests run with the same
+            # journal mode and locking as the server
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+    # SQLITE_PROFILE=tuned (default) runs in WAL mode so readers never block
+    # the writer, waits for locks instead of failing with "database is
+    # locked", and takes the write lock when a transaction starts so
+    # concurrent autosaves queue up rather than deadlock. SQLITE_PROFILE=plain
+    # keeps SQLite's defaults.
+    if os.environ.get('SQLITE_PROFILE', 'tuned') == 'tuned':
+        SQLITE_TIMEOUT = int(os.environ.get('SQLITE_TIMEOUT', '20'))
+        DATABASES['default']['OPTIONS'] = {
+            'timeout': SQLITE_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ' '.join([
+                'PRAGMA journal_mode=WAL;',
+                'PRAGMA synchronous=NORMAL;',
+                f'PRAGMA busy_timeout={SQLITE_TIMEOUT * 1000};',
+                f"PRAGMA mmap_size={os.environ.get('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024))};",
+                # Negative values are KiB
+                f"PRAGMA cache_size=-{os.environ.get('SQLITE_CACHE_KIB', '20000')};",
+                'PRAGMA temp_store=MEMORY;',
+            ]),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# In-process LRU cache by default; set CACHE_BACKEND=file or CACHE_BACKEND=redis
+# (with REDIS_URL) to share it between worker processes
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '5000'))
+
+if CACHE_BACKEND == 'redis':
+    # Size is bounded by the server's maxmemory with maxmemory-policy allkeys-lru
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+            'KEY_PREFIX': 'gym',
         }
     }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+            'KEY_PREFIX': 'gym',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    # LocMemCache evicts least recently used entries once MAX_ENTRIES is reached
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gym-tracker',
+            'KEY_PREFIX': 'gym',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'workouts.profiling': {
+            'handlers': ['console'],
+            'level': os.environ.get('PROFILING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# Live sync
+# Set and notes changes are pushed to the user's other open pages over
+# Server-Sent Events (ASGI only). The in-process broker is enough for a single
+# worker; use workouts.live.RedisBroker when running several.
+
+LIVE_SYNC_BROKER = os.environ.get('LIVE_SYNC_BROKER', 'workouts.live.InProcessBroker')
+LIVE_SYNC_REDIS_URL = os.environ.get('LIVE_SYNC_REDIS_URL', os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/2'))
+
+
+# Personal records
+# One-rep max estimate used for records and summaries, 'epley' or 'brzycki'.
+# Run `manage.py rebuild_summaries` after changing it.
+
+PR_1RM_FORMULA = os.environ.get('PR_1RM_FORMULA', 'epley')
 
 
 # Password validation
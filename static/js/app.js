@@ -15,22 +15,19 @@ function getCookie(name) {
     return cookieValue;
 }
 
-function showSaveIndicator() {
+function showSaveIndicator(message = 'Saved ✓', duration = 1000) {
     const indicator = document.getElementById('save-indicator');
     if (indicator) {
+        indicator.textContent = message;
         indicator.classList.add('show');
         setTimeout(() => {
             indicator.classList.remove('show');
-        }, 1000);
+        }, duration);
     }
 }
 
 // ===== EXERCISE SESSION =====
 
-let timerInterval = null;
-let timeRemaining = 120; // Default 2 minutes
-let timerRunning = false;
-
 function initExerciseSession() {
     const exerciseSession = document.querySelector('.exercise-session');
     if (!exerciseSession) return;
@@ -38,6 +35,9 @@ function initExerciseSession() {
     // Initialize timer
     initTimer();
     
+    // Initialize batched autosave
+    initWriteQueue();
+    
     // Initialize set inputs
     initSetInputs();
     
@@ -49,6 +49,12 @@ function initExerciseSession() {
     
     // Initialize swipe gestures
     initSwipeGestures();
+    
+    // Switch exercises in place using the embedded session payload
+    initExerciseNavigation();
+    
+    // Follow changes made on the user's other devices
+    initLiveSync();
 }
 
 // ===== LARGE MODE =====
@@ -71,21 +77,6 @@ function initLargeMode() {
     });
 }
 
-// ===== TIMER =====
-    
-    // Initialize set inputs
-    initSetInputs();
-    
-    // Initialize notes
-    initNotes();
-    
-    // Initialize add set button
-    initAddSet();
-    
-    // Initialize swipe gestures
-    initSwipeGestures();
-}
-
 // ===== TIMER =====
 
 let timerRunning = false;
@@ -298,78 +289,342 @@ function playNotificationSound() {
     }
 }
 
-// ===== SET INPUTS =====
+// ===== WRITE QUEUE =====
 
-function initSetInputs() {
-    const setRows = document.querySelectorAll('.set-row');
+// Pending edits, coalesced per set row / exercise session until the next flush
+const writeQueue = {
+    sets: new Map(),
+    notes: new Map(),
+    timer: null
+};
+
+const FLUSH_DELAY = 800;
+const RETRY_DELAY = 5000;
+
+function hasPendingWrites() {
+    return writeQueue.sets.size > 0 || writeQueue.notes.size > 0;
+}
+
+function scheduleFlush(delay = FLUSH_DELAY) {
+    if (writeQueue.timer) clearTimeout(writeQueue.timer);
+    writeQueue.timer = setTimeout(() => flushWrites().catch(() => {}), delay);
+}
+
+function queueSetUpdate(row, data) {
+    writeQueue.sets.set(row, data);
+    scheduleFlush();
+}
+
+function queueNotesUpdate(exerciseSessionId, notes) {
+    writeQueue.notes.set(exerciseSessionId, notes);
+    scheduleFlush();
+}
+
+function generateOpId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
+// Sent with every write so live sync can skip this page's own changes
+const CLIENT_ID = generateOpId();
+
+function setReference(row) {
+    // Rows added offline are addressed by the op_id of their add operation
+    return row.dataset.setId ? { set_id: row.dataset.setId } : { set_ref: row.dataset.setRef };
+}
+
+function takePendingOperations() {
+    if (writeQueue.timer) {
+        clearTimeout(writeQueue.timer);
+        writeQueue.timer = null;
+    }
     
-    setRows.forEach(row => {
-        const setId = row.dataset.setId;
-        const weightInput = row.querySelector('.weight-input');
-        const repsInput = row.querySelector('.reps-input');
-        const checkbox = row.querySelector('.set-checkbox');
-        
-        // Debounce timer for autosave
-        let saveTimeout = null;
-        
-        const saveSet = () => {
-            if (saveTimeout) clearTimeout(saveTimeout);
-            
-            saveTimeout = setTimeout(() => {
-                updateSet(setId, {
-                    weight: parseFloat(weightInput.value) || 0,
-                    reps: parseInt(repsInput.value) || 0,
-                    completed: checkbox.checked
-                });
-            }, 500);
+    const operations = [];
+    writeQueue.sets.forEach((data, row) => {
+        operations.push({ op_id: generateOpId(), type: 'set', ...setReference(row), ...data });
+    });
+    writeQueue.notes.forEach((value, exerciseSessionId) => {
+        operations.push({
+            op_id: generateOpId(),
+            type: 'notes',
+            exercise_session_id: exerciseSessionId,
+            notes: value
+        });
+    });
+    writeQueue.sets.clear();
+    writeQueue.notes.clear();
+    return operations;
+}
+
+function flushWrites(options = {}) {
+    const operations = takePendingOperations();
+    if (!operations.length) return drainOutbox(options);
+    return enqueueOperations(operations, options);
+}
+
+function enqueueOperations(operations, options = {}) {
+    return outboxAdd(operations).then(() => drainOutbox(options));
+}
+
+// ===== OFFLINE OUTBOX =====
+
+// Every write is appended to a durable outbox first and replayed to the
+// server in order; the replay endpoint ignores op_ids it has already applied.
+const outbox = {
+    db: null,
+    memory: [],
+    nextSeq: 1,
+    draining: null,
+    retryTimer: null
+};
+
+function openOutbox() {
+    if (outbox.db) return Promise.resolve(outbox.db);
+    if (!('indexedDB' in window)) return Promise.resolve(null);
+    
+    return new Promise(resolve => {
+        const request = indexedDB.open('gym-tracker', 1);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore('outbox', { keyPath: 'seq', autoIncrement: true });
         };
-        
-        weightInput.addEventListener('input', saveSet);
-        repsInput.addEventListener('input', saveSet);
-        checkbox.addEventListener('change', () => {
-            // Immediate save for checkbox
-            updateSet(setId, {
-                weight: parseFloat(weightInput.value) || 0,
-                reps: parseInt(repsInput.value) || 0,
-                completed: checkbox.checked
-            });
-            
-            // Auto-start timer when set is completed
-            if (checkbox.checked && !timerRunning) {
-                resetTimer();
-                startTimer();
-                document.getElementById('timer-start').style.display = 'none';
-                document.getElementById('timer-pause').style.display = 'inline-block';
+        request.onsuccess = () => {
+            outbox.db = request.result;
+            resolve(outbox.db);
+        };
+        // Private browsing and similar: fall back to an in-memory outbox
+        request.onerror = () => resolve(null);
+    });
+}
+
+function outboxTransaction(mode, callback) {
+    return openOutbox().then(db => new Promise((resolve, reject) => {
+        if (!db) {
+            resolve(callback(null));
+            return;
+        }
+        const tx = db.transaction('outbox', mode);
+        let result;
+        tx.oncomplete = () => resolve(result);
+        tx.onerror = () => reject(tx.error);
+        result = callback(tx.objectStore('outbox'));
+    }));
+}
+
+function outboxAdd(operations) {
+    return outboxTransaction('readwrite', store => {
+        operations.forEach(op => {
+            if (store) {
+                store.add({ op: op });
+            } else {
+                outbox.memory.push({ seq: outbox.nextSeq++, op: op });
             }
         });
     });
 }
 
-function updateSet(setId, data) {
-    fetch('/api/set/update/', {
+function outboxEntries() {
+    let entries = [];
+    return outboxTransaction('readonly', store => {
+        if (!store) {
+            entries = outbox.memory.slice();
+            return;
+        }
+        store.getAll().onsuccess = (event) => {
+            entries = event.target.result;
+        };
+    }).then(() => entries);
+}
+
+function outboxDelete(seqs) {
+    return outboxTransaction('readwrite', store => {
+        if (!store) {
+            outbox.memory = outbox.memory.filter(entry => !seqs.includes(entry.seq));
+            return;
+        }
+        seqs.forEach(seq => store.delete(seq));
+    });
+}
+
+function replayOperations(operations, options = {}) {
+    return fetch('/api/sync/replay/', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
-            'X-CSRFToken': getCookie('csrftoken')
+            'X-CSRFToken': getCookie('csrftoken'),
+            'X-Client-Id': CLIENT_ID
         },
-        body: JSON.stringify({
-            set_id: setId,
-            weight: data.weight,
-            reps: data.reps,
-            completed: data.completed
-        })
+        body: JSON.stringify({ operations: operations }),
+        keepalive: Boolean(options.keepalive)
     })
-    .then(response => response.json())
-    .then(data => {
-        if (data.status === 'success') {
-            showSaveIndicator();
+    .then(response => response.json().then(data => {
+        if (data.status !== 'success') {
+            const error = new Error(data.message || 'Replay failed');
+            // The server understood and refused; resending will not help
+            error.rejected = response.status >= 400 && response.status < 500;
+            throw error;
+        }
+        return data.results;
+    }));
+}
+
+function applyReplayResults(entries, results) {
+    entries.forEach((entry, i) => {
+        const result = results[i];
+        if (entry.op.type !== 'add' || !result || !result.set_id) return;
+        const row = document.querySelector(`.set-row[data-set-ref="${entry.op.op_id}"]`);
+        if (row) {
+            delete row.dataset.setRef;
+            row.dataset.setId = result.set_id;
+            row.querySelector('.set-number').textContent = result.set_number;
+        }
+        // The row may belong to an exercise that is not on screen any more
+        payloadSets().forEach(set => {
+            if (set.ref === entry.op.op_id) {
+                set.id = result.set_id;
+                set.ref = null;
+                set.set_number = result.set_number;
+            }
+        });
+    });
+}
+
+function drainOutbox(options = {}) {
+    // Chain drains so operations always reach the server in order
+    const previous = outbox.draining || Promise.resolve();
+    const drain = previous
+        .catch(() => {})
+        .then(() => outboxEntries())
+        .then(entries => {
+            if (!entries.length) return [];
+            return replayOperations(entries.map(entry => entry.op), options)
+                .then(results => {
+                    applyReplayResults(entries, results);
+                    // Operations the server could not apply (a set deleted on another
+                    // device, say) come back one by one; the rest were saved
+                    const rejected = results.filter(result => result && result.status === 'error');
+                    if (rejected.length) {
+                        console.error('Changes rejected by the server:', rejected.map(result => result.message));
+                        showSaveIndicator(`${rejected.length} change${rejected.length > 1 ? 's' : ''} could not be saved`, 4000);
+                    } else {
+                        showSaveIndicator();
+                    }
+                    return outboxDelete(entries.map(entry => entry.seq)).then(() => results);
+                })
+                .catch(error => {
+                    if (error.rejected) {
+                        // The whole request was refused; keep the changes rather than lose them
+                        console.error('Replay rejected:', error);
+                        showSaveIndicator(`Not saved: ${error.message}`, 4000);
+                        throw error;
+                    }
+                    showSaveIndicator('Saved on device');
+                    scheduleOutboxRetry();
+                    throw error;
+                });
+        })
+        .finally(() => {
+            if (outbox.draining === drain) outbox.draining = null;
+        });
+    
+    outbox.draining = drain;
+    return drain;
+}
+
+function scheduleOutboxRetry() {
+    if (outbox.retryTimer) return;
+    outbox.retryTimer = setTimeout(() => {
+        outbox.retryTimer = null;
+        if (navigator.onLine !== false) drainOutbox().catch(() => {});
+    }, RETRY_DELAY);
+}
+
+function initOfflineSupport() {
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/sw.js').catch(error => {
+            console.error('Service worker registration failed:', error);
+        });
+    }
+    
+    // Replay anything left over from an earlier page or a lost connection
+    window.addEventListener('online', () => drainOutbox().catch(() => {}));
+    drainOutbox().catch(() => {});
+}
+
+function initWriteQueue() {
+    // Flush before following any in-page navigation link
+    document.addEventListener('click', (e) => {
+        const button = e.target.closest('.nav-btn, #finish-btn');
+        // Exercise switches stay on this page; the queue keeps flushing as usual
+        if (!button || (sessionState.payload && button.dataset.order)) return;
+        if (hasPendingWrites() || outbox.draining) {
+            e.preventDefault();
+            flushWrites()
+                .catch(() => {})
+                .then(() => {
+                    window.location.href = button.href;
+                });
+        }
+    });
+    
+    // Flush when the page is hidden (app switch, screen off, tab close)
+    document.addEventListener('visibilitychange', () => {
+        if (document.hidden) {
+            flushWrites({ keepalive: true }).catch(() => {});
+        }
+    });
+    window.addEventListener('pagehide', () => {
+        flushWrites({ keepalive: true }).catch(() => {});
+    });
+}
+
+// ===== SET INPUTS =====
+
+function initSetInputs() {
+    document.querySelectorAll('.set-row').forEach(bindSetRow);
+}
+
+function bindSetRow(row) {
+    const weightInput = row.querySelector('.weight-input');
+    const repsInput = row.querySelector('.reps-input');
+    const checkbox = row.querySelector('.set-checkbox');
+    
+    const readSet = () => ({
+        weight: parseFloat(weightInput.value) || 0,
+        reps: parseInt(repsInput.value) || 0,
+        completed: checkbox.checked
+    });
+    
+    weightInput.addEventListener('input', () => queueSetUpdate(row, readSet()));
+    repsInput.addEventListener('input', () => queueSetUpdate(row, readSet()));
+    checkbox.addEventListener('change', () => {
+        // Completing a set is saved right away along with anything pending
+        queueSetUpdate(row, readSet());
+        flushWrites().catch(() => {});
+        
+        // Auto-start timer when set is completed
+        if (checkbox.checked && !timerRunning) {
+            resetTimer();
+            startTimer();
+            document.getElementById('timer-start').style.display = 'none';
+            document.getElementById('timer-pause').style.display = 'inline-block';
         }
-    })
-    .catch(error => {
-        console.error('Error updating set:', error);
     });
 }
 
+function createSetRow(setRef, setNumber) {
+    const row = document.createElement('div');
+    row.className = 'set-row';
+    row.dataset.setRef = setRef;
+    row.innerHTML = `
+        <span class="set-number">${setNumber}</span>
+        <input type="number" class="set-input weight-input" value="0" step="0.5" min="0" data-field="weight">
+        <input type="number" class="set-input reps-input" value="0" min="0" data-field="reps">
+        <input type="checkbox" class="set-checkbox" data-field="completed">
+    `;
+    bindSetRow(row);
+    return row;
+}
+
 // ===== NOTES =====
 
 function initNotes() {
@@ -377,104 +632,257 @@ function initNotes() {
     if (!notesInput) return;
     
     const exerciseSession = document.querySelector('.exercise-session');
-    const exerciseSessionId = exerciseSession.dataset.exerciseSessionId;
-    
-    let saveTimeout = null;
-    let isDirty = false;
     
     notesInput.addEventListener('input', () => {
-        isDirty = true;
-        if (saveTimeout) clearTimeout(saveTimeout);
-        
-        saveTimeout = setTimeout(() => {
-            updateNotes(exerciseSessionId, notesInput.value);
-            isDirty = false;
-        }, 500);
+        // Read on every edit: the exercise on screen changes without a page load
+        queueNotesUpdate(exerciseSession.dataset.exerciseSessionId, notesInput.value);
     });
     
     // Save notes when user leaves the text field
     notesInput.addEventListener('blur', () => {
-        if (isDirty) {
-            if (saveTimeout) clearTimeout(saveTimeout);
-            updateNotes(exerciseSessionId, notesInput.value);
-            isDirty = false;
-        }
+        flushWrites().catch(() => {});
     });
+}
+
+// ===== ADD SET =====
+
+function initAddSet() {
+    const addSetBtn = document.getElementById('add-set-btn');
+    if (!addSetBtn) return;
     
-    // Save notes before navigation
-    const navButtons = document.querySelectorAll('.nav-btn, #finish-btn');
-    navButtons.forEach(button => {
-        button.addEventListener('click', (e) => {
-            if (isDirty) {
-                e.preventDefault();
-                if (saveTimeout) clearTimeout(saveTimeout);
-                
-                // Save immediately and then navigate
-                updateNotes(exerciseSessionId, notesInput.value).then(() => {
-                    isDirty = false;
-                    window.location.href = button.href;
-                });
-            }
+    const exerciseSession = document.querySelector('.exercise-session');
+    const setsTable = exerciseSession.querySelector('.sets-table');
+    
+    addSetBtn.addEventListener('click', () => {
+        // Show the row straight away; it gets its server id once replayed
+        const opId = generateOpId();
+        const setNumber = setsTable.querySelectorAll('.set-row').length + 1;
+        setsTable.appendChild(createSetRow(opId, setNumber));
+        
+        const operations = takePendingOperations();
+        operations.push({
+            op_id: opId,
+            type: 'add',
+            exercise_session_id: exerciseSession.dataset.exerciseSessionId
         });
+        enqueueOperations(operations).catch(() => {});
     });
 }
 
-function updateNotes(exerciseSessionId, notes) {
-    return fetch('/api/notes/update/', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': getCookie('csrftoken')
-        },
-        body: JSON.stringify({
-            exercise_session_id: exerciseSessionId,
-            notes: notes
-        })
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.status === 'success') {
-            showSaveIndicator();
+// ===== LIVE SYNC =====
+
+// Changes made on the user's other pages arrive as Server-Sent Events
+function initLiveSync() {
+    if (!('EventSource' in window)) return;
+    
+    const exerciseSession = document.querySelector('.exercise-session');
+    const sessionId = parseInt(exerciseSession.dataset.sessionId);
+    const events = new EventSource('/api/live/');
+    
+    events.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.origin === CLIENT_ID || message.session_id !== sessionId) return;
+        
+        if (message.type === 'session_ended') {
+            events.close();
+            window.location.href = '/';
+            return;
         }
-        return data;
-    })
-    .catch(error => {
-        console.error('Error updating notes:', error);
-        throw error;
+        // Exercises that are not on screen are updated in the payload only
+        if (message.exercise_session_id !== parseInt(exerciseSession.dataset.exerciseSessionId)) {
+            applyLiveToPayload(message);
+            return;
+        }
+        
+        if (message.type === 'notes') {
+            const notesInput = document.getElementById('notes-input');
+            // Never overwrite what is being typed here
+            if (notesInput && document.activeElement !== notesInput && !writeQueue.notes.size) {
+                notesInput.value = message.notes;
+            }
+        } else {
+            applyLiveSet(exerciseSession, message);
+        }
+    };
+    
+    window.addEventListener('pagehide', () => events.close());
+}
+
+function applyLiveSet(exerciseSession, message) {
+    let row = exerciseSession.querySelector(`.set-row[data-set-id="${message.set_id}"]`);
+    if (!row) {
+        if (message.type !== 'add') return;
+        row = createSetRow('', message.set_number);
+        delete row.dataset.setRef;
+        row.dataset.setId = message.set_id;
+        exerciseSession.querySelector('.sets-table').appendChild(row);
+    }
+    // Local edits that have not been sent yet win
+    if (writeQueue.sets.has(row)) return;
+    
+    const weightInput = row.querySelector('.weight-input');
+    const repsInput = row.querySelector('.reps-input');
+    if (document.activeElement !== weightInput) weightInput.value = message.weight;
+    if (document.activeElement !== repsInput) repsInput.value = message.reps;
+    row.querySelector('.set-checkbox').checked = message.completed;
+}
+
+function applyLiveToPayload(message) {
+    if (!sessionState.payload) return;
+    const exercise = sessionState.payload.exercises.find(item => item.id === message.exercise_session_id);
+    if (!exercise) return;
+    
+    if (message.type === 'notes') {
+        exercise.notes = message.notes;
+        return;
+    }
+    let set = exercise.sets.find(item => item.id === message.set_id);
+    if (!set) {
+        if (message.type !== 'add') return;
+        set = { id: message.set_id, ref: null, set_number: message.set_number };
+        exercise.sets.push(set);
+    }
+    set.weight = message.weight;
+    set.reps = message.reps;
+    set.completed = message.completed;
+}
+
+// ===== EXERCISE NAVIGATION =====
+
+// The page embeds every exercise of the session, so Previous / Next re-render
+// in place instead of loading the next exercise's page over the network
+const sessionState = {
+    payload: null,
+    order: 1
+};
+
+function payloadSets() {
+    if (!sessionState.payload) return [];
+    return sessionState.payload.exercises.flatMap(exercise => exercise.sets);
+}
+
+function initExerciseNavigation() {
+    const payloadElement = document.getElementById('session-payload');
+    if (!payloadElement || !window.history.pushState) return;
+    
+    const exerciseSession = document.querySelector('.exercise-session');
+    sessionState.payload = JSON.parse(payloadElement.textContent);
+    sessionState.order = parseInt(exerciseSession.dataset.currentOrder);
+    history.replaceState({ order: sessionState.order }, '');
+    
+    exerciseSession.querySelector('.navigation-section').addEventListener('click', (e) => {
+        const link = e.target.closest('a[data-order]');
+        if (!link) return;
+        e.preventDefault();
+        showExercise(parseInt(link.dataset.order));
+    });
+    
+    window.addEventListener('popstate', (e) => {
+        if (e.state && e.state.order) showExercise(e.state.order, { push: false });
     });
 }
 
-// ===== ADD SET =====
+function currentExercise() {
+    return sessionState.payload.exercises[sessionState.order - 1];
+}
 
-function initAddSet() {
-    const addSetBtn = document.getElementById('add-set-btn');
-    if (!addSetBtn) return;
+function snapshotCurrentExercise() {
+    // Keep what was entered on this screen for when the user comes back to it
+    const exercise = currentExercise();
+    exercise.sets = Array.from(document.querySelectorAll('.sets-table .set-row')).map(row => ({
+        id: row.dataset.setId ? parseInt(row.dataset.setId) : null,
+        ref: row.dataset.setRef || null,
+        set_number: parseInt(row.querySelector('.set-number').textContent),
+        weight: parseFloat(row.querySelector('.weight-input').value) || 0,
+        reps: parseInt(row.querySelector('.reps-input').value) || 0,
+        completed: row.querySelector('.set-checkbox').checked
+    }));
     
+    const notesInput = document.getElementById('notes-input');
+    if (notesInput) exercise.notes = notesInput.value;
+}
+
+function showExercise(order, options = {}) {
+    const exercises = sessionState.payload.exercises;
+    if (order < 1 || order > exercises.length || order === sessionState.order) return;
+    
+    snapshotCurrentExercise();
+    sessionState.order = order;
+    renderExercise();
+    
+    if (options.push !== false) {
+        const sessionId = sessionState.payload.session.id;
+        history.pushState({ order: order }, '', `/session/${sessionId}/exercise/${order}/`);
+    }
+    window.scrollTo(0, 0);
+}
+
+function formatPreviousSets(previous) {
+    if (!previous.length) return '';
+    return 'Last time: ' + previous.map(set => `${Number(set.weight)} × ${set.reps}`).join(' · ');
+}
+
+function renderExercise() {
     const exerciseSession = document.querySelector('.exercise-session');
-    const exerciseSessionId = exerciseSession.dataset.exerciseSessionId;
+    const exercises = sessionState.payload.exercises;
+    const exercise = currentExercise();
+    const order = sessionState.order;
     
-    addSetBtn.addEventListener('click', () => {
-        fetch('/api/set/add/', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': getCookie('csrftoken')
-            },
-            body: JSON.stringify({
-                exercise_session_id: exerciseSessionId
-            })
-        })
-        .then(response => response.json())
-        .then(data => {
-            if (data.status === 'success') {
-                // Reload the page to show the new set
-                location.reload();
-            }
-        })
-        .catch(error => {
-            console.error('Error adding set:', error);
-        });
+    exerciseSession.dataset.exerciseSessionId = exercise.id;
+    exerciseSession.dataset.currentOrder = order;
+    exerciseSession.dataset.hasPrevious = order > 1;
+    exerciseSession.dataset.hasNext = order < exercises.length;
+    document.title = `${exercise.name} - Gym Tracker`;
+    
+    exerciseSession.querySelector('.progress-text').textContent = `Exercise ${order} / ${exercises.length}`;
+    exerciseSession.querySelector('.progress-fill').style.width = `${order / exercises.length * 100}%`;
+    exerciseSession.querySelector('.exercise-header h1').textContent = exercise.name;
+    exerciseSession.querySelector('.previous-sets').textContent = formatPreviousSets(exercise.previous);
+    
+    const setsTable = exerciseSession.querySelector('.sets-table');
+    setsTable.querySelectorAll('.set-row').forEach(row => row.remove());
+    exercise.sets.forEach(set => {
+        const row = createSetRow(set.ref || '', set.set_number);
+        if (set.id) {
+            delete row.dataset.setRef;
+            row.dataset.setId = set.id;
+        }
+        row.querySelector('.weight-input').value = set.weight;
+        row.querySelector('.reps-input').value = set.reps;
+        row.querySelector('.set-checkbox').checked = set.completed;
+        setsTable.appendChild(row);
     });
+    
+    const notesInput = document.getElementById('notes-input');
+    if (notesInput) notesInput.value = exercise.notes;
+    
+    renderNavigation(exerciseSession.querySelector('.navigation-section'), order, exercises.length);
+}
+
+function renderNavigation(container, order, total) {
+    const sessionId = sessionState.payload.session.id;
+    let html = '';
+    if (order > 1) {
+        html += `
+        <a href="/session/${sessionId}/exercise/${order - 1}/" 
+           class="btn btn-secondary btn-large nav-btn" id="prev-btn" data-order="${order - 1}">
+            ← Previous
+        </a>`;
+    }
+    if (order < total) {
+        html += `
+        <a href="/session/${sessionId}/exercise/${order + 1}/" 
+           class="btn btn-primary btn-large nav-btn" id="next-btn" data-order="${order + 1}">
+            Next →
+        </a>`;
+    } else {
+        html += `
+        <a href="/session/${sessionId}/finish/" 
+           class="btn btn-success btn-large nav-btn">
+            Finish Session
+        </a>`;
+    }
+    container.innerHTML = html;
 }
 
 // ===== SWIPE GESTURES =====
@@ -483,11 +891,6 @@ function initSwipeGestures() {
     const exerciseSession = document.querySelector('.exercise-session');
     if (!exerciseSession) return;
     
-    const hasPrevious = exerciseSession.dataset.hasPrevious === 'true';
-    const hasNext = exerciseSession.dataset.hasNext === 'true';
-    const sessionId = exerciseSession.dataset.sessionId;
-    const currentOrder = parseInt(exerciseSession.dataset.currentOrder);
-    
     let touchStartX = 0;
     let touchEndX = 0;
     const minSwipeDistance = 50;
@@ -504,15 +907,20 @@ function initSwipeGestures() {
     function handleSwipe() {
         const swipeDistance = touchEndX - touchStartX;
         
+        // Same as the Previous / Next buttons, which switch exercises in place
+        let button = null;
+        
         // Swipe right (previous exercise)
-        if (swipeDistance > minSwipeDistance && hasPrevious) {
-            window.location.href = `/session/${sessionId}/exercise/${currentOrder - 1}/`;
+        if (swipeDistance > minSwipeDistance) {
+            button = document.getElementById('prev-btn');
         }
         
         // Swipe left (next exercise)
-        if (swipeDistance < -minSwipeDistance && hasNext) {
-            window.location.href = `/session/${sessionId}/exercise/${currentOrder + 1}/`;
+        if (swipeDistance < -minSwipeDistance) {
+            button = document.getElementById('next-btn');
         }
+        
+        if (button) button.click();
     }
 }
 
@@ -572,12 +980,73 @@ window.addEventListener('beforeunload', (e) => {
     }
 });
 
+// ===== HEATMAP =====
+
+function initHeatmap() {
+    const container = document.getElementById('heatmap');
+    if (!container) return;
+    
+    const grid = document.getElementById('heatmap-grid');
+    const metricSelect = document.getElementById('heatmap-metric');
+    let payload = null;
+    
+    const render = () => {
+        const field = payload.fields.indexOf(metricSelect.value);
+        const values = new Map(payload.days.map(day => [day[0], day[field]]));
+        const max = Math.max(0, ...values.values());
+        
+        const start = new Date(`${payload.start}T00:00:00`);
+        const end = new Date(`${payload.end}T00:00:00`);
+        const totalDays = Math.round((end - start) / 86400000) + 1;
+        // Columns are Monday-first weeks, so pad the first week
+        const padding = (start.getDay() + 6) % 7;
+        
+        const cells = document.createDocumentFragment();
+        for (let i = -padding; i < totalDays; i++) {
+            const cell = document.createElement('div');
+            cell.className = 'heatmap-cell';
+            if (i < 0) {
+                cell.classList.add('outside');
+            } else {
+                const value = values.get(i) || 0;
+                if (value > 0) {
+                    cell.classList.add(`level-${Math.min(4, Math.ceil((value / max) * 4))}`);
+                }
+                const day = new Date(start.getFullYear(), start.getMonth(), start.getDate() + i);
+                cell.title = `${day.toDateString()}: ${value} ${metricSelect.value}`;
+            }
+            cells.appendChild(cell);
+        }
+        grid.replaceChildren(cells);
+    };
+    
+    fetch(`${container.dataset.url}?year=${container.dataset.year}`)
+        .then(response => response.json())
+        .then(data => {
+            payload = data;
+            render();
+        })
+        .catch(error => {
+            console.error('Error loading heatmap:', error);
+        });
+    
+    metricSelect.addEventListener('change', () => {
+        if (payload) render();
+    });
+}
+
 // ===== INITIALIZATION =====
 
 document.addEventListener('DOMContentLoaded', () => {
     // Initialize large mode toggle on all pages
     initLargeMode();
     
+    // Cache the app for offline use and replay queued writes
+    initOfflineSupport();
+    
+    // Initialize the year heatmap on the history page
+    initHeatmap();
+    
     // Initialize exercise session features only if on exercise session page
     const exerciseSession = document.querySelector('.exercise-session');
     if (exerciseSession) {
@@ -0,0 +1,92 @@
+from datetime import date
+
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+from .models import DailyActivity, Session
+
+ROLLUP_FIELDS = ['sessions', 'sets', 'volume']
+
+
+def _daily_totals(sessions):
+    """Sessions, completed sets and volume per (user, date) of finished sessions"""
+    return (
+        sessions.filter(end_time__isnull=False)
+        .values('user_id', 'date')
+        .annotate(
+            session_count=Count('id', distinct=True),
+            set_count=Coalesce(Sum('exercise_summaries__completed_sets'), 0),
+            total_volume=Coalesce(Sum('exercise_summaries__volume'), 0.0),
+        )
+        .order_by()
+    )
+
+
+def _rows(totals):
+    return [
+        DailyActivity(
+            user_id=row['user_id'],
+            date=row['date'],
+            sessions=row['session_count'],
+            sets=row['set_count'],
+            volume=row['total_volume'],
+        )
+        for row in totals
+    ]
+
+
+def refresh_days(user, days):
+    """Recompute the rollup rows of the given days for one user"""
+    days = set(days)
+    if not days:
+        return
+    rows = _rows(_daily_totals(Session.objects.filter(user=user, date__in=days)))
+    DailyActivity.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=ROLLUP_FIELDS,
+    )
+    # Days whose last session was deleted drop out of the rollup
+    DailyActivity.objects.filter(user=user, date__in=days - {row.date for row in rows}).delete()
+
+
+def refresh_days_for_summaries(user, summaries):
+    """Recompute the days touched by freshly refreshed exercise summaries"""
+    refresh_days(user, {summary.date for summary in summaries if summary.finished})
+
+
+def rebuild_activity(user=None):
+    """Drop and recompute the rollup from scratch; returns the number of days written"""
+    activity = DailyActivity.objects.all()
+    sessions = Session.objects.all()
+    if user is not None:
+        activity = activity.filter(user=user)
+        sessions = sessions.filter(user=user)
+    activity.delete()
+    return len(DailyActivity.objects.bulk_create(_rows(_daily_totals(sessions)), batch_size=1000))
+
+
+def heatmap(user, start, end):
+    """Compact heatmap payload for the days between ``start`` and ``end``.
+
+    Only days with activity are listed, as ``[day offset, sessions, sets,
+    volume]`` rows relative to ``start``.
+    """
+    rows = DailyActivity.objects.filter(
+        user=user, date__range=(start, end)
+    ).values_list('date', *ROLLUP_FIELDS)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'fields': ['offset'] + ROLLUP_FIELDS,
+        'days': [
+            [(day - start).days, sessions, sets, round(volume, 1)]
+            for day, sessions, sets, volume in rows
+        ],
+    }
+
+
+def year_range(year, years=1):
+    """First and last day of a span of whole years ending with ``year``"""
+    return date(year - years + 1, 1, 1), date(year, 12, 31)
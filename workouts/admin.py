@@ -1,39 +1,241 @@
-from django.contrib import admin
-from .models import Workout, Exercise, Session, ExerciseSession, Set
+import json
+from datetime import timedelta
+
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Avg, Count, Max
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import (
+    Workout, Exercise, ExerciseDefinition, ExerciseAlias, Session, ExerciseSession, Set,
+    ExerciseSummary, PersonalRecord, RequestProfile,
+)
+from .pruning import CHUNK_SIZE, delete_sessions
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses PostgreSQL's row estimate instead of COUNT(*) for big result sets.
+
+    Counting millions of rows is a full scan on every changelist page; above
+    ``ESTIMATE_ABOVE`` rows the planner's estimate is close enough for page
+    links. Other databases count exactly.
+    """
+    ESTIMATE_ABOVE = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == 'postgresql':
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            estimate = int(plan[0]['Plan']['Plan Rows'])
+            if estimate > self.ESTIMATE_ABOVE:
+                return estimate
+        return super().count
+
+
+class PeriodFilter(admin.SimpleListFilter):
+    """Recent rows only unless another period is picked, so big changelists stay fast"""
+    title = 'period'
+    parameter_name = 'period'
+    date_field = 'date'
+    default = '90'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('30', 'Last 30 days'),
+            ('90', 'Last 90 days'),
+            ('365', 'Last year'),
+            ('old', 'Older than a year'),
+            ('all', 'All time'),
+        ]
+
+    def value(self):
+        value = super().value()
+        return value if value in dict(self.lookup_choices) else self.default
+
+    def choices(self, changelist):
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value == 'all':
+            return queryset
+        if value == 'old':
+            return queryset.filter(**{f'{self.date_field}__lt': timezone.localdate() - timedelta(days=365)})
+        return queryset.filter(**{f'{self.date_field}__gte': timezone.localdate() - timedelta(days=int(value))})
+
+
+class SessionPeriodFilter(PeriodFilter):
+    date_field = 'session__date'
+
+
+class SetPeriodFilter(PeriodFilter):
+    date_field = 'exercise_session__session__date'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow with every logged set.
+
+    Filter by user through the search box or ``?user__id__exact=``: a user
+    list filter would render every account.
+    """
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) behind "N total"
+    show_full_result_count = False
 
 
 @admin.register(Workout)
 class WorkoutAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'created_at']
-    list_filter = ['user', 'created_at']
+    list_filter = ['created_at']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
     search_fields = ['name', 'user__username']
 
 
+class ExerciseAliasInline(admin.TabularInline):
+    model = ExerciseAlias
+    extra = 1
+
+
+@admin.register(ExerciseDefinition)
+class ExerciseDefinitionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'muscle_group']
+    list_filter = ['muscle_group']
+    search_fields = ['name', 'aliases__name']
+    inlines = [ExerciseAliasInline]
+
+
 @admin.register(Exercise)
 class ExerciseAdmin(admin.ModelAdmin):
-    list_display = ['name', 'workout', 'order']
-    list_filter = ['workout__user']
+    list_display = ['name', 'definition', 'workout', 'order']
+    list_filter = ['definition__muscle_group']
+    list_select_related = ['definition', 'workout__user']
+    autocomplete_fields = ['definition', 'workout']
     search_fields = ['name', 'workout__name']
     ordering = ['workout', 'order']
 
 
 @admin.register(Session)
-class SessionAdmin(admin.ModelAdmin):
+class SessionAdmin(LargeTableAdmin):
     list_display = ['workout', 'user', 'date', 'start_time', 'end_time', 'is_active']
-    list_filter = ['user', 'date', 'workout']
+    list_filter = [PeriodFilter]
+    list_select_related = ['workout__user', 'user']
+    autocomplete_fields = ['workout', 'user']
     search_fields = ['workout__name', 'user__username']
     date_hierarchy = 'date'
+    actions = ['delete_in_chunks']
+
+    def get_actions(self, request):
+        # delete_selected collects every related set in memory and on the
+        # confirmation page; delete_in_chunks replaces it
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(permissions=['delete'], description='Delete selected sessions in chunks')
+    def delete_in_chunks(self, request, queryset):
+        if request.POST.get('confirm') != 'yes':
+            return TemplateResponse(request, 'admin/workouts/session/delete_in_chunks.html', {
+                **self.admin_site.each_context(request),
+                'title': 'Delete sessions in chunks',
+                'opts': self.model._meta,
+                'count': queryset.count(),
+                'chunk_size': CHUNK_SIZE,
+                'select_across': request.POST.get('select_across', '0'),
+                'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+        deleted = delete_sessions(queryset)
+        self.message_user(request, f'Deleted {deleted} session{"s" if deleted != 1 else ""}.', messages.SUCCESS)
 
 
 @admin.register(ExerciseSession)
-class ExerciseSessionAdmin(admin.ModelAdmin):
+class ExerciseSessionAdmin(LargeTableAdmin):
     list_display = ['exercise', 'session', 'rest_timer_seconds']
-    list_filter = ['session__user', 'exercise__workout']
+    list_filter = [SessionPeriodFilter]
+    list_select_related = ['exercise__workout', 'session__workout__user', 'session__user']
+    autocomplete_fields = ['exercise', 'session']
     search_fields = ['exercise__name', 'session__workout__name']
 
 
 @admin.register(Set)
-class SetAdmin(admin.ModelAdmin):
+class SetAdmin(LargeTableAdmin):
     list_display = ['exercise_session', 'set_number', 'weight', 'reps', 'completed']
-    list_filter = ['completed', 'exercise_session__session__user']
+    list_filter = [SetPeriodFilter, 'completed']
+    list_select_related = [
+        'exercise_session__exercise__workout', 'exercise_session__session__workout__user',
+        'exercise_session__session__user',
+    ]
+    autocomplete_fields = ['exercise_session']
     search_fields = ['exercise_session__exercise__name']
+    # Newest first along the primary key instead of sorting by set number
+    ordering = ['-id']
+
+    def get_actions(self, request):
+        # Deleting sets one by one would also leave their summaries stale
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+
+@admin.register(ExerciseSummary)
+class ExerciseSummaryAdmin(LargeTableAdmin):
+    list_display = ['exercise', 'user', 'date', 'completed_sets', 'top_weight', 'volume', 'estimated_1rm', 'finished']
+    list_filter = [PeriodFilter, 'finished']
+    list_select_related = ['exercise__workout', 'user']
+    raw_id_fields = ['exercise_session', 'exercise', 'definition', 'session', 'user']
+    search_fields = ['exercise__name', 'user__username']
+    date_hierarchy = 'date'
+
+
+@admin.register(PersonalRecord)
+class PersonalRecordAdmin(admin.ModelAdmin):
+    list_display = ['definition', 'user', 'kind', 'rep_range', 'value', 'weight', 'reps', 'date']
+    list_filter = ['kind']
+    list_select_related = ['definition', 'user']
+    autocomplete_fields = ['definition', 'user']
+    raw_id_fields = ['set', 'exercise_session']
+    search_fields = ['definition__name', 'user__username']
+    date_hierarchy = 'date'
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(LargeTableAdmin):
+    list_display = ['view_name', 'method', 'path', 'status_code', 'total_ms', 'sql_count', 'sql_ms',
+                    'duplicate_queries', 'template_ms', 'created_at']
+    list_filter = ['view_name', 'method', 'status_code']
+    search_fields = ['path', 'view_name']
+    date_hierarchy = 'created_at'
+    readonly_fields = [field.name for field in RequestProfile._meta.fields]
+    # Slowest views summarised above the list of individual requests
+    SLOWEST_VIEWS = 10
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['slowest_views'] = (
+                changelist.queryset.values('view_name')
+                .annotate(
+                    requests=Count('id'),
+                    avg_ms=Avg('total_ms'),
+                    max_ms=Max('total_ms'),
+                    avg_sql=Avg('sql_count'),
+                    avg_duplicates=Avg('duplicate_queries'),
+                )
+                .order_by('-avg_ms')[:self.SLOWEST_VIEWS]
+            )
+        return response
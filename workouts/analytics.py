@@ -0,0 +1,305 @@
+"""Vectorised training analytics over a user's completed sets.
+
+:func:`load_sets` reads every completed set of the user's finished sessions
+in one ``values_list`` query into parallel NumPy columns (:class:`SetArrays`).
+Everything else works on those arrays with grouped reductions, bincounts and
+cumulative sums instead of looping over sessions in Python:
+
+* :func:`daily_series` - per-day max/avg weight, estimated 1RM, reps, volume
+* :func:`rolling_trends` - rolling volume and intensity over a day calendar
+* :func:`weekly_tonnage` - volume per week and workout (or any other grouping)
+* :func:`acute_chronic_ratio` - acute:chronic workload ratio per day
+* :func:`progression_rates` - least-squares e1RM slope per movement
+* :func:`lttb` and :func:`weekly_buckets` - downsampling of long series
+
+Days are proleptic Gregorian ordinals (``date.toordinal()``), so they are
+plain integers until turned back into dates for display. Sets are keyed by
+their exercise's catalogue definition, so a movement's history spans every
+workout it is part of.
+"""
+from datetime import date
+
+import numpy as np
+
+from .models import Set
+from .records import BRZYCKI_MAX_REPS, selected_formula
+
+# Column -> lookup from Set, loaded in this order
+COLUMNS = {
+    'day': 'exercise_session__session__date',
+    'definition': 'exercise_session__exercise__definition_id',
+    'workout': 'exercise_session__session__workout_id',
+    'session': 'exercise_session__session_id',
+    'weight': 'weight',
+    'reps': 'reps',
+}
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+
+class SetArrays:
+    """Completed sets as parallel arrays, one element per set"""
+
+    def __init__(self, day, definition, workout, session, weight, reps):
+        self.day = day
+        self.definition = definition
+        self.workout = workout
+        self.session = session
+        self.weight = weight
+        self.reps = reps
+
+    def __len__(self):
+        return len(self.day)
+
+    @property
+    def volume(self):
+        return self.weight * self.reps
+
+    @property
+    def estimated_1rm(self):
+        return estimate_1rm(self.weight, self.reps)
+
+    def filter(self, mask):
+        return SetArrays(*(getattr(self, column)[mask] for column in COLUMNS))
+
+    def for_definition(self, definition_id):
+        return self.filter(self.definition == definition_id)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build the arrays from ``COLUMNS``-ordered tuples"""
+        rows = list(rows)
+        count = len(rows)
+        day, definition, workout, session, weight, reps = zip(*rows) if rows else ((),) * 6
+        return cls(
+            np.fromiter((d.toordinal() for d in day), dtype=np.int64, count=count),
+            np.fromiter(definition, dtype=np.int64, count=count),
+            np.fromiter(workout, dtype=np.int64, count=count),
+            np.fromiter(session, dtype=np.int64, count=count),
+            np.fromiter(weight, dtype=np.float64, count=count),
+            np.fromiter(reps, dtype=np.float64, count=count),
+        )
+
+
+def load_sets(user, definition_ids=None, start=None, end=None):
+    """The user's completed sets of finished sessions, in one query.
+
+    ``start`` and ``end`` optionally bound the session dates, inclusive.
+    """
+    sets = Set.objects.filter(
+        exercise_session__session__user=user,
+        exercise_session__session__end_time__isnull=False,
+        completed=True,
+    )
+    if definition_ids is not None:
+        sets = sets.filter(exercise_session__exercise__definition_id__in=definition_ids)
+    if start is not None:
+        sets = sets.filter(exercise_session__session__date__gte=start)
+    if end is not None:
+        sets = sets.filter(exercise_session__session__date__lte=end)
+    return SetArrays.from_rows(sets.values_list(*COLUMNS.values()).order_by())
+
+
+def estimate_1rm(weight, reps):
+    """Vectorised :func:`workouts.records.estimate_1rm`"""
+    if selected_formula() == 'brzycki':
+        estimate = weight * 36 / (37 - np.minimum(reps, BRZYCKI_MAX_REPS))
+    else:
+        estimate = weight * (1 + reps / 30)
+    estimate = np.where(reps == 1, weight, estimate)
+    return np.where((reps > 0) & (weight > 0), estimate, 0.0)
+
+
+def _groups(keys):
+    """Sort order, unique keys and group start offsets for grouped reductions"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    if not len(keys):
+        return order, sorted_keys, np.array([], dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    return order, sorted_keys[starts], starts
+
+
+def _reduce(ufunc, values, order, starts):
+    if not len(starts):
+        return np.array([], dtype=values.dtype)
+    return ufunc.reduceat(values[order], starts)
+
+
+def daily_series(sets):
+    """Per-day totals of the given sets (usually one movement's).
+
+    Returns a dict of equally long arrays: day, max_weight, avg_weight,
+    estimated_1rm, total_reps and total_volume.
+    """
+    order, days, starts = _groups(sets.day)
+    counts = np.diff(np.r_[starts, len(sets)])
+    return {
+        'day': days,
+        'max_weight': _reduce(np.maximum, sets.weight, order, starts),
+        'avg_weight': _reduce(np.add, sets.weight, order, starts) / np.maximum(counts, 1),
+        'estimated_1rm': _reduce(np.maximum, sets.estimated_1rm, order, starts),
+        'total_reps': _reduce(np.add, sets.reps, order, starts),
+        'total_volume': _reduce(np.add, sets.volume, order, starts),
+    }
+
+
+def _calendar(sets, start=None, end=None):
+    """First day and number of days of a calendar covering the sets"""
+    if start is None:
+        start = int(sets.day.min()) if len(sets) else date.today().toordinal()
+    if end is None:
+        end = int(sets.day.max()) if len(sets) else start
+    return start, max(end - start + 1, 0)
+
+
+def _daily(sets, values, start, length):
+    """Sum ``values`` into a dense per-day array starting at ``start``"""
+    offsets = sets.day - start
+    inside = (offsets >= 0) & (offsets < length)
+    return np.bincount(offsets[inside], weights=values[inside], minlength=length)[:length]
+
+
+def rolling_sum(values, window):
+    """Trailing ``window``-long sums, with partial windows at the start"""
+    totals = np.cumsum(values)
+    totals[window:] = totals[window:] - totals[:-window]
+    return totals
+
+
+def rolling_trends(sets, window=CHRONIC_DAYS, start=None, end=None):
+    """Rolling volume and intensity over every day from ``start`` to ``end``.
+
+    ``volume`` is the average volume per training day of the trailing
+    ``window`` days and ``intensity`` the average load per rep over the same
+    days.
+    """
+    start, length = _calendar(sets, start, end)
+    daily_volume = _daily(sets, sets.volume, start, length)
+    volume = rolling_sum(daily_volume, window)
+    reps = rolling_sum(_daily(sets, sets.reps, start, length), window)
+    training_days = rolling_sum((daily_volume > 0).astype(np.float64), window)
+    return {
+        'day': np.arange(start, start + length),
+        'volume': np.divide(volume, training_days, out=np.zeros(length), where=training_days > 0),
+        'intensity': np.divide(volume, reps, out=np.zeros(length), where=reps > 0),
+    }
+
+
+def weekly_tonnage(sets, groups=None):
+    """Volume per Monday-based week and group (the set's workout by default).
+
+    ``groups`` is an array with a group id per set, e.g. a muscle group.
+    Returns the week start days, the group ids and a weeks x groups matrix.
+    """
+    groups = sets.workout if groups is None else groups
+    # Ordinal 1 (1 Jan 0001) is a Monday
+    weeks = (sets.day - 1) // 7
+    week_ids, week_index = np.unique(weeks, return_inverse=True)
+    group_ids, group_index = np.unique(groups, return_inverse=True)
+    cells = week_index * len(group_ids) + group_index
+    tonnage = np.bincount(cells, weights=sets.volume, minlength=len(week_ids) * len(group_ids))
+    return {
+        'week': week_ids * 7 + 1,
+        'group': group_ids,
+        'tonnage': tonnage.reshape(len(week_ids), len(group_ids)),
+    }
+
+
+def acute_chronic_ratio(sets, acute=ACUTE_DAYS, chronic=CHRONIC_DAYS, start=None, end=None):
+    """Acute:chronic workload ratio of daily volume for every day.
+
+    Both loads are average daily volume over their trailing windows; days
+    without chronic load have a ratio of NaN.
+    """
+    start, length = _calendar(sets, start, end)
+    load = _daily(sets, sets.volume, start, length)
+    acute_load = rolling_sum(load, acute) / acute
+    chronic_load = rolling_sum(load, chronic) / chronic
+    ratio = np.full(length, np.nan)
+    np.divide(acute_load, chronic_load, out=ratio, where=chronic_load > 0)
+    return {'day': np.arange(start, start + length), 'ratio': ratio}
+
+
+def progression_rates(sets):
+    """Least-squares slope of each movement's daily best e1RM, in kg per week.
+
+    Movements trained on fewer than two days have no rate. Returns a dict of
+    definition id -> rate.
+    """
+    if not len(sets):
+        return {}
+    # One point per movement and day: that day's best estimated 1RM
+    span = int(sets.day.max() - sets.day.min()) + 1
+    definition_ids, definition_index = np.unique(sets.definition, return_inverse=True)
+    keys = definition_index * span + (sets.day - sets.day.min())
+    order, point_keys, starts = _groups(keys)
+    y = _reduce(np.maximum, sets.estimated_1rm, order, starts)
+    point_definition = point_keys // span
+    x = (point_keys % span) / 7
+
+    def total(values):
+        return np.bincount(point_definition, weights=values, minlength=len(definition_ids))
+
+    n = total(np.ones_like(x))
+    sum_x, sum_y = total(x), total(y)
+    denominator = n * total(x * x) - sum_x ** 2
+    slopes = np.divide(n * total(x * y) - sum_x * sum_y, denominator,
+                       out=np.full(len(definition_ids), np.nan), where=denominator > 0)
+    return {
+        int(definition_id): float(slope)
+        for definition_id, slope in zip(definition_ids, slopes) if not np.isnan(slope)
+    }
+
+
+def lttb(x, y, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps of a series.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point spanning the largest triangle with the previously
+    kept point and the average of the next bucket, which preserves peaks and
+    dips. Series of at most ``threshold`` points are returned whole.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    edges = np.r_[edges, count]
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x = x[end:edges[bucket + 2]].mean()
+        next_y = y[end:edges[bucket + 2]].mean()
+        # Twice the triangle areas; only their order matters
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def weekly_buckets(days, values, how='mean'):
+    """Reduce a daily series to one point per Monday-based week.
+
+    ``how`` is 'max' (e.g. for top weights) or 'mean'. Returns the week start
+    days and the weekly values.
+    """
+    order, weeks, starts = _groups((days - 1) // 7)
+    if how == 'max':
+        weekly = _reduce(np.maximum, values, order, starts)
+    else:
+        counts = np.diff(np.r_[starts, len(days)])
+        weekly = _reduce(np.add, values, order, starts) / np.maximum(counts, 1)
+    return weeks * 7 + 1, weekly
+
+
+def to_dates(days):
+    return [date.fromordinal(int(day)) for day in days]
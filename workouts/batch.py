@@ -0,0 +1,240 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .activity import refresh_days_for_summaries
+from .last_performance import invalidate_last_sets
+from .live import publish_notes, publish_set
+from .models import AppliedOperation, ExerciseSession, Set
+from .records import update_records
+from .summaries import refresh_exercise_summaries
+from .versioning import bump_data_version
+
+OPERATION_TYPES = ('set', 'notes', 'add')
+
+# How long applied operation ids are remembered for deduplication
+OPERATION_RETENTION = timedelta(days=30)
+
+
+def _parse(operations):
+    """Coalesce raw operations, keeping the last write for each set and notes field"""
+    if not isinstance(operations, list):
+        raise ValueError('operations must be a list')
+
+    set_updates = {}
+    notes_updates = {}
+    adds = []
+    for index, op in enumerate(operations):
+        op_type = op.get('type') if isinstance(op, dict) else None
+        if op_type not in OPERATION_TYPES:
+            raise ValueError(f'Operation {index} has an unknown type: {op_type!r}')
+        if op_type == 'set':
+            set_updates[int(op['set_id'])] = {
+                'weight': float(op.get('weight', 0)),
+                'reps': int(op.get('reps', 0)),
+                'completed': bool(op.get('completed', False)),
+            }
+        elif op_type == 'notes':
+            notes_updates[int(op['exercise_session_id'])] = str(op.get('notes', ''))
+        else:
+            adds.append((index, int(op['exercise_session_id'])))
+    return set_updates, notes_updates, adds
+
+
+def _owned_exercise_sessions(user, ids):
+    exercise_sessions = ExerciseSession.objects.filter(id__in=ids, session__user=user).in_bulk()
+    missing = set(ids) - set(exercise_sessions)
+    if missing:
+        raise ValueError(f'Exercise session {min(missing)} not found')
+    return exercise_sessions
+
+
+def _rejected(message):
+    return {'status': 'error', 'message': message}
+
+
+def _applicable(user, operations, results):
+    """Operations of a replay that can be applied; the others get an error result.
+
+    Checks what would make :func:`apply_operations` reject the whole batch
+    (a malformed operation, or a set or exercise session that is gone or
+    not the user's) so one stale operation cannot hold back the rest.
+    """
+    parsed = []
+    for op in operations:
+        try:
+            _parse([op])
+        except (KeyError, TypeError, ValueError) as e:
+            results[op['op_id']] = _rejected(f'Invalid operation: {e}')
+        else:
+            parsed.append(op)
+
+    set_ids = {int(op['set_id']) for op in parsed if op['type'] == 'set'}
+    exercise_session_ids = {int(op['exercise_session_id']) for op in parsed if op['type'] != 'set'}
+    owned_sets = set(
+        Set.objects.filter(id__in=set_ids, exercise_session__session__user=user).values_list('id', flat=True)
+    ) if set_ids else set()
+    owned_exercise_sessions = set(
+        ExerciseSession.objects.filter(id__in=exercise_session_ids, session__user=user).values_list('id', flat=True)
+    ) if exercise_session_ids else set()
+
+    applicable = []
+    for op in parsed:
+        if op['type'] == 'set' and int(op['set_id']) not in owned_sets:
+            results[op['op_id']] = _rejected(f"Set {op['set_id']} not found")
+        elif op['type'] != 'set' and int(op['exercise_session_id']) not in owned_exercise_sessions:
+            results[op['op_id']] = _rejected(f"Exercise session {op['exercise_session_id']} not found")
+        else:
+            applicable.append(op)
+    return applicable
+
+
+def apply_operations(user, operations, origin=''):
+    """Apply a batch of set, notes and add-set operations in one transaction.
+
+    Returns one result dict per operation, in order. Add operations report
+    the id and number of the set they created. Changes are broadcast to the
+    user's other open pages; ``origin`` is the client id of the sender.
+    """
+    set_updates, notes_updates, adds = _parse(operations)
+    results = [{'status': 'success'} for _ in operations]
+    touched = set()
+    changed_sets = []
+
+    with transaction.atomic():
+        if operations:
+            bump_data_version(user)
+        if set_updates:
+            sets = Set.objects.filter(
+                id__in=set_updates, exercise_session__session__user=user
+            ).in_bulk()
+            missing = set(set_updates) - set(sets)
+            if missing:
+                raise ValueError(f'Set {min(missing)} not found')
+            for set_id, values in set_updates.items():
+                set_obj = sets[set_id]
+                set_obj.weight = values['weight']
+                set_obj.reps = values['reps']
+                set_obj.completed = values['completed']
+                touched.add(set_obj.exercise_session_id)
+            Set.objects.bulk_update(sets.values(), ['weight', 'reps', 'completed'])
+            changed_sets += [('set', set_obj) for set_obj in sets.values()]
+
+        if notes_updates:
+            exercise_sessions = _owned_exercise_sessions(user, notes_updates)
+            for exercise_session_id, notes in notes_updates.items():
+                exercise_sessions[exercise_session_id].notes = notes
+            ExerciseSession.objects.bulk_update(exercise_sessions.values(), ['notes'])
+            for exercise_session in exercise_sessions.values():
+                publish_notes(user.pk, exercise_session, origin=origin)
+
+        if adds:
+            add_ids = {exercise_session_id for _, exercise_session_id in adds}
+            _owned_exercise_sessions(user, add_ids)
+            next_numbers = dict(
+                Set.objects.filter(exercise_session_id__in=add_ids)
+                .values('exercise_session_id')
+                .annotate(max_set=Max('set_number'))
+                .order_by()
+                .values_list('exercise_session_id', 'max_set')
+            )
+            new_sets = []
+            for _, exercise_session_id in adds:
+                next_numbers[exercise_session_id] = (next_numbers.get(exercise_session_id) or 0) + 1
+                new_sets.append(Set(
+                    exercise_session_id=exercise_session_id,
+                    set_number=next_numbers[exercise_session_id],
+                    weight=0,
+                    reps=0,
+                    completed=False
+                ))
+            Set.objects.bulk_create(new_sets)
+            for (index, _), new_set in zip(adds, new_sets):
+                results[index].update(set_id=new_set.id, set_number=new_set.set_number)
+            changed_sets += [('add', new_set) for new_set in new_sets]
+            touched |= add_ids
+
+        if touched:
+            summaries = refresh_exercise_summaries(touched)
+            update_records(user, summaries)
+            # Edits to an already finished session change its "last performance"
+            finished = [summary.definition_id for summary in summaries if summary.finished]
+            if finished:
+                transaction.on_commit(lambda: invalidate_last_sets(user, finished))
+            refresh_days_for_summaries(user, summaries)
+
+            session_ids = {summary.exercise_session_id: summary.session_id for summary in summaries}
+            for message_type, set_obj in changed_sets:
+                publish_set(user.pk, session_ids[set_obj.exercise_session_id], set_obj, message_type, origin)
+
+    return results
+
+
+def replay_operations(user, operations, origin=''):
+    """Idempotently apply operations that carry client-generated ``op_id``s.
+
+    Operations already applied for this user are skipped and report their
+    stored result, so a client can safely resend its whole outbox. A set
+    operation may reference a set created by an earlier add operation
+    through ``set_ref`` (the add's op_id) instead of ``set_id``.
+
+    Unlike :func:`apply_operations`, an operation that cannot be applied
+    (its set was deleted on another device, say) does not fail the batch: it
+    gets an ``error`` result of its own, which is remembered like any other,
+    and the rest are applied.
+    """
+    if not isinstance(operations, list):
+        raise ValueError('operations must be a list')
+    op_ids = []
+    for index, op in enumerate(operations):
+        op_id = op.get('op_id') if isinstance(op, dict) else None
+        if not isinstance(op_id, str) or not op_id or len(op_id) > 64:
+            raise ValueError(f'Operation {index} has no valid op_id')
+        op_ids.append(op_id)
+
+    # Adds referenced from earlier requests are looked up together with the batch
+    set_refs = [op['set_ref'] for op in operations if isinstance(op.get('set_ref'), str)]
+
+    with transaction.atomic():
+        known = dict(
+            AppliedOperation.objects.filter(user=user, op_id__in=op_ids + set_refs)
+            .values_list('op_id', 'result')
+        )
+        pending = []
+        seen = set(known)
+        for op in operations:
+            if op['op_id'] not in seen:
+                seen.add(op['op_id'])
+                pending.append(op)
+
+        # Adds first, so later set operations can resolve their set_ref
+        adds = _applicable(user, [op for op in pending if op.get('type') == 'add'], known)
+        for op, result in zip(adds, apply_operations(user, adds, origin)):
+            known[op['op_id']] = result
+
+        writes = []
+        for op in pending:
+            if op.get('type') == 'add':
+                continue
+            if op.get('type') == 'set' and op.get('set_id') is None:
+                ref = known.get(op.get('set_ref'))
+                if not ref or 'set_id' not in ref:
+                    known[op['op_id']] = _rejected(f"Unknown set_ref {op.get('set_ref')!r}")
+                    continue
+                op = {**op, 'set_id': ref['set_id']}
+            writes.append(op)
+        writes = _applicable(user, writes, known)
+        for op, result in zip(writes, apply_operations(user, writes, origin)):
+            known[op['op_id']] = result
+
+        AppliedOperation.objects.bulk_create([
+            AppliedOperation(user=user, op_id=op['op_id'], result=known[op['op_id']])
+            for op in pending
+        ])
+        AppliedOperation.objects.filter(
+            user=user, applied_at__lt=timezone.now() - OPERATION_RETENTION
+        ).delete()
+
+    return [known[op_id] for op_id in op_ids]
@@ -0,0 +1,274 @@
+"""Query-count and latency benchmarks for every view in ``workouts.urls``.
+
+``generate_history`` builds a synthetic lifter with years of data using bulk
+inserts; ``run_benchmark`` drives each URL through the test client and
+records queries, wall time and response size. See the ``benchmark`` command.
+``run_analytics_benchmark`` times ``workouts.analytics`` on a large history
+(the ``benchmark_analytics`` command).
+"""
+import json
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .activity import rebuild_activity
+from .analytics import (
+    acute_chronic_ratio, daily_series, load_sets, progression_rates, rolling_trends, weekly_tonnage,
+)
+from .bootstrap import start_session
+from .models import Workout, Exercise, Session, ExerciseSession, Set
+from .records import rebuild_records
+from .summaries import rebuild_summaries
+from .urls import urlpatterns
+
+DEFAULT_SCALES = [(2, 10, 3), (4, 100, 4), (6, 500, 5)]
+
+# Analysing 100k sets must stay under this
+ANALYTICS_BUDGET_MS = 50
+# Loading them is one query plus building the arrays, and costs far more
+LOAD_BUDGET_MS = 1000
+
+
+def parse_scales(value):
+    """Parse ``"WxSxK,..."`` into (workouts, sessions, sets) tuples"""
+    scales = []
+    for part in value.split(','):
+        workouts, sessions, sets = (int(n) for n in part.lower().split('x'))
+        scales.append((workouts, sessions, sets))
+    return scales
+
+
+def generate_history(username, workouts, sessions, sets, exercises_per_workout=5):
+    """Create a user with ``workouts`` workouts of ``sessions`` finished sessions each.
+
+    Every exercise in a session gets ``sets`` completed sets. One session per
+    day is logged going back from yesterday, and one active session is left
+    open so the logging screens have something to show.
+    """
+    user = User.objects.create(username=username)
+    workout_objs = Workout.objects.bulk_create([
+        Workout(name=f'Workout {w}', user=user) for w in range(workouts)
+    ])
+    exercises = Exercise.objects.bulk_create([
+        Exercise(name=f'Exercise {w}.{e}', workout=workout, order=e)
+        for w, workout in enumerate(workout_objs)
+        for e in range(exercises_per_workout)
+    ])
+    exercises_by_workout = {}
+    for exercise in exercises:
+        exercises_by_workout.setdefault(exercise.workout_id, []).append(exercise)
+
+    now = timezone.now()
+    session_objs = Session.objects.bulk_create([
+        Session(
+            workout=workout_objs[i % workouts],
+            user=user,
+            date=(now - timedelta(days=i + 1)).date(),
+            start_time=now - timedelta(days=i + 1, hours=1),
+            end_time=now - timedelta(days=i + 1),
+        )
+        for i in range(workouts * sessions)
+    ], batch_size=1000)
+    exercise_sessions = ExerciseSession.objects.bulk_create([
+        ExerciseSession(exercise=exercise, session=session)
+        for session in session_objs
+        for exercise in exercises_by_workout[session.workout_id]
+    ], batch_size=1000)
+    Set.objects.bulk_create((
+        Set(
+            exercise_session=exercise_session,
+            set_number=n,
+            weight=20 + (exercise_session.id % 50),
+            reps=5 + n,
+            completed=True,
+        )
+        for exercise_session in exercise_sessions
+        for n in range(1, sets + 1)
+    ), batch_size=2000)
+
+    rebuild_summaries(user=user)
+    rebuild_activity(user=user)
+    rebuild_records(user)
+    start_session(user, workout_objs[0])
+    return user
+
+
+def _fixture(user):
+    active = Session.objects.get(user=user, end_time__isnull=True)
+    active_es = active.exercise_sessions.first()
+    finished = Session.objects.filter(user=user, end_time__isnull=False).first()
+    return {
+        'user': user,
+        'workout': active.workout,
+        'exercise': active_es.exercise,
+        'active': active,
+        'active_es': active_es,
+        'set': active_es.sets.first(),
+        'finished': finished,
+    }
+
+
+def _scenarios(f):
+    """(method, path, JSON payload) for each URL name; payloads may be callables"""
+    day = f['finished'].date
+    # Heavier than anything generate_history logs, so every scale sets the same records
+    set_payload = {'set_id': f['set'].id, 'weight': 100, 'reps': 8, 'completed': True}
+    return {
+        'dashboard': ('get', reverse('dashboard'), None),
+        'login': ('get', reverse('login'), None),
+        'workout_list': ('get', reverse('workout_list'), None),
+        'workout_create': ('get', reverse('workout_create'), None),
+        'workout_edit': ('get', reverse('workout_edit', args=[f['workout'].id]), None),
+        'session_start': ('get', reverse('session_start', args=[f['workout'].id]), None),
+        'exercise_session': ('get', reverse('exercise_session', args=[f['active'].id, 1]), None),
+        'session_finish': ('get', reverse('session_finish', args=[f['active'].id]), None),
+        'session_cancel': ('get', reverse('session_cancel', args=[f['active'].id]), None),
+        'history': ('get', reverse('history') + f'?year={day.year}&month={day.month}', None),
+        'history_day': ('get', reverse('history_day', args=[day.year, day.month, day.day]), None),
+        'session_delete': ('get', reverse('session_delete', args=[f['finished'].id]), None),
+        'export_history': ('get', reverse('export_history') + '?format=csv', None),
+        'import_history': ('get', reverse('import_history'), None),
+        'charts': ('get', reverse('charts') + f"?exercise={f['exercise'].definition_id}", None),
+        'activity_heatmap': ('get', reverse('activity_heatmap') + f'?year={day.year}', None),
+        'records': ('get', reverse('records'), None),
+        'chart_series': ('get', reverse('chart_series') + f"?exercise={f['exercise'].definition_id}", None),
+        'chart_load': ('get', reverse('chart_load'), None),
+        'session_payload': ('get', reverse('session_payload', args=[f['active'].id]), None),
+        'update_set': ('post', reverse('update_set'), set_payload),
+        'update_notes': ('post', reverse('update_notes'),
+                         {'exercise_session_id': f['active_es'].id, 'notes': 'Benchmark'}),
+        'add_set': ('post', reverse('add_set'), {'exercise_session_id': f['active_es'].id}),
+        'batch_update': ('post', reverse('batch_update'), {'operations': [
+            {'type': 'set', **set_payload},
+            {'type': 'notes', 'exercise_session_id': f['active_es'].id, 'notes': 'Batch'},
+        ]}),
+        'replay_operations': ('post', reverse('replay_operations'), lambda: {'operations': [
+            {'op_id': uuid.uuid4().hex, 'type': 'set', **set_payload},
+        ]}),
+        # Answers 204 under the test client's WSGI handler instead of streaming forever
+        'live_events': ('get', reverse('live_events'), None),
+        'service_worker': ('get', reverse('service_worker'), None),
+    }
+
+
+def _request(client, method, path, payload):
+    if callable(payload):
+        payload = payload()
+    if method == 'post':
+        response = client.post(path, json.dumps(payload), content_type='application/json')
+    else:
+        response = client.get(path)
+    if response.streaming:
+        return response, len(b''.join(response.streaming_content))
+    return response, len(response.content)
+
+
+def measure(client, method, path, payload=None, repeat=5):
+    """Queries of a cold request plus timing statistics over ``repeat`` runs"""
+    cache.clear()
+    timings = []
+    query_counts = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response, size = _request(client, method, path, payload)
+            timings.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+    return {
+        'status': response.status_code,
+        'queries': query_counts[0],
+        'warm_queries': query_counts[-1],
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'bytes': size,
+    }
+
+
+def run_benchmark(scales=DEFAULT_SCALES, repeat=5, exercises_per_workout=5, log=None):
+    """Benchmark every URL at each data scale and return the report dict"""
+    report = {'repeat': repeat, 'exercises_per_workout': exercises_per_workout, 'scales': {}}
+    for workouts, sessions, sets in scales:
+        label = f'{workouts}x{sessions}x{sets}'
+        user = generate_history(f'bench-{label}', workouts, sessions, sets, exercises_per_workout)
+        client = Client()
+        client.force_login(user)
+        scenarios = _scenarios(_fixture(user))
+
+        results = {}
+        for pattern in urlpatterns:
+            name = pattern.name
+            if name not in scenarios:
+                results[name] = {'status': None, 'error': 'no benchmark scenario'}
+                continue
+            results[name] = measure(client, *scenarios[name], repeat=repeat)
+            if log:
+                log(f"{label:>12} {name:<20} {results[name]['queries']:>4} queries "
+                    f"{results[name]['median_ms']:>9.2f} ms {results[name]['bytes']:>8} B")
+        report['scales'][label] = {
+            'workouts': workouts,
+            'sessions_per_workout': sessions,
+            'sets_per_exercise': sets,
+            'total_sets': workouts * sessions * exercises_per_workout * sets,
+            'urls': results,
+        }
+    return report
+
+
+def _analyse(sets):
+    """Everything the charts and dashboards compute from a user's sets"""
+    daily_series(sets.for_definition(sets.definition[0]))
+    rolling_trends(sets)
+    weekly_tonnage(sets)
+    acute_chronic_ratio(sets)
+    progression_rates(sets)
+
+
+def run_analytics_benchmark(sets=100_000, repeat=5, exercises_per_workout=5, log=None):
+    """Time loading and analysing a history of about ``sets`` completed sets.
+
+    Loading (one query, mostly the database's cost, plus building the arrays)
+    is held to ``LOAD_BUDGET_MS`` and the analysis to ``ANALYTICS_BUDGET_MS``;
+    the report has both medians, their total and whether each kept to its
+    budget. ``within_budget`` is only true if both did.
+    """
+    workouts, sets_per_exercise = 4, 4
+    sessions = max(sets // (workouts * exercises_per_workout * sets_per_exercise), 1)
+    user = generate_history(f'analytics-{sets}', workouts, sessions, sets_per_exercise, exercises_per_workout)
+
+    load_ms, compute_ms = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        arrays = load_sets(user)
+        load_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        _analyse(arrays)
+        compute_ms.append((time.perf_counter() - started) * 1000)
+
+    total_ms = [load + compute for load, compute in zip(load_ms, compute_ms)]
+    report = {
+        'sets': len(arrays),
+        'repeat': repeat,
+        'load_median_ms': round(statistics.median(load_ms), 2),
+        'compute_median_ms': round(statistics.median(compute_ms), 2),
+        'compute_max_ms': round(max(compute_ms), 2),
+        'total_median_ms': round(statistics.median(total_ms), 2),
+        'load_budget_ms': LOAD_BUDGET_MS,
+        'compute_budget_ms': ANALYTICS_BUDGET_MS,
+        'load_within_budget': statistics.median(load_ms) < LOAD_BUDGET_MS,
+        'compute_within_budget': statistics.median(compute_ms) < ANALYTICS_BUDGET_MS,
+    }
+    report['within_budget'] = report['load_within_budget'] and report['compute_within_budget']
+    if log:
+        log(f"{report['sets']} sets: load {report['load_median_ms']:.1f} ms (budget {LOAD_BUDGET_MS} ms), "
+            f"analyse {report['compute_median_ms']:.1f} ms (budget {ANALYTICS_BUDGET_MS} ms), "
+            f"total {report['total_median_ms']:.1f} ms")
+    return report
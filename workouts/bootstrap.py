@@ -0,0 +1,50 @@
+from django.db import transaction
+
+from .last_performance import last_sets_by_definition
+from .models import ExerciseSession, Session, Set
+
+DEFAULT_SET_COUNT = 4
+
+
+def build_initial_sets(exercise_session, previous_sets):
+    """Unsaved Set rows pre-filled from the previous session, or blank ones"""
+    if previous_sets:
+        values = previous_sets[:DEFAULT_SET_COUNT]
+    else:
+        values = [(0, 0)] * DEFAULT_SET_COUNT
+    return [
+        Set(
+            exercise_session=exercise_session,
+            set_number=i,
+            weight=weight,
+            reps=reps,
+            completed=False
+        )
+        for i, (weight, reps) in enumerate(values, 1)
+    ]
+
+
+def add_exercises_to_session(session, exercises):
+    """Create the ExerciseSessions and pre-filled Sets for exercises in bulk"""
+    exercise_sessions = ExerciseSession.objects.bulk_create([
+        ExerciseSession(exercise=exercise, session=session)
+        for exercise in exercises
+    ])
+    previous = last_sets_by_definition(session.user_id, [exercise.definition_id for exercise in exercises])
+    sets = []
+    for exercise, exercise_session in zip(exercises, exercise_sessions):
+        sets.extend(build_initial_sets(exercise_session, previous.get(exercise.definition_id)))
+    Set.objects.bulk_create(sets)
+    return exercise_sessions
+
+
+def start_session(user, workout):
+    """Create a session with every exercise and its sets ready to log.
+
+    Costs a fixed number of queries however many exercises the workout has.
+    """
+    with transaction.atomic():
+        session = Session.objects.create(workout=workout, user=user)
+        add_exercises_to_session(session, list(workout.exercises.all()))
+    return session
+
@@ -0,0 +1,115 @@
+"""Shared exercise catalogue.
+
+Every ``Exercise`` points to an ``ExerciseDefinition``: the movement itself,
+independent of the workout it appears in, so "Bench Press" in Push A and
+"bench press" in Push B share prefill, charts and records. Names are matched
+through ``ExerciseAlias`` rows keyed by their normalised spelling; each
+definition has an alias for its own name, so resolving any batch of names
+is one indexed query (plus inserts for names never seen before).
+"""
+import re
+
+from .models import ExerciseAlias, ExerciseDefinition
+
+# Common movements with their muscle group and other names people log them
+# under. Migration 0009 installed a frozen copy; install_standard_exercises
+# adds any entries added here since.
+STANDARD_EXERCISES = [
+    ('Bench Press', 'chest', ['barbell bench press', 'flat bench press', 'flat bench', 'bb bench press']),
+    ('Incline Bench Press', 'chest', ['incline barbell bench press', 'incline bench']),
+    ('Dumbbell Bench Press', 'chest', ['db bench press', 'dumbbell press', 'flat dumbbell press']),
+    ('Incline Dumbbell Press', 'chest', ['incline db press', 'incline dumbbell bench press']),
+    ('Chest Fly', 'chest', ['chest flys', 'chest flyes', 'pec fly', 'pec deck']),
+    ('Push Up', 'chest', ['pushup', 'push ups', 'pushups']),
+    ('Dips', 'triceps', ['dip', 'parallel bar dips']),
+    ('Overhead Press', 'shoulders', ['ohp', 'military press', 'standing press', 'barbell overhead press']),
+    ('Shoulder Press', 'shoulders', ['dumbbell shoulder press', 'db shoulder press', 'seated shoulder press']),
+    ('Lateral Raise', 'shoulders', ['lateral raises', 'side lateral raise', 'side raises']),
+    ('Face Pull', 'shoulders', ['face pulls']),
+    ('Pull Up', 'back', ['pullup', 'pull ups', 'pullups']),
+    ('Chin Up', 'back', ['chinup', 'chin ups', 'chinups']),
+    ('Lat Pulldown', 'back', ['lat pull down', 'lat pulldowns', 'pulldown']),
+    ('Barbell Row', 'back', ['bent over row', 'bent over barbell row', 'bb row', 'barbell rows']),
+    ('Seated Cable Row', 'back', ['cable row', 'seated row', 'seated cable rows']),
+    ('Dumbbell Row', 'back', ['db row', 'one arm dumbbell row', 'single arm dumbbell row']),
+    ('Deadlift', 'back', ['conventional deadlift', 'barbell deadlift', 'deadlifts']),
+    ('Romanian Deadlift', 'hamstrings', ['rdl', 'romanian deadlifts']),
+    ('Squat', 'quads', ['back squat', 'barbell squat', 'barbell back squat', 'squats']),
+    ('Front Squat', 'quads', ['front squats']),
+    ('Leg Press', 'quads', ['leg presses']),
+    ('Leg Extension', 'quads', ['leg extensions']),
+    ('Bulgarian Split Squat', 'quads', ['bulgarian split squats', 'bss']),
+    ('Lunge', 'quads', ['lunges', 'walking lunge', 'walking lunges']),
+    ('Leg Curl', 'hamstrings', ['leg curls', 'hamstring curl', 'lying leg curl', 'seated leg curl']),
+    ('Hip Thrust', 'glutes', ['hip thrusts', 'barbell hip thrust']),
+    ('Calf Raise', 'calves', ['calf raises', 'standing calf raise']),
+    ('Bicep Curl', 'biceps', ['biceps curl', 'bicep curls', 'biceps curls']),
+    ('Hammer Curl', 'biceps', ['hammer curls']),
+    ('Tricep Pushdown', 'triceps', ['triceps pushdown', 'tricep pushdowns', 'cable pushdown', 'rope pushdown']),
+    ('Skull Crusher', 'triceps', ['skull crushers', 'lying tricep extension']),
+    ('Plank', 'core', ['planks']),
+    ('Hanging Leg Raise', 'core', ['hanging leg raises']),
+    ('Cable Crunch', 'core', ['cable crunches']),
+]
+
+
+def normalize_name(name):
+    """Spelling-insensitive key of an exercise name: "Push-up " -> "push up\""""
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', name.lower()).split())
+
+
+def display_name(name):
+    return ' '.join(name.split())
+
+
+def install_standard_exercises():
+    """Add the ``STANDARD_EXERCISES`` that are not in the catalogue yet"""
+    ExerciseDefinition.objects.bulk_create([
+        ExerciseDefinition(name=name, muscle_group=muscle_group)
+        for name, muscle_group, _ in STANDARD_EXERCISES
+    ], ignore_conflicts=True)
+    ids = dict(ExerciseDefinition.objects.filter(
+        name__in=[name for name, _, _ in STANDARD_EXERCISES]
+    ).values_list('name', 'id'))
+    ExerciseAlias.objects.bulk_create([
+        ExerciseAlias(name=normalize_name(alias), definition_id=ids[name])
+        for name, _, aliases in STANDARD_EXERCISES
+        for alias in [name, *aliases]
+    ], ignore_conflicts=True)
+
+
+def resolve_definitions(names):
+    """Definition id for each exercise name, creating definitions for new names.
+
+    Returns a dict of name (as given) -> definition id.
+    """
+    keys = {name: normalize_name(name) for name in names}
+    found = dict(ExerciseAlias.objects.filter(name__in=set(keys.values())).values_list('name', 'definition_id'))
+
+    # First spelling of each unknown name becomes the definition's name
+    new = {}
+    for name, key in keys.items():
+        if key not in found and key not in new:
+            new[key] = display_name(name)
+    if new:
+        # Conflicts are definitions another request created in the meantime
+        ExerciseDefinition.objects.bulk_create(
+            [ExerciseDefinition(name=name) for name in new.values()], ignore_conflicts=True,
+        )
+        ids = dict(ExerciseDefinition.objects.filter(name__in=new.values()).values_list('name', 'id'))
+        ExerciseAlias.objects.bulk_create(
+            [ExerciseAlias(name=key, definition_id=ids[name]) for key, name in new.items()],
+            ignore_conflicts=True,
+        )
+        found.update(ExerciseAlias.objects.filter(name__in=new).values_list('name', 'definition_id'))
+    return {name: found[key] for name, key in keys.items()}
+
+
+def assign_definitions(exercises):
+    """Point unsaved exercises without a definition at the one matching their name"""
+    pending = [exercise for exercise in exercises if exercise.definition_id is None]
+    if pending:
+        definitions = resolve_definitions({exercise.name for exercise in pending})
+        for exercise in pending:
+            exercise.definition_id = definitions[exercise.name]
+    return exercises
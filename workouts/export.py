@@ -0,0 +1,98 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .models import Set
+
+# Output column -> lookup from Set; one flat values() join, no model instances
+EXPORT_COLUMNS = {
+    'date': 'exercise_session__session__date',
+    'workout': 'exercise_session__session__workout__name',
+    'exercise': 'exercise_session__exercise__name',
+    'set_number': 'set_number',
+    'weight': 'weight',
+    'reps': 'reps',
+    'completed': 'completed',
+    'notes': 'exercise_session__notes',
+    'session_id': 'exercise_session__session_id',
+    'start_time': 'exercise_session__session__start_time',
+    'end_time': 'exercise_session__session__end_time',
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+
+
+def history_rows(user, chunk_size=CHUNK_SIZE):
+    """Every set the user has logged as a flat tuple, oldest first.
+
+    Rows are fetched ``chunk_size`` at a time (a server-side cursor on
+    PostgreSQL), so memory stays flat however long the history is.
+    """
+    return (
+        Set.objects.filter(exercise_session__session__user=user)
+        .order_by(
+            'exercise_session__session__date',
+            'exercise_session__session__start_time',
+            'exercise_session__session_id',
+            'exercise_session__exercise__order',
+            'exercise_session_id',
+            'set_number',
+        )
+        .values_list(*EXPORT_COLUMNS.values())
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS.keys())
+    for row in rows:
+        yield writer.writerow([_text(value) for value in row])
+
+
+def stream_jsonl(rows):
+    columns = list(EXPORT_COLUMNS)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, (_text(value) for value in row)))) + '\n'
+
+
+def stream_history(user, export_format, chunk_size=CHUNK_SIZE):
+    """Lines of the user's history in ``export_format`` ('csv' or 'jsonl')"""
+    rows = history_rows(user, chunk_size=chunk_size)
+    if export_format == 'jsonl':
+        return stream_jsonl(rows)
+    return stream_csv(rows)
+
+
+async def astream_history(user, export_format, chunk_size=CHUNK_SIZE):
+    """:func:`stream_history` for ASGI, fetching ``chunk_size`` lines per thread hop.
+
+    Django would otherwise read a sync iterator into memory whole before
+    sending any of it to an ASGI server.
+    """
+    lines = stream_history(user, export_format, chunk_size=chunk_size)
+    take = sync_to_async(lambda: list(islice(lines, chunk_size)))
+    while batch := await take():
+        yield ''.join(batch)
@@ -0,0 +1,18 @@
+"""Cache keys of the dashboard and workout list fragments.
+
+The templates cache their listings with ``{% cache %}``, keyed on the user
+and their listing version, which is their ``DataVersion``. Whatever adds,
+edits or removes one of the user's workouts, exercises or sessions bumps
+that row in the database, so the next render misses in every worker;
+fragments of old versions just expire.
+"""
+from .versioning import request_version
+
+# Old versions are never read again, the timeout only bounds how long they linger
+FRAGMENT_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def listing_version(request):
+    """The requesting user's current listing version, for fragment cache keys"""
+    version, _ = request_version(request)
+    return version
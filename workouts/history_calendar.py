@@ -0,0 +1,104 @@
+from calendar import monthrange
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Session
+
+# Grids are keyed on a version token per user and month, replaced whenever a
+# session of that month is finished or deleted, so only that month misses and
+# a cached month is served without touching the database. Grids of old
+# tokens are never read again and just expire.
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+GRID_DAYS = 42  # 6 weeks * 7 days
+
+
+def _version_key(user_id, year, month):
+    return f'history-calendar-version:{user_id}:{year}:{month}'
+
+
+def _cache_key(user_id, version, year, month):
+    return f'history-calendar:{user_id}:{version}:{year}:{month}'
+
+
+def _month_version(user_id, year, month):
+    key = _version_key(user_id, year, month)
+    version = cache.get(key)
+    if version is None:
+        # A fresh token, so an evicted version never matches an old grid
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_months(user, days):
+    """Make the cached grids of the months of ``days`` miss once the transaction commits"""
+    keys = {_version_key(user.pk, day.year, day.month) for day in days}
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({key: uuid4().hex for key in keys}, timeout=None))
+
+
+def is_valid_month(year, month):
+    # One year of margin on both ends keeps prev/next navigation in range
+    return MINYEAR < year < MAXYEAR and 1 <= month <= 12
+
+
+def build_month(user, year, month):
+    """Build the calendar grid for a month from a single aggregate query"""
+    first_day = date(year, month, 1)
+    days_in_month = monthrange(year, month)[1]
+    last_day = date(year, month, days_in_month)
+
+    session_counts = dict(
+        Session.objects.filter(
+            user=user,
+            date__range=(first_day, last_day),
+            end_time__isnull=False
+        )
+        .values('date')
+        .annotate(count=Count('id'))
+        .order_by()
+        .values_list('date', 'count')
+    )
+
+    # Pad with the trailing days of the previous month and leading days of the next
+    grid_start = first_day - timedelta(days=first_day.weekday())
+    calendar_days = []
+    for offset in range(GRID_DAYS):
+        day_date = grid_start + timedelta(days=offset)
+        other_month = day_date.month != month
+        calendar_days.append({
+            'day': day_date.day,
+            'date': day_date,
+            'other_month': other_month,
+            'has_session': not other_month and day_date in session_counts,
+            'session_count': 0 if other_month else session_counts.get(day_date, 0),
+        })
+
+    prev_month_date = first_day - timedelta(days=1)
+    next_month_date = last_day + timedelta(days=1)
+    return {
+        'year': year,
+        'month': month,
+        'month_name': first_day.strftime('%B %Y'),
+        'calendar_days': calendar_days,
+        'prev_month': prev_month_date.month,
+        'prev_year': prev_month_date.year,
+        'next_month': next_month_date.month,
+        'next_year': next_month_date.year,
+        'sessions_this_month': sum(session_counts.values()),
+    }
+
+
+def get_month(user, year, month):
+    """Cached calendar grid for a month, rebuilt after :func:`invalidate_months`"""
+    key = _cache_key(user.pk, _month_version(user.pk, year, month), year, month)
+    data = cache.get(key)
+    if data is None:
+        data = build_month(user, year, month)
+        cache.set(key, data, timeout=CACHE_TIMEOUT)
+    return data
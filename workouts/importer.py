@@ -0,0 +1,355 @@
+"""Bulk import of set history exported from other tracker apps.
+
+Reads Strong/Hevy-style CSV files (one row per set) as well as our own CSV
+export. Rows are streamed and written in chunks with ``bulk_create``; the
+workouts, exercises, sessions and exercise sessions a chunk refers to are
+resolved up front into dictionaries instead of one ``get_or_create`` per row.
+
+A session is identified by its workout and start time. Sessions that already
+exist are skipped, so importing the same file twice changes nothing.
+"""
+import csv
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .activity import refresh_days
+from .history_calendar import invalidate_months
+from .last_performance import invalidate_last_sets
+from .models import Workout, Exercise, Session, ExerciseSession, Set
+from .records import rebuild_records
+from .summaries import refresh_exercise_summaries
+from .versioning import bump_data_version
+
+# Canonical column -> header spellings used by other apps, preferred first
+# (compared lowercased)
+COLUMN_ALIASES = {
+    # Our own export has both; its start_time keeps sessions on the same day apart
+    'date': ['start_time', 'date', 'workout date'],
+    'end_time': ['end_time', 'end time'],
+    # Strong has the session's length instead ("1h 5m"); Hevy's duration_seconds is per set
+    'duration': ['duration'],
+    'workout': ['workout', 'workout name', 'title'],
+    'exercise': ['exercise', 'exercise name', 'exercise_title'],
+    'set_number': ['set_number', 'set order', 'set_index'],
+    'weight': ['weight', 'weight_kg', 'weight (kg)', 'weight_lbs', 'weight (lbs)'],
+    'reps': ['reps'],
+    'completed': ['completed'],
+    'notes': ['notes', 'exercise notes', 'exercise_notes'],
+}
+
+REQUIRED_COLUMNS = ['date', 'workout', 'exercise', 'weight', 'reps']
+
+# Hevy numbers sets from zero
+ZERO_BASED_HEADERS = {'set_index'}
+
+# Strong's "Set Order" for warm-up and drop sets; they are numbered by position
+UNNUMBERED_SETS = {'w', 'd'}
+
+POUND_HEADERS = {'weight_lbs', 'weight (lbs)'}
+KG_PER_POUND = 0.45359237
+
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%d %b %Y, %H:%M',
+    '%d %b %Y %H:%M',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+]
+
+CHUNK_SIZE = 5000
+
+# Row errors reported back to the user; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class ImportFormatError(ValueError):
+    """The file is not a set-per-row CSV we know how to read"""
+
+
+def _map_headers(fieldnames):
+    """Canonical column -> (header in the file, its lowercased spelling)"""
+    spellings = {header.strip().lower(): header for header in fieldnames or []}
+    found = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for spelling in aliases:
+            if spelling in spellings:
+                found[column] = (spellings[spelling], spelling)
+                break
+    missing = [column for column in REQUIRED_COLUMNS if column not in found]
+    if missing:
+        raise ImportFormatError(f"Missing column(s): {', '.join(missing)}")
+    return found
+
+
+# Every set of a session repeats its date string
+@lru_cache(maxsize=1024)
+def parse_datetime(value):
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for date_format in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unrecognised date '{value}'")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+DURATION_PATTERN = re.compile(r'^(?:(\d+)\s*h)?\s*(?:(\d+)\s*m(?:in)?)?\s*(?:(\d+)\s*s)?$')
+
+
+def parse_duration(value):
+    """Strong's session length ("1h 5m", "45m", or plain seconds) as a timedelta"""
+    value = value.strip().lower()
+    if value.isdigit():
+        return timedelta(seconds=int(value))
+    match = DURATION_PATTERN.match(value)
+    if not value or not match:
+        raise ValueError(f"Unrecognised duration '{value}'")
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _parse_bool(value):
+    return value.strip().lower() not in ('false', '0', 'no', '')
+
+
+def _parse_row(row, headers):
+    """Normalise one CSV row; raises ValueError on bad values"""
+    def value(column, default=''):
+        if column not in headers:
+            return default
+        return (row.get(headers[column][0]) or '').strip()
+
+    workout = value('workout')
+    exercise = value('exercise')
+    if not workout or not exercise:
+        raise ValueError('Missing workout or exercise name')
+
+    weight = float(value('weight') or 0)
+    if headers['weight'][1] in POUND_HEADERS:
+        weight = round(weight * KG_PER_POUND, 2)
+
+    set_number = value('set_number')
+    if set_number.lower() in UNNUMBERED_SETS:
+        set_number = None
+    elif set_number:
+        set_number = int(float(set_number))
+        if headers['set_number'][1] in ZERO_BASED_HEADERS:
+            set_number += 1
+    else:
+        set_number = None
+
+    start = parse_datetime(value('date'))
+    if value('end_time'):
+        end = parse_datetime(value('end_time'))
+    elif value('duration'):
+        end = start + parse_duration(value('duration'))
+    else:
+        # Imported sessions are finished and a null end_time would mark them
+        # active; with no length in the file at all, start is the only time known
+        end = start
+    return {
+        'workout': workout[:100],
+        'exercise': exercise[:200],
+        'start': start,
+        'end': end,
+        'set_number': set_number,
+        'weight': weight,
+        'reps': int(float(value('reps') or 0)),
+        'completed': _parse_bool(value('completed', 'true')),
+        'notes': value('notes'),
+    }
+
+
+class HistoryImporter:
+    """Imports CSV rows for one user; see :func:`import_history`"""
+
+    def __init__(self, user, chunk_size=CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        # Lookups shared by all chunks, filled lazily from the database
+        self.workouts = {}          # name -> id
+        self.exercises = {}         # (workout_id, name) -> id
+        self.definitions = {}       # exercise id -> catalogue definition id
+        self.next_order = {}        # workout_id -> next Exercise.order
+        self.sessions = {}          # (workout_id, start) -> id, created by this import
+        self.exercise_sessions = {}  # (session_id, exercise_id) -> id
+        self.set_counts = {}        # exercise_session_id -> sets written so far
+        self.skipped = set()        # (workout_id, start) of sessions that already existed
+        self.new_exercise_session_ids = []
+        self.days = set()
+        self.result = {'sessions': 0, 'sets': 0, 'skipped_sessions': 0, 'invalid_rows': 0, 'errors': []}
+
+    def run(self, lines):
+        reader = csv.DictReader(lines)
+        headers = _map_headers(reader.fieldnames)
+        chunk = []
+        for line_number, row in enumerate(reader, start=2):
+            try:
+                chunk.append(_parse_row(row, headers))
+            except (TypeError, ValueError) as e:
+                self.result['invalid_rows'] += 1
+                if len(self.result['errors']) < MAX_REPORTED_ERRORS:
+                    self.result['errors'].append(f'Line {line_number}: {e}')
+                continue
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(chunk)
+        self.result['skipped_sessions'] = len(self.skipped)
+        return self.result
+
+    def resolve_workouts(self, chunk):
+        # dicts rather than sets keep new rows in file order
+        names = dict.fromkeys(row['workout'] for row in chunk if row['workout'] not in self.workouts)
+        if not names:
+            return
+        self.workouts.update(
+            Workout.objects.filter(user=self.user, name__in=names).values_list('name', 'id')
+        )
+        created = Workout.objects.bulk_create([
+            Workout(user=self.user, name=name) for name in names if name not in self.workouts
+        ])
+        self.workouts.update((workout.name, workout.id) for workout in created)
+
+    def resolve_exercises(self, chunk):
+        keys = dict.fromkeys(
+            key for key in ((self.workouts[row['workout']], row['exercise']) for row in chunk)
+            if key not in self.exercises
+        )
+        if not keys:
+            return
+        workout_ids = {workout_id for workout_id, _ in keys}
+        for workout_id, name, exercise_id, definition_id in Exercise.objects.filter(
+            workout_id__in=workout_ids, name__in={name for _, name in keys}
+        ).values_list('workout_id', 'name', 'id', 'definition_id'):
+            self.exercises.setdefault((workout_id, name), exercise_id)
+            self.definitions[exercise_id] = definition_id
+
+        missing = [key for key in keys if key not in self.exercises]
+        unknown_orders = {workout_id for workout_id, _ in missing} - self.next_order.keys()
+        if unknown_orders:
+            self.next_order.update(dict.fromkeys(unknown_orders, 0))
+            self.next_order.update(
+                (row['workout_id'], row['last'] + 1)
+                for row in Exercise.objects.filter(workout_id__in=unknown_orders)
+                .values('workout_id').annotate(last=Max('order')).order_by()
+            )
+        new_exercises = []
+        for workout_id, name in missing:
+            new_exercises.append(Exercise(workout_id=workout_id, name=name, order=self.next_order[workout_id]))
+            self.next_order[workout_id] += 1
+        # bulk_create links new exercises to the catalogue by name
+        for exercise in Exercise.objects.bulk_create(new_exercises):
+            self.exercises[(exercise.workout_id, exercise.name)] = exercise.id
+            self.definitions[exercise.id] = exercise.definition_id
+
+    def resolve_sessions(self, chunk):
+        keys = {(self.workouts[row['workout']], row['start']) for row in chunk}
+        keys -= self.sessions.keys() | self.skipped
+        if not keys:
+            return
+        self.skipped.update(
+            key for key in Session.objects.filter(
+                user=self.user, start_time__in={start for _, start in keys}
+            ).values_list('workout_id', 'start_time')
+            if key in keys
+        )
+        new_keys = sorted(keys - self.skipped, key=lambda key: key[1])
+        ends = {(self.workouts[row['workout']], row['start']): row['end'] for row in chunk}
+        created = Session.objects.bulk_create([
+            Session(
+                user=self.user,
+                workout_id=workout_id,
+                date=timezone.localdate(start),
+                start_time=start,
+                end_time=ends[(workout_id, start)],
+            )
+            for workout_id, start in new_keys
+        ])
+        for key, session in zip(new_keys, created):
+            self.sessions[key] = session.id
+            self.days.add(session.date)
+        self.result['sessions'] += len(created)
+
+    def write_chunk(self, chunk):
+        self.resolve_workouts(chunk)
+        self.resolve_exercises(chunk)
+        self.resolve_sessions(chunk)
+
+        rows = []
+        new_exercise_sessions = {}
+        for row in chunk:
+            workout_id = self.workouts[row['workout']]
+            session_id = self.sessions.get((workout_id, row['start']))
+            if session_id is None:
+                continue
+            key = (session_id, self.exercises[(workout_id, row['exercise'])])
+            if key not in self.exercise_sessions and key not in new_exercise_sessions:
+                new_exercise_sessions[key] = ExerciseSession(
+                    session_id=key[0], exercise_id=key[1], notes=row['notes']
+                )
+            rows.append((key, row))
+
+        for key, exercise_session in zip(
+            new_exercise_sessions, ExerciseSession.objects.bulk_create(new_exercise_sessions.values())
+        ):
+            self.exercise_sessions[key] = exercise_session.id
+            self.new_exercise_session_ids.append(exercise_session.id)
+
+        sets = []
+        for key, row in rows:
+            exercise_session_id = self.exercise_sessions[key]
+            count = self.set_counts.get(exercise_session_id, 0) + 1
+            self.set_counts[exercise_session_id] = count
+            sets.append(Set(
+                exercise_session_id=exercise_session_id,
+                # Never behind the sets before it, e.g. after a warm-up set
+                set_number=max(row['set_number'] or 0, count),
+                weight=row['weight'],
+                reps=row['reps'],
+                completed=row['completed'],
+            ))
+        Set.objects.bulk_create(sets, batch_size=self.chunk_size)
+        self.result['sets'] += len(sets)
+
+    def refresh_derived_data(self):
+        """Bring summaries, records, the activity rollup and caches up to date"""
+        ids = self.new_exercise_session_ids
+        for start in range(0, len(ids), 500):
+            refresh_exercise_summaries(ids[start:start + 500])
+        refresh_days(self.user, self.days)
+        invalidate_months(self.user, self.days)
+        bump_data_version(self.user)
+        definition_ids = {self.definitions[exercise_id] for _, exercise_id in self.exercise_sessions}
+        rebuild_records(self.user, definition_ids)
+        transaction.on_commit(lambda: invalidate_last_sets(self.user, definition_ids))
+
+
+def import_history(user, lines, chunk_size=CHUNK_SIZE):
+    """Import a CSV (any iterable of text lines) into ``user``'s history.
+
+    Returns counts of created sessions and sets, skipped (already imported)
+    sessions and invalid rows, plus the first few row errors. Raises
+    :class:`ImportFormatError` when required columns are missing.
+    """
+    importer = HistoryImporter(user, chunk_size=chunk_size)
+    with transaction.atomic():
+        result = importer.run(lines)
+        importer.refresh_derived_data()
+    return result
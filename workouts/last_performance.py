@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .models import ExerciseDefinition, ExerciseSummary, Set
+
+# Entries are refreshed or invalidated on every change, the timeout only
+# bounds how long an unused entry can linger
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _cache_key(user_id, definition_id):
+    return f'last-performance:{user_id}:definition:{definition_id}'
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def previous_sets_by_definition(user, definition_ids):
+    """Completed sets of the last finished session of each movement, in one query.
+
+    The last session with a completed set of the movement is looked up across
+    every workout the movement is in. Returns a dict mapping definition id to
+    a list of (weight, reps) tuples in set order. Movements never completed
+    in a finished session are left out.
+    """
+    last_exercise_sessions = ExerciseDefinition.objects.filter(id__in=definition_ids).annotate(
+        last_exercise_session=Subquery(
+            ExerciseSummary.objects.filter(
+                user=user,
+                definition=OuterRef('pk'),
+                finished=True,
+                completed_sets__gt=0,
+            ).values('exercise_session_id')[:1]
+        )
+    ).values('last_exercise_session')
+
+    rows = Set.objects.filter(
+        exercise_session_id__in=last_exercise_sessions, completed=True,
+    ).order_by('set_number').values_list('exercise_session__exercise__definition_id', 'weight', 'reps')
+
+    previous = {}
+    for definition_id, weight, reps in rows:
+        previous.setdefault(definition_id, []).append((weight, reps))
+    return previous
+
+
+def _store(user_id, definition_ids, previous):
+    # Movements without history are cached as empty so they are not re-queried
+    cache.set_many(
+        {
+            _cache_key(user_id, definition_id): previous.get(definition_id, [])
+            for definition_id in definition_ids
+        },
+        timeout=CACHE_TIMEOUT,
+    )
+
+
+def last_sets_by_definition(user, definition_ids):
+    """Cached version of ``previous_sets_by_definition``.
+
+    Only movements missing from the cache are queried, all in one query.
+    """
+    user_id = _user_id(user)
+    keys = {_cache_key(user_id, definition_id): definition_id for definition_id in definition_ids}
+    cached = cache.get_many(keys)
+    result = {
+        keys[key]: [tuple(values) for values in sets]
+        for key, sets in cached.items()
+        if sets
+    }
+
+    missing = [definition_id for key, definition_id in keys.items() if key not in cached]
+    if missing:
+        previous = previous_sets_by_definition(user_id, missing)
+        _store(user_id, missing, previous)
+        result.update(previous)
+    return result
+
+
+def refresh_last_sets(user, definition_ids):
+    """Recompute and cache the last sets of movements, e.g. after a session finished"""
+    user_id = _user_id(user)
+    definition_ids = list(definition_ids)
+    _store(user_id, definition_ids, previous_sets_by_definition(user_id, definition_ids))
+
+
+def invalidate_last_sets(user, definition_ids):
+    """Drop cached last sets so they are recomputed on next use"""
+    user_id = _user_id(user)
+    cache.delete_many([_cache_key(user_id, definition_id) for definition_id in definition_ids])
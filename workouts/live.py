@@ -0,0 +1,176 @@
+"""Live sync of set and notes changes between a user's open pages.
+
+Write paths call :func:`publish` (after their transaction commits) and the
+``live_events`` view streams the messages to every open page of that user as
+Server-Sent Events. Delivery goes through a broker selected by the
+``LIVE_SYNC_BROKER`` setting:
+
+* ``workouts.live.InProcessBroker`` (default) only reaches pages served by
+  the same process, which is all of them with a single ASGI worker.
+* ``workouts.live.RedisBroker`` fans messages out between workers through
+  Redis pub/sub (``LIVE_SYNC_REDIS_URL``); it needs the ``redis`` package.
+
+Any class with ``publish(channel, message)`` and ``subscribe(channel)``
+returning an async context manager whose value has ``async get()`` can be
+used.
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Messages a slow page may fall behind by before it misses updates
+QUEUE_SIZE = 100
+
+
+def _channel(user_id):
+    return f'live:user:{user_id}'
+
+
+class InProcessBroker:
+    """Fans messages out to subscribers of this process's event loops"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        # Called from sync code in any thread; hand over to each subscriber's loop
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has been closed
+                pass
+
+    def subscribe(self, channel):
+        return _LocalSubscription(self, channel)
+
+    def _add(self, channel, subscription):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+
+    def _discard(self, channel, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+
+class _LocalSubscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.broker._add(self.channel, self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._discard(self.channel, self)
+
+    def deliver(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class RedisBroker:
+    """Redis pub/sub, so pages on any worker or host receive every message"""
+
+    def __init__(self):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroker requires the redis package')
+        url = getattr(settings, 'LIVE_SYNC_REDIS_URL', 'redis://127.0.0.1:6379/2')
+        self._client = redis.Redis.from_url(url)
+        self._async_client = redis.asyncio.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self._client.publish(channel, message)
+
+    def subscribe(self, channel):
+        return _RedisSubscription(self._async_client, channel)
+
+
+class _RedisSubscription:
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+
+    async def __aenter__(self):
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.channel)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.unsubscribe(self.channel)
+        await self.pubsub.aclose()
+
+    async def get(self):
+        while True:
+            message = await self.pubsub.get_message(timeout=None)
+            if message is not None:
+                data = message['data']
+                return data.decode() if isinstance(data, bytes) else data
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, 'LIVE_SYNC_BROKER', 'workouts.live.InProcessBroker')
+    return import_string(path)()
+
+
+def publish(user_id, session_id, message_type, origin='', **fields):
+    """Broadcast a change to the user's open pages once the transaction commits.
+
+    ``origin`` is the client id of the page that made the change, so it can
+    ignore its own echo.
+    """
+    message = json.dumps({
+        'type': message_type,
+        'session_id': session_id,
+        'origin': origin,
+        **fields,
+    })
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.publish(_channel(user_id), message))
+
+
+def publish_set(user_id, session_id, set_obj, message_type='set', origin=''):
+    publish(
+        user_id, session_id, message_type, origin=origin,
+        exercise_session_id=set_obj.exercise_session_id,
+        set_id=set_obj.id,
+        set_number=set_obj.set_number,
+        weight=set_obj.weight,
+        reps=set_obj.reps,
+        completed=set_obj.completed,
+    )
+
+
+def publish_notes(user_id, exercise_session, origin=''):
+    publish(
+        user_id, exercise_session.session_id, 'notes', origin=origin,
+        exercise_session_id=exercise_session.id,
+        notes=exercise_session.notes,
+    )
+
+
+def subscribe(user_id):
+    """Async context manager yielding a subscription with ``async get()``"""
+    return get_broker().subscribe(_channel(user_id))
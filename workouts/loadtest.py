@@ -0,0 +1,141 @@
+"""Concurrent load test of the set logging endpoints against running servers.
+
+Used by the ``loadtest`` command to compare the sync (WSGI) and async (ASGI)
+deployment modes. The servers must share this process's database: the load
+test user and its active session are created here, then each server is
+logged into over HTTP like a browser would.
+"""
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from itertools import cycle
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPRedirectHandler, Request, build_opener, urlopen
+
+from django.contrib.auth.models import User
+
+from .bootstrap import start_session
+from .models import Exercise, Session, Set, Workout
+
+USERNAME = 'loadtest'
+ENDPOINTS = ('update_set', 'update_notes', 'add_set')
+
+
+def prepare_session(username=USERNAME, exercise_count=4):
+    """Active session the load test writes to; returns (exercise session ids, set ids)"""
+    user, _ = User.objects.get_or_create(username=username)
+    session = Session.objects.filter(user=user, end_time__isnull=True).first()
+    if session is None:
+        workout, _ = Workout.objects.get_or_create(user=user, name='Load Test')
+        if not workout.exercises.exists():
+            Exercise.objects.bulk_create([
+                Exercise(workout=workout, name=f'Exercise {i + 1}', order=i)
+                for i in range(exercise_count)
+            ])
+        session = start_session(user, workout)
+    exercise_session_ids = list(session.exercise_sessions.values_list('id', flat=True))
+    set_ids = list(Set.objects.filter(
+        exercise_session_id__in=exercise_session_ids
+    ).values_list('id', flat=True))
+    return exercise_session_ids, set_ids
+
+
+def _cookies(response, jar):
+    for header in response.headers.get_all('Set-Cookie') or []:
+        cookie = SimpleCookie(header)
+        jar.update({key: morsel.value for key, morsel in cookie.items()})
+
+
+def login(base_url, username=USERNAME):
+    """Log in through the name-only login form; returns the cookies"""
+    jar = {}
+    with urlopen(f'{base_url}/login/') as response:
+        _cookies(response, jar)
+    request = Request(
+        f'{base_url}/login/',
+        data=urlencode({'username': username, 'csrfmiddlewaretoken': jar['csrftoken']}).encode(),
+        headers={'Cookie': _cookie_header(jar), 'Referer': f'{base_url}/login/'},
+    )
+    try:
+        # The redirect to the dashboard is not followed so its cookies are kept
+        with build_opener(_NoRedirect).open(request) as response:
+            _cookies(response, jar)
+    except HTTPError as e:
+        if e.code != 302:
+            raise
+        _cookies(e, jar)
+    if 'sessionid' not in jar:
+        raise RuntimeError(f'Could not log in to {base_url}')
+    return jar
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    """Surface redirects as HTTPError instead of following them"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _cookie_header(jar):
+    return '; '.join(f'{key}={value}' for key, value in jar.items())
+
+
+def _payloads(endpoint, exercise_session_ids, set_ids):
+    if endpoint == 'update_set':
+        for i, set_id in enumerate(cycle(set_ids)):
+            yield '/api/set/update/', {'set_id': set_id, 'weight': 50 + i % 20, 'reps': 8, 'completed': True}
+    elif endpoint == 'update_notes':
+        for i, exercise_session_id in enumerate(cycle(exercise_session_ids)):
+            yield '/api/notes/update/', {'exercise_session_id': exercise_session_id, 'notes': f'Note {i}'}
+    else:
+        for exercise_session_id in cycle(exercise_session_ids):
+            yield '/api/set/add/', {'exercise_session_id': exercise_session_id}
+
+
+def run_load(base_url, endpoint, exercise_session_ids, set_ids, requests=1000, concurrency=20):
+    """Fire ``requests`` POSTs with ``concurrency`` in flight; returns throughput stats"""
+    base_url = base_url.rstrip('/')
+    jar = login(base_url)
+    headers = {
+        'Cookie': _cookie_header(jar),
+        'X-CSRFToken': jar['csrftoken'],
+        'Content-Type': 'application/json',
+        'Referer': f'{base_url}/',
+    }
+    payloads = _payloads(endpoint, exercise_session_ids, set_ids)
+    jobs = [next(payloads) for _ in range(requests)]
+
+    def send(job):
+        path, payload = job
+        request = Request(base_url + path, data=json.dumps(payload).encode(), headers=headers)
+        started = time.perf_counter()
+        try:
+            with urlopen(request) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            status = e.code
+        except OSError:
+            status = None
+        return status, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        'url': base_url,
+        'endpoint': endpoint,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(1 for status, _ in results if status != 200),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from workouts.benchmark import DEFAULT_SCALES, parse_scales, run_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Benchmark query counts, latency and response size of every view '
+            'at several data scales, using a throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default=','.join(f'{w}x{s}x{k}' for w, s, k in DEFAULT_SCALES),
+            help='Comma separated WORKOUTSxSESSIONSxSETS scales, e.g. "2x10x3,6x500x5"',
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per URL')
+        parser.add_argument('--exercises', type=int, default=5, help='Exercises per workout')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON report')
+
+    def handle(self, *args, **options):
+        try:
+            scales = parse_scales(options['scales'])
+        except ValueError:
+            raise CommandError('Scales must look like "2x10x3,6x500x5"')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_benchmark(
+                scales,
+                repeat=options['repeat'],
+                exercises_per_workout=options['exercises'],
+                log=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
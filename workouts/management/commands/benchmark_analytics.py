@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from workouts.benchmark import run_analytics_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Time loading and analysing a large set history with workouts.analytics, '
+            'using a throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sets', type=int, default=100_000, help='Approximate number of sets')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs to take the median of')
+        parser.add_argument('--output', help='Also write the report to this JSON file')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = run_analytics_benchmark(
+                sets=options['sets'], repeat=options['repeat'], log=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        if not report['load_within_budget']:
+            raise CommandError(f"Loading took longer than {report['load_budget_ms']} ms")
+        if not report['compute_within_budget']:
+            raise CommandError(f"Analysis took longer than {report['compute_budget_ms']} ms")
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.importer import CHUNK_SIZE, ImportFormatError, import_history
+
+
+class Command(BaseCommand):
+    help = 'Import set history from a Strong/Hevy-style CSV export (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User the history is imported for')
+        parser.add_argument('path', help='CSV file with one row per set')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Number of rows written per bulk insert')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as f:
+                result = import_history(user, f, chunk_size=options['chunk_size'])
+        except (OSError, UnicodeDecodeError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['sessions']} sessions and {result['sets']} sets; "
+            f"skipped {result['skipped_sessions']} already imported sessions "
+            f"and {result['invalid_rows']} invalid rows"
+        ))
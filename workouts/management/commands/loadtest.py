@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from workouts.loadtest import ENDPOINTS, prepare_session, run_load
+
+
+class Command(BaseCommand):
+    help = ('Compare concurrent throughput of the set logging endpoints across running '
+            'servers, e.g. a sync (SERVER_MODE=wsgi) and an async (SERVER_MODE=asgi) gunicorn')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='Base URLs of the servers to compare')
+        parser.add_argument('--endpoint', choices=ENDPOINTS + ('all',), default='all')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per endpoint and server')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once')
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        exercise_session_ids, set_ids = prepare_session()
+        endpoints = ENDPOINTS if options['endpoint'] == 'all' else (options['endpoint'],)
+
+        results = []
+        for endpoint in endpoints:
+            for url in options['urls']:
+                result = run_load(
+                    url, endpoint, exercise_session_ids, set_ids,
+                    requests=options['requests'], concurrency=options['concurrency'],
+                )
+                results.append(result)
+                self.stdout.write(
+                    f"{endpoint:<13} {url:<28} {result['requests_per_second']:>8.1f} req/s "
+                    f"p50 {result['p50_ms']:>7.1f} ms  p95 {result['p95_ms']:>7.1f} ms  "
+                    f"{result['errors']} errors"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
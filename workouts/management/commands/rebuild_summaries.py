@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from workouts.activity import rebuild_activity
+from workouts.records import rebuild_records
+from workouts.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the precomputed exercise summaries, daily activity rollup and '
+            'personal records from the raw sets')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild summaries for this username')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Number of exercise sessions aggregated per query')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        with transaction.atomic():
+            written = rebuild_summaries(user=user, chunk_size=options['chunk_size'])
+            days = rebuild_activity(user=user)
+            records = sum(
+                len(rebuild_records(record_user))
+                for record_user in ([user] if user else User.objects.all())
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} exercise summaries, {days} days of activity and {records} personal records'
+        ))
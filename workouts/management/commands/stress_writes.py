@@ -0,0 +1,52 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from workouts.stress import run_stress
+
+
+class Command(BaseCommand):
+    help = ('Stress the configured database profile with parallel update_set writers, '
+            'using a throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads')
+        parser.add_argument('--writes', type=int, default=100, help='Set updates per writer')
+        parser.add_argument('--output', help='Also write the result to this JSON file')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        temp_dir = None
+        if connection.vendor == 'sqlite':
+            # The default in-memory test database would hide WAL and file locking
+            temp_dir = tempfile.mkdtemp()
+            connection.settings_dict['TEST']['NAME'] = str(Path(temp_dir) / 'stress.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            result = run_stress(writers=options['writers'], writes=options['writes'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        database = ', '.join(f'{key}={value}' for key, value in result['database'].items())
+        self.stdout.write(database)
+        self.stdout.write(
+            f"{result['writes']} writes from {result['writers']} writers: "
+            f"{result['writes_per_second']:.1f} writes/s  p50 {result['p50_ms']:.1f} ms  "
+            f"p95 {result['p95_ms']:.1f} ms  max {result['max_ms']:.1f} ms  {result['errors']} errors"
+        )
+        for message, count in result['error_messages'].items():
+            self.stdout.write(self.style.WARNING(f'  {count} x {message}'))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,192 @@
+"""Per-request profiling.
+
+``ProfilingMiddleware`` is enabled with ``PROFILING_ENABLED=True`` and then
+profiles a ``PROFILING_SAMPLE_RATE`` fraction of requests. Each sampled
+request gets a ``Server-Timing`` header and a JSON log line on the
+``workouts.profiling`` logger with its view, total time, SQL count and time,
+repeated statements and template render time. Requests slower than
+``PROFILING_SLOW_MS`` are logged as warnings and stored as
+:class:`~workouts.models.RequestProfile` rows for the admin; rows older than
+``PROFILING_RETENTION_DAYS`` are pruned as new ones are stored.
+
+Template time is measured by the :class:`ProfilingTemplates` backend, which
+settings select alongside the middleware; with the stock backend it is 0.
+The middleware runs natively under both WSGI and ASGI.
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+from .models import RequestProfile
+from .pruning import prune_request_profiles
+
+logger = logging.getLogger('workouts.profiling')
+
+# Number of repeated statements kept on a stored profile
+TOP_DUPLICATES = 5
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestTimer:
+    """Collects SQL and template timings for one request"""
+
+    def __init__(self):
+        self.queries = []
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+
+    @property
+    def sql_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """Statements run more than once, most repeated first.
+
+        Statements are compared without their parameters, so a query issued
+        once per row of a list shows up here as an N+1.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+class ProfiledTemplate:
+    """Wraps a backend template so its renders add to the sampled request's time"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timer = _current.get()
+        if timer is None:
+            return self.template.render(context, request)
+        # Only top-level renders come through here; {% extends %} and {% include %} stay inside
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timer.template_ms += (time.perf_counter() - started) * 1000
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """The Django template backend, timing renders for ``ProfilingMiddleware``"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_MS', 500)
+        self.store = getattr(settings, 'PROFILING_STORE', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack, timer)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        self.record(request, response, timer, total_ms)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        started = time.perf_counter()
+        # Connections are per thread: wrap those of the thread that runs this
+        # request's sync views and ORM calls
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.wrap_connections)(stack, timer)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        await sync_to_async(self.record)(request, response, timer, total_ms)
+        return response
+
+    def wrap_connections(self, stack, timer):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+
+    def record(self, request, response, timer, total_ms):
+        match = getattr(request, 'resolver_match', None)
+        duplicates = timer.duplicates()
+        profile = {
+            'path': request.path,
+            'method': request.method,
+            'view_name': match.view_name if match else '',
+            'status_code': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'sql_count': len(timer.queries),
+            'sql_ms': round(timer.sql_ms, 2),
+            'duplicate_queries': sum(count - 1 for _, count in duplicates),
+            'template_ms': round(timer.template_ms, 2),
+        }
+
+        response['Server-Timing'] = ', '.join([
+            f"total;dur={profile['total_ms']}",
+            f"sql;dur={profile['sql_ms']};desc=\"{profile['sql_count']} queries\"",
+            f"tpl;dur={profile['template_ms']}",
+        ])
+
+        slow = total_ms >= self.slow_ms
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(profile))
+
+        if slow and self.store:
+            user = getattr(request, 'user', None)
+            RequestProfile.objects.create(
+                user=user if user is not None and user.is_authenticated else None,
+                duplicates=[
+                    {'sql': sql, 'count': count} for sql, count in duplicates[:TOP_DUPLICATES]
+                ],
+                **profile,
+            )
+            prune_request_profiles()
+
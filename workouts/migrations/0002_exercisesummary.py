@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    """Populate summaries for history logged before the table existed"""
+    ExerciseSession = apps.get_model('workouts', 'ExerciseSession')
+    ExerciseSummary = apps.get_model('workouts', 'ExerciseSummary')
+    Set = apps.get_model('workouts', 'Set')
+
+    totals = {
+        row.pop('exercise_session_id'): row
+        for row in Set.objects.filter(completed=True)
+        .values('exercise_session_id')
+        .annotate(
+            completed_sets=models.Count('id'),
+            top_weight=models.Max('weight'),
+            avg_weight=models.Avg('weight'),
+            total_reps=models.Sum('reps'),
+            volume=models.Sum(models.F('weight') * models.F('reps'), output_field=models.FloatField()),
+            estimated_1rm=models.Max(
+                models.F('weight') * (1.0 + models.F('reps') / 30.0),
+                output_field=models.FloatField(),
+            ),
+        )
+        .order_by()
+    }
+
+    batch = []
+    for es in ExerciseSession.objects.select_related('session').order_by('id').iterator(chunk_size=500):
+        row = totals.get(es.id, {})
+        batch.append(ExerciseSummary(
+            exercise_session_id=es.id,
+            user_id=es.session.user_id,
+            exercise_id=es.exercise_id,
+            session_id=es.session_id,
+            date=es.session.date,
+            finished=es.session.end_time is not None,
+            completed_sets=row.get('completed_sets', 0),
+            top_weight=row.get('top_weight') or 0,
+            avg_weight=row.get('avg_weight') or 0,
+            total_reps=row.get('total_reps') or 0,
+            volume=row.get('volume') or 0,
+            estimated_1rm=row.get('estimated_1rm') or 0,
+        ))
+        if len(batch) >= 500:
+            ExerciseSummary.objects.bulk_create(batch)
+            batch = []
+    ExerciseSummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('finished', models.BooleanField(default=False)),
+                ('completed_sets', models.IntegerField(default=0)),
+                ('top_weight', models.FloatField(default=0)),
+                ('avg_weight', models.FloatField(default=0)),
+                ('total_reps', models.IntegerField(default=0)),
+                ('volume', models.FloatField(default=0)),
+                ('estimated_1rm', models.FloatField(default=0)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='workouts.exercise')),
+                ('exercise_session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='workouts.exercisesession')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_summaries', to='workouts.session')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'exercise summaries',
+                'ordering': ['-date', '-exercise_session_id'],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
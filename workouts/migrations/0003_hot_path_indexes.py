@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def close_duplicate_active_sessions(apps, schema_editor):
+    """Resolve users with several active sessions so the constraint can be added.
+
+    The newest active session of each user stays active. Older ones were
+    abandoned when the next one was started. Those with any sets or notes are
+    kept as finished sessions ending when the user started the next one, so
+    nothing the user typed is lost and no zero-length session is made up;
+    only sessions with neither are deleted.
+    """
+    Session = apps.get_model('workouts', 'Session')
+    ExerciseSession = apps.get_model('workouts', 'ExerciseSession')
+    Set = apps.get_model('workouts', 'Set')
+    ExerciseSummary = apps.get_model('workouts', 'ExerciseSummary')
+    next_start = {}
+    for session in Session.objects.filter(end_time__isnull=True).order_by('user_id', '-start_time', '-id'):
+        if session.user_id in next_start:
+            has_input = (
+                Set.objects.filter(exercise_session__session=session).exists()
+                or ExerciseSession.objects.filter(session=session).exclude(notes='').exists()
+            )
+            if has_input:
+                session.end_time = next_start[session.user_id]
+                session.save(update_fields=['end_time'])
+                ExerciseSummary.objects.filter(session=session).update(finished=True)
+            else:
+                session.delete()
+        next_start[session.user_id] = session.start_time
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_exercisesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exercisesession',
+            index=models.Index(fields=['exercise', 'session'], name='exsession_exercise_session_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercisesummary',
+            index=models.Index(condition=models.Q(('finished', True)), fields=['user', 'exercise', '-date', '-exercise_session'], name='summary_finished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['user', 'date', 'end_time'], name='session_user_date_idx'),
+        ),
+        migrations.RunPython(close_duplicate_active_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.UniqueConstraint(condition=models.Q(('end_time__isnull', True)), fields=('user',), name='one_active_session_per_user'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily_activity(apps, schema_editor):
+    Session = apps.get_model('workouts', 'Session')
+    DailyActivity = apps.get_model('workouts', 'DailyActivity')
+    totals = (
+        Session.objects.filter(end_time__isnull=False)
+        .values('user_id', 'date')
+        .annotate(
+            session_count=models.Count('id', distinct=True),
+            set_count=models.Sum('exercise_summaries__completed_sets'),
+            total_volume=models.Sum('exercise_summaries__volume'),
+        )
+        .order_by()
+    )
+    DailyActivity.objects.bulk_create(
+        [
+            DailyActivity(
+                user_id=row['user_id'],
+                date=row['date'],
+                sessions=row['session_count'],
+                sets=row['set_count'] or 0,
+                volume=row['total_volume'] or 0,
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_appliedoperation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sessions', models.IntegerField(default=0)),
+                ('sets', models.IntegerField(default=0)),
+                ('volume', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'daily activity',
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_activity')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
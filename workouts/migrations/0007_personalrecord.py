@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of workouts.records as of this migration
+REP_RANGES = (1, 3, 5, 8, 10, 12)
+BRZYCKI_MAX_REPS = 36
+
+
+def estimate_1rm(weight, reps):
+    if reps == 1:
+        return float(weight)
+    if getattr(settings, 'PR_1RM_FORMULA', 'epley') == 'brzycki':
+        return weight * 36 / (37 - min(reps, BRZYCKI_MAX_REPS))
+    return weight * (1 + reps / 30)
+
+
+def backfill_personal_records(apps, schema_editor):
+    """Record every user's bests from history logged before the table existed"""
+    PersonalRecord = apps.get_model('workouts', 'PersonalRecord')
+    ExerciseSummary = apps.get_model('workouts', 'ExerciseSummary')
+    Set = apps.get_model('workouts', 'Set')
+    best = {}
+
+    def consider(key, value, **fields):
+        # Rows come oldest first, so ties keep the earliest
+        if value > 0 and (key not in best or value > best[key].value):
+            best[key] = PersonalRecord(
+                user_id=key[0], exercise_id=key[1], kind=key[2], rep_range=key[3], value=value, **fields
+            )
+
+    sets = Set.objects.filter(completed=True, weight__gt=0, reps__gt=0).values_list(
+        'id', 'exercise_session_id', 'exercise_session__session__user_id', 'exercise_session__exercise_id',
+        'exercise_session__session__date', 'weight', 'reps',
+    ).order_by('exercise_session__session__date', 'id')
+    for set_id, exercise_session_id, user_id, exercise_id, day, weight, reps in sets.iterator(chunk_size=2000):
+        fields = {'set_id': set_id, 'exercise_session_id': exercise_session_id,
+                  'weight': weight, 'reps': reps, 'date': day}
+        consider((user_id, exercise_id, 'e1rm', 0), estimate_1rm(weight, reps), **fields)
+        for rep_range in REP_RANGES:
+            if reps >= rep_range:
+                consider((user_id, exercise_id, 'rep_max', rep_range), weight, **fields)
+
+    volumes = ExerciseSummary.objects.filter(volume__gt=0).values_list(
+        'exercise_session_id', 'user_id', 'exercise_id', 'date', 'volume',
+    ).order_by('date', 'id')
+    for exercise_session_id, user_id, exercise_id, day, volume in volumes.iterator(chunk_size=2000):
+        consider((user_id, exercise_id, 'volume', 0), volume, exercise_session_id=exercise_session_id, date=day)
+
+    PersonalRecord.objects.bulk_create(best.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_requestprofile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('e1rm', 'Estimated 1RM'), ('rep_max', 'Rep max'), ('volume', 'Session volume')], max_length=10)),
+                ('rep_range', models.PositiveSmallIntegerField(default=0)),
+                ('value', models.FloatField()),
+                ('weight', models.FloatField(default=0)),
+                ('reps', models.IntegerField(default=0)),
+                ('date', models.DateField()),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='workouts.exercise')),
+                ('exercise_session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workouts.exercisesession')),
+                ('set', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workouts.set')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['exercise', 'kind', 'rep_range'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'exercise', 'kind', 'rep_range'), name='unique_personal_record')],
+            },
+        ),
+        migrations.RunPython(backfill_personal_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_personalrecord'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseDefinition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('muscle_group', models.CharField(blank=True, choices=[('chest', 'Chest'), ('back', 'Back'), ('shoulders', 'Shoulders'), ('biceps', 'Biceps'), ('triceps', 'Triceps'), ('quads', 'Quads'), ('hamstrings', 'Hamstrings'), ('glutes', 'Glutes'), ('calves', 'Calves'), ('core', 'Core')], max_length=20)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExerciseAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('definition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='workouts.exercisedefinition')),
+            ],
+            options={
+                'verbose_name_plural': 'exercise aliases',
+                'ordering': ['name'],
+            },
+        ),
+        # Nullable until 0009 has linked the existing rows
+        migrations.AddField(
+            model_name='exercise',
+            name='definition',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='exercises', to='workouts.exercisedefinition'),
+        ),
+        migrations.AddField(
+            model_name='exercisesummary',
+            name='definition',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='workouts.exercisedefinition'),
+        ),
+        migrations.AddField(
+            model_name='personalrecord',
+            name='definition',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='workouts.exercisedefinition'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='personalrecord',
+            name='unique_personal_record',
+        ),
+    ]
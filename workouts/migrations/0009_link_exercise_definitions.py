@@ -0,0 +1,129 @@
+import re
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# Frozen copy of workouts.catalogue as of this migration, so later edits to the
+# catalogue (or its model code) never change what this migration does
+STANDARD_EXERCISES = [
+    ('Bench Press', 'chest', ['barbell bench press', 'flat bench press', 'flat bench', 'bb bench press']),
+    ('Incline Bench Press', 'chest', ['incline barbell bench press', 'incline bench']),
+    ('Dumbbell Bench Press', 'chest', ['db bench press', 'dumbbell press', 'flat dumbbell press']),
+    ('Incline Dumbbell Press', 'chest', ['incline db press', 'incline dumbbell bench press']),
+    ('Chest Fly', 'chest', ['chest flys', 'chest flyes', 'pec fly', 'pec deck']),
+    ('Push Up', 'chest', ['pushup', 'push ups', 'pushups']),
+    ('Dips', 'triceps', ['dip', 'parallel bar dips']),
+    ('Overhead Press', 'shoulders', ['ohp', 'military press', 'standing press', 'barbell overhead press']),
+    ('Shoulder Press', 'shoulders', ['dumbbell shoulder press', 'db shoulder press', 'seated shoulder press']),
+    ('Lateral Raise', 'shoulders', ['lateral raises', 'side lateral raise', 'side raises']),
+    ('Face Pull', 'shoulders', ['face pulls']),
+    ('Pull Up', 'back', ['pullup', 'pull ups', 'pullups']),
+    ('Chin Up', 'back', ['chinup', 'chin ups', 'chinups']),
+    ('Lat Pulldown', 'back', ['lat pull down', 'lat pulldowns', 'pulldown']),
+    ('Barbell Row', 'back', ['bent over row', 'bent over barbell row', 'bb row', 'barbell rows']),
+    ('Seated Cable Row', 'back', ['cable row', 'seated row', 'seated cable rows']),
+    ('Dumbbell Row', 'back', ['db row', 'one arm dumbbell row', 'single arm dumbbell row']),
+    ('Deadlift', 'back', ['conventional deadlift', 'barbell deadlift', 'deadlifts']),
+    ('Romanian Deadlift', 'hamstrings', ['rdl', 'romanian deadlifts']),
+    ('Squat', 'quads', ['back squat', 'barbell squat', 'barbell back squat', 'squats']),
+    ('Front Squat', 'quads', ['front squats']),
+    ('Leg Press', 'quads', ['leg presses']),
+    ('Leg Extension', 'quads', ['leg extensions']),
+    ('Bulgarian Split Squat', 'quads', ['bulgarian split squats', 'bss']),
+    ('Lunge', 'quads', ['lunges', 'walking lunge', 'walking lunges']),
+    ('Leg Curl', 'hamstrings', ['leg curls', 'hamstring curl', 'lying leg curl', 'seated leg curl']),
+    ('Hip Thrust', 'glutes', ['hip thrusts', 'barbell hip thrust']),
+    ('Calf Raise', 'calves', ['calf raises', 'standing calf raise']),
+    ('Bicep Curl', 'biceps', ['biceps curl', 'bicep curls', 'biceps curls']),
+    ('Hammer Curl', 'biceps', ['hammer curls']),
+    ('Tricep Pushdown', 'triceps', ['triceps pushdown', 'tricep pushdowns', 'cable pushdown', 'rope pushdown']),
+    ('Skull Crusher', 'triceps', ['skull crushers', 'lying tricep extension']),
+    ('Plank', 'core', ['planks']),
+    ('Hanging Leg Raise', 'core', ['hanging leg raises']),
+    ('Cable Crunch', 'core', ['cable crunches']),
+]
+
+
+def normalize_name(name):
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', name.lower()).split())
+
+
+def install_standard_exercises(ExerciseDefinition, ExerciseAlias):
+    ExerciseDefinition.objects.bulk_create([
+        ExerciseDefinition(name=name, muscle_group=muscle_group)
+        for name, muscle_group, _ in STANDARD_EXERCISES
+    ], ignore_conflicts=True)
+    ids = dict(ExerciseDefinition.objects.filter(
+        name__in=[name for name, _, _ in STANDARD_EXERCISES]
+    ).values_list('name', 'id'))
+    ExerciseAlias.objects.bulk_create([
+        ExerciseAlias(name=normalize_name(alias), definition_id=ids[name])
+        for name, _, aliases in STANDARD_EXERCISES
+        for alias in [name, *aliases]
+    ], ignore_conflicts=True)
+
+
+def resolve_definitions(names, ExerciseDefinition, ExerciseAlias):
+    """Definition id for each name, creating definitions for names not in the catalogue"""
+    keys = {name: normalize_name(name) for name in names}
+    found = dict(ExerciseAlias.objects.filter(name__in=set(keys.values())).values_list('name', 'definition_id'))
+    new = {}
+    for name, key in keys.items():
+        if key not in found and key not in new:
+            new[key] = ' '.join(name.split())
+    if new:
+        ExerciseDefinition.objects.bulk_create(
+            [ExerciseDefinition(name=name) for name in new.values()], ignore_conflicts=True,
+        )
+        ids = dict(ExerciseDefinition.objects.filter(name__in=new.values()).values_list('name', 'id'))
+        ExerciseAlias.objects.bulk_create(
+            [ExerciseAlias(name=key, definition_id=ids[name]) for key, name in new.items()],
+            ignore_conflicts=True,
+        )
+        found.update(ExerciseAlias.objects.filter(name__in=new).values_list('name', 'definition_id'))
+    return {name: found[key] for name, key in keys.items()}
+
+
+def link_exercise_definitions(apps, schema_editor):
+    """Point every exercise at a catalogue entry, merging names that differ only in spelling"""
+    ExerciseDefinition = apps.get_model('workouts', 'ExerciseDefinition')
+    ExerciseAlias = apps.get_model('workouts', 'ExerciseAlias')
+    Exercise = apps.get_model('workouts', 'Exercise')
+    ExerciseSummary = apps.get_model('workouts', 'ExerciseSummary')
+    PersonalRecord = apps.get_model('workouts', 'PersonalRecord')
+
+    install_standard_exercises(ExerciseDefinition, ExerciseAlias)
+    exercises = list(Exercise.objects.only('id', 'name'))
+    definitions = resolve_definitions(
+        {exercise.name for exercise in exercises}, ExerciseDefinition, ExerciseAlias,
+    )
+    for exercise in exercises:
+        exercise.definition_id = definitions[exercise.name]
+    Exercise.objects.bulk_update(exercises, ['definition'], batch_size=500)
+
+    ExerciseSummary.objects.update(definition_id=Subquery(
+        Exercise.objects.filter(pk=OuterRef('exercise_id')).values('definition_id')[:1]
+    ))
+
+    # Records were kept per exercise; keep each user's best per movement
+    exercise_definitions = {exercise.id: exercise.definition_id for exercise in exercises}
+    best = {}
+    for record in PersonalRecord.objects.order_by('date', 'id'):
+        record.definition_id = exercise_definitions[record.exercise_id]
+        key = (record.user_id, record.definition_id, record.kind, record.rep_range)
+        if key not in best or record.value > best[key].value:
+            best[key] = record
+    kept = {record.id for record in best.values()}
+    PersonalRecord.objects.exclude(id__in=kept).delete()
+    PersonalRecord.objects.bulk_update(best.values(), ['definition'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_exercise_catalogue'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_exercise_definitions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_link_exercise_definitions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exercise',
+            name='definition',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='exercises', to='workouts.exercisedefinition'),
+        ),
+        migrations.AlterField(
+            model_name='exercisesummary',
+            name='definition',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='workouts.exercisedefinition'),
+        ),
+        migrations.AlterField(
+            model_name='personalrecord',
+            name='definition',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='workouts.exercisedefinition'),
+        ),
+        migrations.RemoveField(
+            model_name='personalrecord',
+            name='exercise',
+        ),
+        migrations.AlterModelOptions(
+            name='personalrecord',
+            options={'ordering': ['definition', 'kind', 'rep_range']},
+        ),
+        migrations.AddConstraint(
+            model_name='personalrecord',
+            constraint=models.UniqueConstraint(fields=('user', 'definition', 'kind', 'rep_range'), name='unique_personal_record'),
+        ),
+        migrations.RemoveIndex(
+            model_name='exercisesummary',
+            name='summary_finished_idx',
+        ),
+        migrations.AddIndex(
+            model_name='exercisesummary',
+            index=models.Index(condition=models.Q(('finished', True)), fields=['user', 'definition', '-date', '-exercise_session'], name='summary_definition_idx'),
+        ),
+    ]
@@ -16,25 +16,80 @@ class Workout(models.Model):
         return f"{self.name} - {self.user.username}"
 
 
+class ExerciseDefinition(models.Model):
+    """A movement in the shared catalogue, whichever workouts it appears in"""
+    MUSCLE_GROUP_CHOICES = [
+        ('chest', 'Chest'),
+        ('back', 'Back'),
+        ('shoulders', 'Shoulders'),
+        ('biceps', 'Biceps'),
+        ('triceps', 'Triceps'),
+        ('quads', 'Quads'),
+        ('hamstrings', 'Hamstrings'),
+        ('glutes', 'Glutes'),
+        ('calves', 'Calves'),
+        ('core', 'Core'),
+    ]
+    
+    name = models.CharField(max_length=200, unique=True)
+    muscle_group = models.CharField(max_length=20, choices=MUSCLE_GROUP_CHOICES, blank=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class ExerciseAlias(models.Model):
+    """A normalised spelling that resolves to a definition (see ``workouts.catalogue``)"""
+    name = models.CharField(max_length=200, unique=True)
+    definition = models.ForeignKey(ExerciseDefinition, on_delete=models.CASCADE, related_name='aliases')
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'exercise aliases'
+    
+    def __str__(self):
+        return f"{self.name} -> {self.definition.name}"
+
+
+class ExerciseQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        from .catalogue import assign_definitions
+        return super().bulk_create(assign_definitions(list(objs)), *args, **kwargs)
+
+
 class Exercise(models.Model):
     """An exercise within a workout"""
     name = models.CharField(max_length=200)
     workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='exercises')
+    # Filled in from the name when the exercise is created
+    definition = models.ForeignKey(ExerciseDefinition, on_delete=models.PROTECT, related_name='exercises')
     order = models.IntegerField(default=0)
     
+    objects = ExerciseQuerySet.as_manager()
+    
     class Meta:
         ordering = ['order', 'id']
     
     def __str__(self):
         return f"{self.name} ({self.workout.name})"
     
+    def save(self, *args, **kwargs):
+        if self.definition_id is None:
+            from .catalogue import assign_definitions
+            assign_definitions([self])
+        super().save(*args, **kwargs)
+    
     def get_last_session_for_user(self, user):
-        """Get the most recent ExerciseSession for this exercise and user"""
-        return ExerciseSession.objects.filter(
-            exercise=self,
-            session__user=user,
-            session__end_time__isnull=False
-        ).order_by('-session__date').first()
+        """Get the most recent ExerciseSession of this movement in any of the user's workouts"""
+        summary = ExerciseSummary.objects.filter(
+            definition_id=self.definition_id,
+            user=user,
+            finished=True
+        ).select_related('exercise_session').first()
+        return summary.exercise_session if summary else None
 
 
 class Session(models.Model):
@@ -47,6 +102,17 @@ class Session(models.Model):
     
     class Meta:
         ordering = ['-date', '-start_time']
+        indexes = [
+            models.Index(fields=['user', 'date', 'end_time'], name='session_user_date_idx'),
+        ]
+        constraints = [
+            # Also serves as the partial index behind "active session" lookups
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(end_time__isnull=True),
+                name='one_active_session_per_user',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.workout.name} - {self.user.username} - {self.date}"
@@ -65,6 +131,9 @@ class ExerciseSession(models.Model):
     
     class Meta:
         ordering = ['exercise__order', 'id']
+        indexes = [
+            models.Index(fields=['exercise', 'session'], name='exsession_exercise_session_idx'),
+        ]
     
     def __str__(self):
         return f"{self.exercise.name} in {self.session}"
@@ -90,3 +159,160 @@ class Set(models.Model):
     
     def __str__(self):
         return f"Set {self.set_number}: {self.weight}kg x {self.reps} reps"
+
+
+class ExerciseSummary(models.Model):
+    """Precomputed totals for one exercise within one session.
+
+    Maintained by ``workouts.summaries`` whenever the underlying sets change,
+    so charts and "last session" lookups never re-aggregate raw sets.
+    """
+    exercise_session = models.OneToOneField(ExerciseSession, on_delete=models.CASCADE, related_name='summary')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_summaries')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='summaries')
+    definition = models.ForeignKey(ExerciseDefinition, on_delete=models.CASCADE, related_name='summaries')
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='exercise_summaries')
+    date = models.DateField()
+    finished = models.BooleanField(default=False)
+    completed_sets = models.IntegerField(default=0)
+    top_weight = models.FloatField(default=0)
+    avg_weight = models.FloatField(default=0)
+    total_reps = models.IntegerField(default=0)
+    volume = models.FloatField(default=0)
+    estimated_1rm = models.FloatField(default=0)
+    
+    class Meta:
+        ordering = ['-date', '-exercise_session_id']
+        verbose_name_plural = 'exercise summaries'
+        indexes = [
+            # "Last session" lookups only ever read finished sessions, across
+            # every workout the movement appears in
+            models.Index(
+                fields=['user', 'definition', '-date', '-exercise_session'],
+                condition=models.Q(finished=True),
+                name='summary_definition_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.exercise.name} on {self.date}: {self.completed_sets} sets, {self.volume:g}kg"
+
+
+class AppliedOperation(models.Model):
+    """A client-generated write operation that has already been applied.
+
+    Lets the offline replay endpoint skip operations it has seen before, so
+    retried uploads never double-apply.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applied_operations')
+    op_id = models.CharField(max_length=64)
+    result = models.JSONField(default=dict)
+    applied_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'op_id'], name='unique_operation_per_user'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'applied_at'], name='operation_user_applied_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.op_id} ({self.user.username})"
+
+
+class DailyActivity(models.Model):
+    """Per-user daily training totals backing the year heatmap"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    date = models.DateField()
+    sessions = models.IntegerField(default=0)
+    sets = models.IntegerField(default=0)
+    volume = models.FloatField(default=0)
+    
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'daily activity'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_activity'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date}: {self.sessions} sessions"
+
+
+class DataVersion(models.Model):
+    """Per-user counter bumped on every write to the user's training data.
+
+    Read-heavy pages derive their ETag from it, so an unchanged page is
+    answered with 304 Not Modified without running its queries.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='data_version')
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.user.username} v{self.version}"
+
+
+class RequestProfile(models.Model):
+    """A slow request captured by the profiling middleware"""
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    total_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+    duplicate_queries = models.PositiveIntegerField(default=0)
+    template_ms = models.FloatField(default=0)
+    # The most repeated statements, as [{"sql": ..., "count": ...}]
+    duplicates = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-total_ms']
+        indexes = [
+            models.Index(fields=['view_name', '-total_ms'], name='profile_view_total_idx'),
+            models.Index(fields=['created_at'], name='profile_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.total_ms:.0f} ms)"
+
+
+class PersonalRecord(models.Model):
+    """A user's current best for one movement, kept up to date by ``workouts.records``"""
+    ESTIMATED_1RM = 'e1rm'
+    REP_MAX = 'rep_max'
+    VOLUME = 'volume'
+    KIND_CHOICES = [
+        (ESTIMATED_1RM, 'Estimated 1RM'),
+        (REP_MAX, 'Rep max'),
+        (VOLUME, 'Session volume'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='personal_records')
+    definition = models.ForeignKey(ExerciseDefinition, on_delete=models.CASCADE, related_name='personal_records')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Minimum reps of a rep max record ("best weight for 5+ reps"), 0 otherwise
+    rep_range = models.PositiveSmallIntegerField(default=0)
+    value = models.FloatField()
+    # The set that set the record; volume records belong to a whole exercise session
+    set = models.ForeignKey(Set, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    exercise_session = models.ForeignKey(ExerciseSession, on_delete=models.CASCADE, related_name='+')
+    weight = models.FloatField(default=0)
+    reps = models.IntegerField(default=0)
+    date = models.DateField()
+    
+    class Meta:
+        ordering = ['definition', 'kind', 'rep_range']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'definition', 'kind', 'rep_range'], name='unique_personal_record',
+            ),
+        ]
+    
+    def __str__(self):
+        label = f'{self.rep_range}RM' if self.kind == self.REP_MAX else self.get_kind_display()
+        return f"{self.definition.name} {label}: {self.value:g}"
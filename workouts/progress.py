@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import numpy as np
+
+from .analytics import (
+    CHRONIC_DAYS, acute_chronic_ratio, daily_series, load_sets, lttb, progression_rates, rolling_trends, to_dates,
+    weekly_buckets, weekly_tonnage,
+)
+from .models import ExerciseDefinition
+
+# Days averaged by the volume trend line
+TREND_DAYS = 28
+
+# Chartable series and how a week of them is summarised
+METRICS = {
+    'max_weight': 'max',
+    'avg_weight': 'mean',
+    'estimated_1rm': 'max',
+    'total_reps': 'mean',
+    'total_volume': 'mean',
+    'volume_trend': 'mean',
+}
+
+DOWNSAMPLING = ('lttb', 'weekly')
+
+
+def daily_progress(user, definition, start=None, end=None):
+    """Per-day series of a catalogue movement between two dates, from one query.
+
+    Sets from every workout the movement is part of are combined. Returns
+    the training days (ordinals) and a dict of ``METRICS`` arrays, plus the
+    movement's e1RM progression rate over the range in kg per week (None
+    with fewer than two training days).
+    """
+    # The trend at the start of the range averages the days before it
+    load_start = start - timedelta(days=TREND_DAYS - 1) if start else None
+    sets = load_sets(user, definition_ids=[definition.id], start=load_start, end=end)
+    daily = daily_series(sets)
+    trends = rolling_trends(sets, window=TREND_DAYS)
+    # The trend is computed for every calendar day; keep the training days
+    trend_index = daily['day'] - trends['day'][0] if len(sets) else daily['day']
+    daily['volume_trend'] = trends['volume'][trend_index]
+
+    if start:
+        in_range = daily['day'] >= start.toordinal()
+        daily = {key: values[in_range] for key, values in daily.items()}
+        sets = sets.filter(sets.day >= start.toordinal())
+    days = daily.pop('day')
+    return days, daily, progression_rates(sets).get(definition.id)
+
+
+def progress_series(user, definition, metrics, start=None, end=None, max_points=500, downsample='lttb'):
+    """Chart-ready series of a movement with at most ``max_points`` points each.
+
+    Longer series are downsampled per metric, with largest-triangle-three-
+    buckets (``'lttb'``) or by averaging (or taking the best of) each week
+    (``'weekly'``, followed by LTTB if still too long). Returns a dict with
+    the series as ``{metric: {'labels': [...], 'values': [...]}}``, the
+    number of training days, the method used (None if the series was short
+    enough) and the progression rate.
+    """
+    days, daily, progression_rate = daily_progress(user, definition, start, end)
+    method = downsample if len(days) > max_points else None
+
+    series = {}
+    for metric in metrics:
+        x, y = days, daily[metric]
+        if method == 'weekly':
+            x, y = weekly_buckets(x, y, METRICS[metric])
+        kept = lttb(x, y, max_points)
+        series[metric] = {
+            'labels': [day.isoformat() for day in to_dates(x[kept])],
+            'values': np.round(y[kept], 2).tolist(),
+        }
+    return {
+        'series': series,
+        'training_days': len(days),
+        'downsampled': method,
+        'progression_rate': progression_rate,
+    }
+
+
+def _muscle_groups(sets):
+    """Each set's muscle group, as an index into the sorted group keys"""
+    definitions, inverse = np.unique(sets.definition, return_inverse=True)
+    by_definition = dict(
+        ExerciseDefinition.objects.filter(id__in=definitions.tolist()).values_list('id', 'muscle_group')
+    )
+    keys = sorted(set(by_definition.values()))
+    index = np.array([keys.index(by_definition[definition]) for definition in definitions.tolist()], dtype=np.int64)
+    return keys, index[inverse]
+
+
+def training_load(user, start=None, end=None, max_points=500):
+    """Weekly tonnage per muscle group and the daily acute:chronic workload ratio.
+
+    Every movement the user trains counts. Returns the week start dates,
+    one tonnage series per muscle group (``''`` for movements without one)
+    and the ratio series, downsampled with LTTB to ``max_points`` points;
+    days before the first training day have no ratio and are left out.
+    """
+    # The chronic window at the start of the range reaches back before it
+    load_start = start - timedelta(days=CHRONIC_DAYS - 1) if start else None
+    sets = load_sets(user, start=load_start, end=end)
+    ratio = acute_chronic_ratio(sets, end=end.toordinal() if end else None)
+    if start:
+        sets = sets.filter(sets.day >= start.toordinal())
+    keys, groups = _muscle_groups(sets)
+    tonnage = weekly_tonnage(sets, groups)
+
+    days, values = ratio['day'], ratio['ratio']
+    known = ~np.isnan(values)
+    if start:
+        known &= days >= start.toordinal()
+    days, values = days[known], values[known]
+    kept = lttb(days, values, max_points)
+    labels = dict(ExerciseDefinition.MUSCLE_GROUP_CHOICES)
+    return {
+        'weeks': [day.isoformat() for day in to_dates(tonnage['week'])],
+        'muscle_groups': [
+            {
+                'key': keys[group],
+                'label': labels.get(keys[group], 'Other'),
+                'tonnage': np.round(tonnage['tonnage'][:, column], 1).tolist(),
+            }
+            for column, group in enumerate(tonnage['group'].tolist())
+        ],
+        'ratio': {
+            'labels': [day.isoformat() for day in to_dates(days[kept])],
+            'values': np.round(values[kept], 2).tolist(),
+        },
+    }
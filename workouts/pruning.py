@@ -0,0 +1,60 @@
+"""Bulk deletion of old sessions, used by the admin, and of old request profiles.
+
+Sessions are deleted in chunks, each in its own transaction, so purging
+years of history never holds the write lock for long or loads the related
+rows of every session at once. Afterwards the personal records, activity
+rollup and caches of every affected user are brought up to date, the same
+as when a user deletes a session from their history.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .activity import refresh_days
+from .history_calendar import invalidate_months
+from .last_performance import invalidate_last_sets
+from .models import ExerciseSession, RequestProfile, Session
+from .records import rebuild_records
+from .versioning import bump_data_version
+
+CHUNK_SIZE = 200
+
+
+def delete_sessions(sessions, chunk_size=CHUNK_SIZE):
+    """Delete a queryset of sessions chunk by chunk; returns how many were deleted"""
+    ids = list(sessions.order_by().values_list('id', flat=True))
+    definitions = defaultdict(set)
+    days = defaultdict(set)
+
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        with transaction.atomic():
+            for user_id, day in Session.objects.filter(id__in=chunk).values_list('user_id', 'date'):
+                days[user_id].add(day)
+            for user_id, definition_id in ExerciseSession.objects.filter(session_id__in=chunk).values_list(
+                'session__user_id', 'exercise__definition_id'
+            ).distinct():
+                definitions[user_id].add(definition_id)
+            Session.objects.filter(id__in=chunk).delete()
+
+    for user in User.objects.filter(id__in=days):
+        with transaction.atomic():
+            rebuild_records(user, definitions[user.pk])
+            refresh_days(user, days[user.pk])
+            invalidate_months(user, days[user.pk])
+            bump_data_version(user)
+        invalidate_last_sets(user, definitions[user.pk])
+    return len(ids)
+
+
+def prune_request_profiles(retention_days=None):
+    """Delete stored request profiles older than ``PROFILING_RETENTION_DAYS``; returns how many"""
+    if retention_days is None:
+        retention_days = getattr(settings, 'PROFILING_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = RequestProfile.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
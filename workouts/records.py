@@ -0,0 +1,174 @@
+"""Personal records: estimated one-rep max, rep maxes and session volume.
+
+Records live in the ``PersonalRecord`` table, one row per user, catalogue
+movement (so every workout a movement appears in counts) and kind. Write
+paths hand the exercise summaries they have just refreshed to
+:func:`update_records`, which only looks at the sets of those exercise
+sessions and keeps whichever of old and new is better. History is rescanned
+only for movements whose record set was edited down, un-completed or deleted.
+
+The one-rep max estimate is chosen with the ``PR_1RM_FORMULA`` setting
+(``'epley'`` or ``'brzycki'``) and is also used for the summaries' estimate.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Least
+
+from .models import ExerciseSummary, PersonalRecord, Set
+
+# Minimum reps of the tracked rep maxes: the heaviest weight lifted for at
+# least 1, 3, 5... reps
+REP_RANGES = (1, 3, 5, 8, 10, 12)
+
+# Brzycki's estimate runs to infinity at 37 reps
+BRZYCKI_MAX_REPS = 36
+
+RECORD_FIELDS = ['value', 'set', 'exercise_session', 'weight', 'reps', 'date']
+
+
+def selected_formula():
+    """The configured one-rep max formula, 'epley' or 'brzycki'"""
+    formula = getattr(settings, 'PR_1RM_FORMULA', 'epley')
+    if formula not in ('epley', 'brzycki'):
+        raise ImproperlyConfigured(f"PR_1RM_FORMULA must be 'epley' or 'brzycki', not {formula!r}")
+    return formula
+
+
+def estimate_1rm(weight, reps):
+    """Estimated one-rep max of a set; a single rep is its own max"""
+    if reps <= 0 or weight <= 0:
+        return 0.0
+    if reps == 1:
+        return float(weight)
+    if selected_formula() == 'brzycki':
+        return weight * 36 / (37 - min(reps, BRZYCKI_MAX_REPS))
+    return weight * (1 + reps / 30)
+
+
+def estimated_1rm_expression():
+    """:func:`estimate_1rm` as an expression over a set's weight and reps"""
+    if selected_formula() == 'brzycki':
+        estimate = F('weight') * 36.0 / (37.0 - Least(F('reps'), Value(BRZYCKI_MAX_REPS)))
+    else:
+        estimate = F('weight') * (1.0 + F('reps') / 30.0)
+    return Case(
+        When(reps__lte=0, then=Value(0.0)),
+        When(reps=1, then=F('weight')),
+        default=estimate,
+        output_field=FloatField(),
+    )
+
+
+def _set_rows(sets):
+    return sets.filter(completed=True, weight__gt=0, reps__gt=0).values_list(
+        'id', 'exercise_session_id', 'exercise_session__exercise__definition_id',
+        'exercise_session__session__date', 'weight', 'reps',
+    ).order_by('exercise_session__session__date', 'id')
+
+
+def _best_records(user_id, set_rows, volume_rows):
+    """Best record per (definition, kind, rep range); ties keep the earliest"""
+    best = {}
+
+    def consider(key, value, **fields):
+        if value > 0 and (key not in best or value > best[key].value):
+            best[key] = PersonalRecord(
+                user_id=user_id, definition_id=key[0], kind=key[1], rep_range=key[2], value=value, **fields
+            )
+
+    for set_id, exercise_session_id, definition_id, day, weight, reps in set_rows:
+        fields = {'set_id': set_id, 'exercise_session_id': exercise_session_id,
+                  'weight': weight, 'reps': reps, 'date': day}
+        consider((definition_id, PersonalRecord.ESTIMATED_1RM, 0), estimate_1rm(weight, reps), **fields)
+        for rep_range in REP_RANGES:
+            if reps >= rep_range:
+                consider((definition_id, PersonalRecord.REP_MAX, rep_range), weight, **fields)
+    for exercise_session_id, definition_id, day, volume in volume_rows:
+        consider((definition_id, PersonalRecord.VOLUME, 0), volume,
+                 exercise_session_id=exercise_session_id, date=day)
+    return best
+
+
+def _key(record):
+    return (record.definition_id, record.kind, record.rep_range)
+
+
+def _upsert(records, batch_size=None):
+    return PersonalRecord.objects.bulk_create(
+        records,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'definition', 'kind', 'rep_range'],
+        update_fields=RECORD_FIELDS,
+    )
+
+
+def update_records(user, summaries):
+    """Fold the sets behind freshly refreshed exercise summaries into the records.
+
+    Returns the records that were set or changed.
+    """
+    summaries = list(summaries)
+    if not summaries:
+        return []
+    exercise_session_ids = {summary.exercise_session_id for summary in summaries}
+    definition_ids = {summary.definition_id for summary in summaries}
+    candidates = _best_records(
+        user.pk,
+        _set_rows(Set.objects.filter(exercise_session_id__in=exercise_session_ids)),
+        [(s.exercise_session_id, s.definition_id, s.date, s.volume) for s in summaries],
+    )
+    current = {
+        _key(record): record
+        for record in PersonalRecord.objects.filter(user=user, definition_id__in=definition_ids)
+    }
+
+    # A record held by one of these exercise sessions may have been edited
+    # down; the next best could be anywhere in history
+    stale = {
+        key[0] for key, record in current.items()
+        if record.exercise_session_id in exercise_session_ids
+        and (key not in candidates or candidates[key].value < record.value)
+    }
+    improved = [
+        record for key, record in candidates.items()
+        if key[0] not in stale and (key not in current or record.value > current[key].value)
+    ]
+    changed = _upsert(improved) if improved else []
+    if stale:
+        changed += rebuild_records(user, stale)
+    return changed
+
+
+def rebuild_records(user, definition_ids=None):
+    """Recompute records from the whole history, optionally for some movements only.
+
+    Returns the records written.
+    """
+    records = PersonalRecord.objects.filter(user=user)
+    sets = Set.objects.filter(exercise_session__session__user=user)
+    summaries = ExerciseSummary.objects.filter(user=user, volume__gt=0)
+    if definition_ids is not None:
+        records = records.filter(definition_id__in=definition_ids)
+        sets = sets.filter(exercise_session__exercise__definition_id__in=definition_ids)
+        summaries = summaries.filter(definition_id__in=definition_ids)
+    with transaction.atomic():
+        records.delete()
+        best = _best_records(
+            user.pk,
+            _set_rows(sets).iterator(chunk_size=2000),
+            summaries.values_list('exercise_session_id', 'definition_id', 'date', 'volume').order_by('date', 'id'),
+        )
+        # A concurrent write may have recorded one of these in the meantime
+        return _upsert(list(best.values()), batch_size=1000)
+
+
+def current_records(user):
+    """The user's records with their movement and session, in one query"""
+    return (
+        PersonalRecord.objects.filter(user=user)
+        .select_related('definition', 'exercise_session')
+        .order_by('definition__name', 'kind', 'rep_range')
+    )
@@ -0,0 +1,60 @@
+from .bootstrap import build_initial_sets
+from .last_performance import last_sets_by_definition
+from .models import Set
+
+SET_FIELDS = ['id', 'set_number', 'weight', 'reps', 'completed']
+
+
+def _create_missing_sets(session, exercise_sessions, sets_by_exercise_session):
+    """Initial sets for exercises added to the workout after the session started"""
+    empty = [es for es in exercise_sessions if es.id not in sets_by_exercise_session]
+    if not empty:
+        return
+    previous = last_sets_by_definition(session.user_id, [es.exercise.definition_id for es in empty])
+    new_sets = []
+    for es in empty:
+        new_sets.extend(build_initial_sets(es, previous.get(es.exercise.definition_id)))
+    Set.objects.bulk_create(new_sets)
+    for set_obj in new_sets:
+        sets_by_exercise_session.setdefault(set_obj.exercise_session_id, []).append(
+            {field: getattr(set_obj, field) for field in SET_FIELDS}
+        )
+
+
+def session_payload(session):
+    """Everything the logging screen shows for every exercise of a session.
+
+    Built from a fixed number of queries (plus the cached previous-session
+    sets), so the page can switch exercises without going back to the server.
+    """
+    exercise_sessions = list(session.exercise_sessions.select_related('exercise'))
+
+    sets_by_exercise_session = {}
+    for row in Set.objects.filter(exercise_session__session=session).order_by(
+        'exercise_session_id', 'set_number', 'id'
+    ).values('exercise_session_id', *SET_FIELDS):
+        sets_by_exercise_session.setdefault(row.pop('exercise_session_id'), []).append(row)
+    _create_missing_sets(session, exercise_sessions, sets_by_exercise_session)
+
+    previous = last_sets_by_definition(session.user_id, {es.exercise.definition_id for es in exercise_sessions})
+    return {
+        'session': {
+            'id': session.id,
+            'active': session.is_active,
+        },
+        'exercises': [
+            {
+                'id': es.id,
+                'exercise_id': es.exercise_id,
+                'name': es.exercise.name,
+                'order': order,
+                'notes': es.notes,
+                'sets': sets_by_exercise_session[es.id],
+                'previous': [
+                    {'weight': weight, 'reps': reps}
+                    for weight, reps in previous.get(es.exercise.definition_id, [])
+                ],
+            }
+            for order, es in enumerate(exercise_sessions, 1)
+        ],
+    }
@@ -0,0 +1,93 @@
+"""Concurrent write stress test of the configured database profile.
+
+Used by the ``stress_writes`` command. Writer threads each open their own
+database connection and post ``update_set`` requests through the test client
+as fast as they can, so every write, summary refresh and activity update
+contends for the database the way parallel autosaves from several workers
+do. Run it once per profile to compare them, e.g. ``SQLITE_PROFILE=plain``
+against the default ``tuned`` profile, or with ``DATABASE_URL`` pointing at
+PostgreSQL.
+"""
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import Client
+
+from .loadtest import prepare_session
+
+USERNAME = 'stresstest'
+
+
+def database_profile():
+    """Settings the database connection is actually running with"""
+    profile = {'vendor': connection.vendor}
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+                # mmap_size returns no row for in-memory databases
+                row = cursor.fetchone()
+                profile[pragma] = row[0] if row else None
+            profile['transaction_mode'] = connection.transaction_mode
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SHOW statement_timeout')
+            profile['statement_timeout'] = cursor.fetchone()[0]
+            profile['pool'] = bool(connection.settings_dict['OPTIONS'].get('pool'))
+            profile['server_side_cursors'] = not connection.settings_dict.get(
+                'DISABLE_SERVER_SIDE_CURSORS'
+            )
+    return profile
+
+
+def run_stress(writers=8, writes=100):
+    """Run ``writers`` threads posting ``writes`` set updates each.
+
+    Returns throughput, latency percentiles and the error messages seen,
+    counted (e.g. ``database is locked``).
+    """
+    exercise_session_ids, set_ids = prepare_session(username=USERNAME)
+    user = User.objects.get(username=USERNAME)
+
+    def writer(index):
+        client = Client()
+        client.force_login(user)
+        # Writers start on different sets but overlap, like several open pages
+        set_id_cycle = cycle(set_ids[index:] + set_ids[:index])
+        results = []
+        try:
+            for i in range(writes):
+                payload = {'set_id': next(set_id_cycle), 'weight': 40 + i % 30, 'reps': 8, 'completed': True}
+                started = time.perf_counter()
+                response = client.post('/api/set/update/', payload, content_type='application/json')
+                latency = (time.perf_counter() - started) * 1000
+                error = None if response.status_code == 200 else response.json().get('message', '')
+                results.append((latency, error))
+        finally:
+            # Each thread has its own connection
+            connections.close_all()
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        results = [result for batch in pool.map(writer, range(writers)) for result in batch]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = Counter(error for _, error in results if error is not None)
+    return {
+        'database': database_profile(),
+        'writers': writers,
+        'writes': len(results),
+        'errors': sum(errors.values()),
+        'error_messages': dict(errors),
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(len(results) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        'max_ms': round(latencies[-1], 2),
+    }
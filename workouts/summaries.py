@@ -0,0 +1,124 @@
+from django.db.models import Avg, Count, F, FloatField, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import ExerciseSession, ExerciseSummary, PersonalRecord, Set
+from .records import estimated_1rm_expression
+
+SUMMARY_FIELDS = [
+    'user', 'exercise', 'definition', 'session', 'date', 'finished',
+    'completed_sets', 'top_weight', 'avg_weight', 'total_reps', 'volume', 'estimated_1rm',
+]
+
+
+def _set_totals(exercise_session_ids):
+    """Aggregate the completed sets of the given exercise sessions in one query"""
+    rows = (
+        Set.objects.filter(exercise_session_id__in=exercise_session_ids, completed=True)
+        .values('exercise_session_id')
+        .annotate(
+            completed_sets=Count('id'),
+            top_weight=Max('weight'),
+            avg_weight=Avg('weight'),
+            total_reps=Sum('reps'),
+            volume=Sum(F('weight') * F('reps'), output_field=FloatField()),
+            estimated_1rm=Max(estimated_1rm_expression()),
+        )
+        .order_by()
+    )
+    return {row.pop('exercise_session_id'): row for row in rows}
+
+
+def _build_summaries(exercise_sessions):
+    exercise_sessions = list(exercise_sessions)
+    totals = _set_totals([es.id for es in exercise_sessions])
+    summaries = []
+    for es in exercise_sessions:
+        row = totals.get(es.id, {})
+        summaries.append(ExerciseSummary(
+            exercise_session_id=es.id,
+            user_id=es.session.user_id,
+            exercise_id=es.exercise_id,
+            definition_id=es.exercise.definition_id,
+            session_id=es.session_id,
+            date=es.session.date,
+            finished=es.session.end_time is not None,
+            completed_sets=row.get('completed_sets', 0),
+            top_weight=row.get('top_weight') or 0,
+            avg_weight=row.get('avg_weight') or 0,
+            total_reps=row.get('total_reps') or 0,
+            volume=row.get('volume') or 0,
+            estimated_1rm=row.get('estimated_1rm') or 0,
+        ))
+    return summaries
+
+
+def _upsert(summaries):
+    return ExerciseSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['exercise_session'],
+        update_fields=SUMMARY_FIELDS,
+    )
+
+
+def refresh_exercise_summaries(exercise_session_ids):
+    """Recompute the summary rows of the given exercise sessions and return them"""
+    exercise_sessions = ExerciseSession.objects.filter(
+        id__in=exercise_session_ids
+    ).select_related('session', 'exercise').order_by()
+    return _upsert(_build_summaries(exercise_sessions))
+
+
+def refresh_session_summaries(session):
+    """Recompute the summary rows of every exercise in a session and return them"""
+    exercise_sessions = session.exercise_sessions.select_related('session', 'exercise').order_by()
+    return _upsert(_build_summaries(exercise_sessions))
+
+
+def _count(queryset, session_field):
+    """Number of rows of ``queryset`` (filtered on the outer session) as a subquery"""
+    counts = queryset.order_by().values(session_field).annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def with_session_totals(sessions):
+    """Annotate sessions with their volume, completed sets, exercises and records set.
+
+    Everything is read from the summary and record tables in the same query
+    as the sessions: ``total_volume``, ``completed_set_count``,
+    ``exercise_count`` and ``records_hit``.
+    """
+    return sessions.annotate(
+        total_volume=Coalesce(Sum('exercise_summaries__volume'), 0.0),
+        completed_set_count=Coalesce(Sum('exercise_summaries__completed_sets'), 0),
+        exercise_count=_count(ExerciseSession.objects.filter(session=OuterRef('pk')), 'session'),
+        records_hit=_count(
+            PersonalRecord.objects.filter(exercise_session__session=OuterRef('pk')), 'exercise_session__session'
+        ),
+    )
+
+
+def rebuild_summaries(user=None, chunk_size=500):
+    """Drop and recompute summaries from scratch, optionally for one user.
+
+    Returns the number of summary rows written.
+    """
+    summaries = ExerciseSummary.objects.all()
+    exercise_sessions = ExerciseSession.objects.select_related('session', 'exercise').order_by('id')
+    if user is not None:
+        summaries = summaries.filter(user=user)
+        exercise_sessions = exercise_sessions.filter(session__user=user)
+    summaries.delete()
+
+    written = 0
+    batch = []
+    for es in exercise_sessions.iterator(chunk_size=chunk_size):
+        batch.append(es)
+        if len(batch) >= chunk_size:
+            _upsert(_build_summaries(batch))
+            written += len(batch)
+            batch = []
+    if batch:
+        _upsert(_build_summaries(batch))
+        written += len(batch)
+    return written
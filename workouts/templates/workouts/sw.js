@@ -0,0 +1,59 @@
+{% load static %}// Gym Tracker service worker: caches the app shell so an open workout screen
+// keeps working without a connection. Pages are never cached, as they hold
+// the logged-in user's data and devices may be shared. Writes are not
+// handled here; app.js keeps them in an IndexedDB outbox and replays them.
+
+const CACHE_NAME = 'gym-tracker-v8';
+const APP_SHELL = [
+    '{% static "css/styles.css" %}',
+    '{% static "js/app.js" %}'
+];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(APP_SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key !== CACHE_NAME).map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function cacheResponse(key, response) {
+    if (response.ok && response.type === 'basic') {
+        const copy = response.clone();
+        caches.open(CACHE_NAME).then(cache => cache.put(key, copy));
+    }
+    return response;
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+    // Static assets: stale-while-revalidate. File names are not hashed, so
+    // the cached copy is served and replaced by the network copy for the next
+    // load; a deploy reaches clients without a new cache name.
+    if (url.pathname.startsWith('{% get_static_prefix %}')) {
+        // One entry per file, whatever cache-busting query the page adds
+        const key = url.origin + url.pathname;
+        const fresh = fetch(request).then(response => cacheResponse(key, response));
+        event.respondWith(
+            caches.match(key).then(cached => {
+                if (!cached) return fresh;
+                event.waitUntil(fresh.catch(() => {}));
+                return cached;
+            })
+        );
+    }
+});
@@ -17,3 +17,15 @@ def mul(value, arg):
         return float(value) * float(arg)
     except ValueError:
         return 0
+
+@register.filter
+def duration(value):
+    """Format a timedelta as hours and minutes"""
+    try:
+        minutes = int(value.total_seconds() // 60)
+    except AttributeError:
+        return ''
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m"
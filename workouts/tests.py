@@ -1,3 +1,1295 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from asyncio import iscoroutinefunction
+from datetime import date
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import numpy as np
+
+from . import analytics, progress, views
+from .models import (
+    Workout, Exercise, ExerciseDefinition, Session, ExerciseSession, ExerciseSummary, Set, DailyActivity,
+    DataVersion, PersonalRecord, RequestProfile,
+)
+from .benchmark import run_analytics_benchmark, run_benchmark
+from .bootstrap import start_session
+from .catalogue import install_standard_exercises, resolve_definitions
+from .history_calendar import get_month, invalidate_months
+from .importer import import_history
+from .last_performance import last_sets_by_definition
+from .records import estimate_1rm
+from .stress import database_profile, run_stress
+from .urls import urlpatterns
+from .versioning import bump_data_version
+
+
+class LifterMixin:
+    """A logged-in lifter with a Push workout of Bench Press; the cache starts empty.
+
+    Test classes adjust the fixture through the class attributes: no workout
+    (``workout_name = None``), other exercises, or a session of the workout
+    already started (``self.session`` and its first ``self.exercise_session``).
+    """
+    workout_name = 'Push'
+    exercise_names = ('Bench Press',)
+    with_session = False
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create(username='lifter')
+        self.client.force_login(self.user)
+        if self.workout_name is None:
+            return
+        self.workout = Workout.objects.create(name=self.workout_name, user=self.user)
+        self.exercises = [
+            Exercise.objects.create(name=name, workout=self.workout, order=order)
+            for order, name in enumerate(self.exercise_names)
+        ]
+        self.exercise = self.exercises[0] if self.exercises else None
+        if self.with_session:
+            self.session = start_session(self.user, self.workout)
+            self.exercise_session = self.session.exercise_sessions.first()
+
+
+class HotPathIndexTests(TestCase):
+    """The hot lookups must be answered from the composite/partial indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='lifter')
+        cls.workout = Workout.objects.create(name='Push', user=cls.user)
+        cls.exercise = Exercise.objects.create(name='Bench Press', workout=cls.workout)
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be sequentially scanned
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+        elif connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN assertions are written for SQLite and PostgreSQL')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+
+    def test_active_session_lookup(self):
+        queryset = Session.objects.filter(user=self.user, end_time__isnull=True)
+        self.assertUsesIndex(queryset, 'one_active_session_per_user')
+
+    def test_history_month_lookup(self):
+        queryset = Session.objects.filter(
+            user=self.user, date__year=2024, date__month=3, end_time__isnull=False
+        )
+        self.assertUsesIndex(queryset, 'session_user_date_idx')
+
+    def test_history_day_lookup(self):
+        queryset = Session.objects.filter(
+            user=self.user, date=date(2024, 3, 1), end_time__isnull=False
+        )
+        self.assertUsesIndex(queryset, 'session_user_date_idx')
+
+    def test_last_session_lookup(self):
+        queryset = ExerciseSummary.objects.filter(
+            definition_id=self.exercise.definition_id, user=self.user, finished=True
+        )
+        self.assertUsesIndex(queryset, 'summary_definition_idx')
+
+    def test_one_active_session_per_user(self):
+        Session.objects.create(workout=self.workout, user=self.user)
+        Session.objects.create(workout=self.workout, user=self.user, end_time=timezone.now())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Session.objects.create(workout=self.workout, user=self.user)
+
+
+class ExerciseSummaryTests(LifterMixin, TestCase):
+    """Summaries follow every change to a session's sets"""
+
+    with_session = True
+
+    def post(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def summary(self):
+        summary = ExerciseSummary.objects.get(exercise_session=self.exercise_session)
+        return summary.completed_sets, summary.top_weight, summary.total_reps, summary.volume
+
+    def test_set_updates_and_adds(self):
+        first, second = self.exercise_session.sets.all()[:2]
+        self.post('/api/set/update/', {'set_id': first.id, 'weight': 100, 'reps': 5, 'completed': True})
+        self.post('/api/set/update/', {'set_id': second.id, 'weight': 90, 'reps': 8, 'completed': True})
+        self.assertEqual(self.summary(), (2, 100, 13, 100 * 5 + 90 * 8))
+
+        # Unticking a set takes it out of the totals
+        self.post('/api/set/update/', {'set_id': first.id, 'weight': 100, 'reps': 5, 'completed': False})
+        self.assertEqual(self.summary(), (1, 90, 8, 720))
+
+        added = self.post('/api/set/add/', {'exercise_session_id': self.exercise_session.id}).json()
+        self.assertEqual(self.summary(), (1, 90, 8, 720))
+        self.post('/api/set/update/', {'set_id': added['set_id'], 'weight': 110, 'reps': 2, 'completed': True})
+        self.assertEqual(self.summary(), (2, 110, 10, 940))
+
+    def test_cancel_and_delete_remove_summaries(self):
+        self.client.post(f'/session/{self.session.id}/cancel/')
+        self.assertFalse(ExerciseSummary.objects.filter(user=self.user).exists())
+
+        session = start_session(self.user, self.workout)
+        Set.objects.filter(exercise_session__session=session).update(weight=60, reps=10, completed=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+        summary = ExerciseSummary.objects.get(user=self.user)
+        self.assertEqual((summary.finished, summary.completed_sets, summary.volume), (True, 4, 2400))
+
+        self.client.post(f'/history/session/{session.id}/delete/')
+        self.assertFalse(ExerciseSummary.objects.filter(user=self.user).exists())
+
+    def test_rebuild_summaries_command(self):
+        Set.objects.filter(exercise_session=self.exercise_session).update(weight=50, reps=10, completed=True)
+        self.assertFalse(ExerciseSummary.objects.filter(exercise_session=self.exercise_session).exists())
+
+        out = io.StringIO()
+        call_command('rebuild_summaries', '--user', 'lifter', '--chunk-size', '1', stdout=out)
+        self.assertIn('Rebuilt 1 exercise summaries', out.getvalue())
+        self.assertEqual(self.summary(), (4, 50, 40, 2000))
+
+        ExerciseSummary.objects.update(volume=0)
+        call_command('rebuild_summaries', stdout=io.StringIO())
+        self.assertEqual(self.summary(), (4, 50, 40, 2000))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_summaries', '--user', 'nobody')
+
+
+class SessionBootstrapTests(LifterMixin, TestCase):
+    """Starting a session creates every exercise and set in a fixed number of queries"""
+
+    workout_name = None
+
+    def setUp(self):
+        super().setUp()
+        # The first write creates the user's version row; compare steady-state starts
+        DataVersion.objects.create(user=self.user)
+
+    def make_workout(self, name, exercise_count):
+        workout = Workout.objects.create(name=name, user=self.user)
+        Exercise.objects.bulk_create([
+            Exercise(name=f'{name} {i}', workout=workout, order=i)
+            for i in range(exercise_count)
+        ])
+        return workout
+
+    def start(self, workout):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/session/start/{workout.id}/')
+        session = Session.objects.get(user=self.user, end_time__isnull=True)
+        return session, len(queries)
+
+    def finish(self, session):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+
+    def test_query_count_independent_of_exercise_count(self):
+        small_session, small = self.start(self.make_workout('Small', 2))
+        self.finish(small_session)
+        _, large = self.start(self.make_workout('Large', 10))
+        self.assertEqual(small, large)
+
+    def test_sets_prefilled_from_previous_session(self):
+        workout = self.make_workout('Push', 3)
+        first, _ = self.start(workout)
+        self.assertEqual(Set.objects.filter(exercise_session__session=first).count(), 12)
+        Set.objects.filter(exercise_session__session=first, set_number__lte=2).update(
+            weight=80, reps=5, completed=True
+        )
+        Set.objects.filter(exercise_session__session=first, set_number=3).update(weight=90, reps=3)
+        self.finish(first)
+
+        # Only the completed sets are repeated
+        second, _ = self.start(workout)
+        for exercise_session in second.exercise_sessions.all():
+            self.assertEqual([(s.weight, s.reps) for s in exercise_session.sets.all()], [(80, 5), (80, 5)])
+
+
+class BatchUpdateTests(LifterMixin, TestCase):
+    """/api/sets/batch/ applies many writes in one request"""
+
+    with_session = True
+
+    def setUp(self):
+        super().setUp()
+        self.sets = list(self.exercise_session.sets.all())
+
+    def post(self, operations):
+        return self.client.post(
+            '/api/sets/batch/',
+            json.dumps({'operations': operations}),
+            content_type='application/json',
+        )
+
+    def test_mixed_operations(self):
+        first, second = self.sets[:2]
+        response = self.post([
+            {'type': 'set', 'set_id': first.id, 'weight': 60, 'reps': 5, 'completed': False},
+            {'type': 'set', 'set_id': first.id, 'weight': 62.5, 'reps': 5, 'completed': True},
+            {'type': 'set', 'set_id': second.id, 'weight': 60, 'reps': 8, 'completed': True},
+            {'type': 'notes', 'exercise_session_id': self.exercise_session.id, 'notes': 'Felt easy'},
+            {'type': 'add', 'exercise_session_id': self.exercise_session.id},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[4]['set_number'], 5)
+
+        first.refresh_from_db()
+        self.assertEqual((first.weight, first.reps, first.completed), (62.5, 5, True))
+        self.exercise_session.refresh_from_db()
+        self.assertEqual(self.exercise_session.notes, 'Felt easy')
+        self.assertEqual(self.exercise_session.summary.completed_sets, 2)
+        self.assertEqual(self.exercise_session.summary.volume, 62.5 * 5 + 60 * 8)
+
+    def test_foreign_set_rejects_whole_batch(self):
+        other = User.objects.create(username='other')
+        other_workout = Workout.objects.create(name='Pull', user=other)
+        Exercise.objects.create(name='Row', workout=other_workout)
+        other_set = start_session(other, other_workout).exercise_sessions.get().sets.first()
+
+        response = self.post([
+            {'type': 'notes', 'exercise_session_id': self.exercise_session.id, 'notes': 'x'},
+            {'type': 'set', 'set_id': other_set.id, 'weight': 100, 'reps': 1, 'completed': True},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.exercise_session.refresh_from_db()
+        self.assertEqual(self.exercise_session.notes, '')
+
+
+class ReplayOperationsTests(LifterMixin, TestCase):
+    """/api/sync/replay/ is idempotent on client-generated operation ids"""
+
+    with_session = True
+
+    def replay(self, operations):
+        return self.client.post(
+            '/api/sync/replay/',
+            json.dumps({'operations': operations}),
+            content_type='application/json',
+        )
+
+    def test_resending_does_not_double_apply(self):
+        operations = [
+            {'op_id': 'add-1', 'type': 'add', 'exercise_session_id': self.exercise_session.id},
+            {'op_id': 'set-1', 'type': 'set', 'set_ref': 'add-1', 'weight': 40, 'reps': 10, 'completed': True},
+        ]
+        first = self.replay(operations).json()['results']
+        second = self.replay(operations).json()['results']
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.exercise_session.sets.count(), 5)
+        new_set = self.exercise_session.sets.get(id=first[0]['set_id'])
+        self.assertEqual((new_set.weight, new_set.reps, new_set.completed), (40, 10, True))
+
+    def test_set_ref_resolved_across_requests(self):
+        add = self.replay([
+            {'op_id': 'add-1', 'type': 'add', 'exercise_session_id': self.exercise_session.id},
+        ]).json()['results'][0]
+        self.replay([
+            {'op_id': 'set-1', 'type': 'set', 'set_ref': 'add-1', 'weight': 50, 'reps': 3, 'completed': False},
+        ])
+        self.assertEqual(self.exercise_session.sets.get(id=add['set_id']).weight, 50)
+
+    def test_missing_op_id_rejected(self):
+        response = self.replay([{'type': 'add', 'exercise_session_id': self.exercise_session.id}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_stale_operation_does_not_hold_back_the_rest(self):
+        first, stale = self.exercise_session.sets.all()[:2]
+        stale_id = stale.id
+        stale.delete()
+        operations = [
+            {'op_id': 'set-1', 'type': 'set', 'set_id': first.id, 'weight': 60, 'reps': 5, 'completed': True},
+            {'op_id': 'set-2', 'type': 'set', 'set_id': stale_id, 'weight': 60, 'reps': 5, 'completed': True},
+            {'op_id': 'notes-1', 'type': 'notes', 'exercise_session_id': self.exercise_session.id, 'notes': 'Easy'},
+            {'op_id': 'add-1', 'type': 'add', 'exercise_session_id': self.exercise_session.id},
+            {'op_id': 'set-3', 'type': 'set', 'set_ref': 'add-0', 'weight': 60, 'reps': 5, 'completed': True},
+        ]
+        response = self.replay(operations)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], ['success', 'error', 'success', 'success', 'error'])
+        self.assertEqual(results[1]['message'], f'Set {stale_id} not found')
+
+        first.refresh_from_db()
+        self.exercise_session.refresh_from_db()
+        self.assertEqual((first.weight, first.completed), (60, True))
+        self.assertEqual(self.exercise_session.notes, 'Easy')
+        self.assertEqual(self.exercise_session.summary.completed_sets, 1)
+        # Rejections are remembered like any other result
+        self.assertEqual(self.replay(operations).json()['results'], results)
+
+
+class LastPerformanceCacheTests(LifterMixin, TestCase):
+    """Prefill values come from the cache once a session has been finished"""
+
+    def finish_session(self, weight, completed=4):
+        session = start_session(self.user, self.workout)
+        sets = Set.objects.filter(exercise_session__session=session)
+        sets.update(weight=weight, reps=5)
+        sets.filter(set_number__lte=completed).update(completed=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+        return session
+
+    def test_finish_populates_cache(self):
+        self.finish_session(100)
+        with self.assertNumQueries(0):
+            previous = last_sets_by_definition(self.user, [self.exercise.definition_id])
+        self.assertEqual(previous[self.exercise.definition_id], [(100, 5)] * 4)
+
+    def test_delete_invalidates_cache(self):
+        self.finish_session(100)
+        latest = self.finish_session(110)
+        self.client.post(f'/history/session/{latest.id}/delete/')
+        self.assertEqual(last_sets_by_definition(self.user, [self.exercise.definition_id])[self.exercise.definition_id][0], (100, 5))
+
+    def test_only_completed_sets_count(self):
+        self.finish_session(100, completed=2)
+        # A session without a completed set is skipped for the one before it
+        self.finish_session(110, completed=0)
+        previous = last_sets_by_definition(self.user, [self.exercise.definition_id])
+        self.assertEqual(previous[self.exercise.definition_id], [(100, 5)] * 2)
+
+
+class ListingFragmentTests(LifterMixin, TestCase):
+    """Dashboard and workout list fragments are cached until the user's data changes"""
+
+    def test_repeat_renders_skip_the_listing_queries(self):
+        for url in ('/', '/workouts/'):
+            self.client.get(url)
+            # Only the auth session, user and their data version are loaded
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            self.assertContains(response, 'Push')
+
+    def test_version_lives_in_the_database(self):
+        self.client.get('/')
+        # As another worker would: change the data without touching this process's cache
+        Workout.objects.filter(id=self.workout.id).update(name='Push Day')
+        bump_data_version(self.user)
+        self.assertContains(self.client.get('/'), 'Push Day')
+
+    def test_changes_bump_the_version(self):
+        self.client.get('/')
+        self.client.post('/workouts/create/', {'name': 'Pull'})
+        self.assertContains(self.client.get('/'), 'Pull')
+
+        session = start_session(self.user, self.workout)
+        self.client.post(f'/workouts/edit/{self.workout.id}/', {'action': 'add_exercise', 'exercise_name': 'Dips'})
+        self.assertContains(self.client.get('/'), 'Continue Session')
+        self.assertContains(self.client.get('/workouts/'), 'Dips')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+        self.assertNotContains(self.client.get('/'), 'Continue Session')
+
+    def test_finish_screen_summary(self):
+        session = start_session(self.user, self.workout)
+        set_ids = Set.objects.filter(exercise_session__session=session).values_list('id', flat=True)
+        for set_id in set_ids[:2]:
+            self.client.post('/api/set/update/', {'set_id': set_id, 'weight': 100, 'reps': 5, 'completed': True},
+                             content_type='application/json')
+        # Auth session, user and the annotated session
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/session/{session.id}/finish/')
+        session = response.context['session']
+        self.assertEqual((session.total_volume, session.completed_set_count), (1000, 2))
+        self.assertEqual((session.exercise_count, session.records_hit), (1, 5))
+
+
+class ConditionalGetTests(LifterMixin, TestCase):
+    """Read-heavy pages answer 304 until the user's data version changes"""
+
+    with_session = True
+
+    def setUp(self):
+        super().setUp()
+        self.set_id = Set.objects.filter(exercise_session__session=self.session).values_list('id', flat=True)[0]
+        self.client.post(f'/session/{self.session.id}/finish/')
+
+    def test_unchanged_pages_are_not_modified(self):
+        day = self.session.date
+        urls = [
+            '/history/', f'/history/{day.year}/{day.month}/{day.day}/', '/charts/',
+            '/api/records/', f'/api/activity/heatmap/?year={day.year}',
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response['Cache-Control'], 'private, no-cache')
+            # Auth session, user and the data version only
+            with self.assertNumQueries(3):
+                repeat = self.client.get(url, headers={'If-None-Match': response['ETag']})
+            self.assertEqual(repeat.status_code, 304, url)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get('/history/')['ETag']
+        self.client.post('/api/set/update/', {'set_id': self.set_id, 'weight': 100, 'reps': 5, 'completed': True},
+                         content_type='application/json')
+        response = self.client.get('/history/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.client.post(f'/history/session/{self.session.id}/delete/')
+        self.assertEqual(self.client.get('/history/', headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get('/history/')['ETag']
+        self.client.force_login(User.objects.create(username='other'))
+        self.assertEqual(self.client.get('/history/', headers={'If-None-Match': etag}).status_code, 200)
+
+
+class CatalogueTests(LifterMixin, TestCase):
+    """Exercises with the same movement share one catalogue definition"""
+
+    workout_name = None
+
+    def setUp(self):
+        super().setUp()
+        self.push_a = Workout.objects.create(name='Push A', user=self.user)
+        self.push_b = Workout.objects.create(name='Push B', user=self.user)
+
+    def test_spellings_and_aliases_share_a_definition(self):
+        install_standard_exercises()
+        exercises = [
+            Exercise.objects.create(name='Bench Press', workout=self.push_a),
+            Exercise.objects.create(name='bench  press', workout=self.push_b),
+            Exercise.objects.create(name='Flat Bench', workout=self.push_b, order=1),
+        ]
+        self.assertEqual(len({exercise.definition_id for exercise in exercises}), 1)
+        self.assertEqual(exercises[0].definition.muscle_group, 'chest')
+
+        # Unknown names get a definition of their own, once
+        ids = resolve_definitions(['Zercher Squat', 'zercher-squat'])
+        self.assertEqual(ids['Zercher Squat'], ids['zercher-squat'])
+        self.assertEqual(ExerciseDefinition.objects.get(id=ids['Zercher Squat']).name, 'Zercher Squat')
+
+    def test_prefill_and_charts_span_workouts(self):
+        Exercise.objects.create(name='Bench Press', workout=self.push_a)
+        bench_b = Exercise.objects.create(name='bench press', workout=self.push_b)
+        session = start_session(self.user, self.push_a)
+        Set.objects.filter(exercise_session__session=session).update(weight=100, reps=5, completed=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+
+        # Push B's first session is prefilled from Push A's
+        session = start_session(self.user, self.push_b)
+        self.assertEqual(
+            list(Set.objects.filter(exercise_session__session=session).values_list('weight', flat=True)),
+            [100] * 4,
+        )
+        response = self.client.get(f'/api/charts/series/?exercise={bench_b.definition_id}&metric=max_weight')
+        self.assertEqual(response.json()['series']['max_weight']['values'], [100])
+        response = self.client.get('/charts/')
+        self.assertEqual([definition.name for definition in response.context['exercises']], ['Bench Press'])
+
+
+class HistoryCalendarTests(LifterMixin, TestCase):
+    """The month grid is built in one query and cached until the user's data changes"""
+
+    exercise_names = ()
+
+    def test_cached_month_needs_no_queries(self):
+        Session.objects.create(workout=self.workout, user=self.user,
+                               date=date(2024, 3, 5), end_time=timezone.now())
+        with self.assertNumQueries(1):
+            month = get_month(self.user, 2024, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_month(self.user, 2024, 3), month)
+        self.assertEqual(month['sessions_this_month'], 1)
+        self.assertEqual(len(month['calendar_days']), 42)
+
+    def test_finishing_a_session_invalidates_its_month(self):
+        today = timezone.localdate()
+        self.assertEqual(get_month(self.user, today.year, today.month)['sessions_this_month'], 0)
+        session = Session.objects.create(workout=self.workout, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+        self.assertEqual(get_month(self.user, today.year, today.month)['sessions_this_month'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/history/session/{session.id}/delete/')
+        self.assertEqual(get_month(self.user, today.year, today.month)['sessions_this_month'], 0)
+
+    def test_only_the_changed_month_misses(self):
+        get_month(self.user, 2024, 3)
+        get_month(self.user, 2024, 4)
+        # Set writes leave every cached month alone
+        bump_data_version(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_months(self.user, [date(2024, 3, 5)])
+        with self.assertNumQueries(0):
+            get_month(self.user, 2024, 4)
+        with self.assertNumQueries(1):
+            get_month(self.user, 2024, 3)
+
+    def test_invalid_month_is_not_found(self):
+        for query in ('?year=2024&month=13', '?year=abc&month=1', '?year=0&month=1'):
+            self.assertEqual(self.client.get(f'/history/{query}').status_code, 404)
+
+
+class ActivityHeatmapTests(LifterMixin, TestCase):
+    """The heatmap reads the daily rollup maintained as sessions finish"""
+
+    def finish_session(self):
+        session = start_session(self.user, self.workout)
+        Set.objects.filter(exercise_session__session=session, set_number__lte=3).update(
+            weight=100, reps=5, completed=True
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+        session.refresh_from_db()
+        return session
+
+    def test_rollup_follows_finish_and_delete(self):
+        first = self.finish_session()
+        self.finish_session()
+        activity = DailyActivity.objects.get(user=self.user, date=first.date)
+        self.assertEqual((activity.sessions, activity.sets, activity.volume), (2, 6, 3000))
+
+        self.client.post(f'/history/session/{first.id}/delete/')
+        activity.refresh_from_db()
+        self.assertEqual((activity.sessions, activity.sets), (1, 3))
+
+    def test_rollup_follows_exercise_delete(self):
+        session = self.finish_session()
+        exercise = self.workout.exercises.get()
+        self.client.post(f'/workouts/edit/{self.workout.id}/', {
+            'action': 'delete_exercise', 'exercise_id': exercise.id,
+        })
+        activity = DailyActivity.objects.get(user=self.user, date=session.date)
+        self.assertEqual((activity.sessions, activity.sets, activity.volume), (1, 0, 0))
+
+    def test_heatmap_payload(self):
+        session = self.finish_session()
+        response = self.client.get(f'/api/activity/heatmap/?year={session.date.year}')
+        payload = response.json()
+        offset = (session.date - date(session.date.year, 1, 1)).days
+        self.assertEqual(payload['days'], [[offset, 1, 3, 1500.0]])
+        self.assertEqual(self.client.get('/api/activity/heatmap/?year=x').status_code, 400)
+
+
+class HistoryDayQueryTests(LifterMixin, TestCase):
+    """history_day renders in a fixed number of queries at any data size"""
+
+    workout_name = None
+
+    def log_day(self, day, session_count, exercise_count):
+        workout = Workout.objects.create(name=f'Day {day}', user=self.user)
+        Exercise.objects.bulk_create([
+            Exercise(name=f'Exercise {i}', workout=workout, order=i)
+            for i in range(exercise_count)
+        ])
+        for _ in range(session_count):
+            session = start_session(self.user, workout)
+            Set.objects.filter(exercise_session__session=session).update(weight=50, reps=10, completed=True)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f'/session/{session.id}/finish/')
+            Session.objects.filter(id=session.id).update(date=day)
+
+    def get_day(self, day):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/history/{day.year}/{day.month}/{day.day}/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_is_constant(self):
+        small_day, large_day = date(2024, 1, 1), date(2024, 1, 2)
+        self.log_day(small_day, session_count=1, exercise_count=1)
+        self.log_day(large_day, session_count=4, exercise_count=6)
+
+        _, small = self.get_day(small_day)
+        response, large = self.get_day(large_day)
+        self.assertEqual(small, large)
+        # Auth, the data version for the ETag and the page's own queries
+        self.assertLessEqual(large, 6)
+
+        session = response.context['sessions'][0]
+        self.assertEqual(session.completed_set_count, 24)
+        self.assertEqual(session.total_volume, 24 * 500)
+
+
+class BenchmarkSuiteTests(TestCase):
+    """The benchmark drives every URL and query counts do not grow with history"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_url_benchmarked(self):
+        report = run_benchmark(scales=[(1, 3, 2), (2, 12, 3)], repeat=1, exercises_per_workout=2)
+        small, large = report['scales']['1x3x2']['urls'], report['scales']['2x12x3']['urls']
+
+        self.assertEqual(set(small), {pattern.name for pattern in urlpatterns})
+        for name, result in large.items():
+            self.assertIn(result['status'], (200, 204, 302), name)
+        for name in ('history', 'history_day', 'exercise_session', 'charts', 'chart_series', 'update_set',
+                     'batch_update'):
+            self.assertEqual(small[name]['queries'], large[name]['queries'], name)
+
+
+@override_settings(
+    MIDDLEWARE=settings.MIDDLEWARE + ['workouts.middleware.ProfilingMiddleware'],
+    TEMPLATES=[{**settings.TEMPLATES[0], 'BACKEND': 'workouts.middleware.ProfilingTemplates'}],
+    PROFILING_SAMPLE_RATE=1.0,
+    PROFILING_SLOW_MS=0,
+)
+class ProfilingMiddlewareTests(LifterMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.filter(pk=self.user.pk).update(is_staff=True, is_superuser=True)
+
+    def test_profile_header_log_and_admin(self):
+        with self.assertLogs('workouts.profiling', 'WARNING') as logs:
+            response = self.client.get('/workouts/')
+        self.assertIn('sql;dur=', response['Server-Timing'])
+
+        logged = json.loads(logs.records[0].getMessage())
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.view_name, logged['view_name'])
+        self.assertEqual(profile.sql_count, logged['sql_count'])
+        self.assertGreater(profile.sql_count, 0)
+        self.assertGreater(profile.template_ms, 0)
+        self.assertEqual(profile.user, self.user)
+
+        with self.assertLogs('workouts.profiling', 'WARNING'):
+            response = self.client.get('/admin/workouts/requestprofile/')
+        self.assertEqual(response.context['slowest_views'][0]['view_name'], 'workout_list')
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get('/workouts/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    async def test_asgi_requests_are_profiled(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        with self.assertLogs('workouts.profiling', 'WARNING'):
+            response = await client.get('/workouts/')
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        profile = await RequestProfile.objects.aget()
+        self.assertGreater(profile.sql_count, 0)
+        self.assertGreater(profile.template_ms, 0)
+
+    def test_old_profiles_are_pruned(self):
+        old = RequestProfile.objects.create(
+            path='/', method='GET', status_code=200, total_ms=900,
+            created_at=timezone.now() - timezone.timedelta(days=31),
+        )
+        with self.assertLogs('workouts.profiling', 'WARNING'):
+            self.client.get('/workouts/')
+        self.assertFalse(RequestProfile.objects.filter(id=old.id).exists())
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+
+class AdminPerformanceTests(TestCase):
+    """Changelists stay at a fixed number of queries and old sessions delete in chunks"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.user = User.objects.create(username='lifter')
+        self.workout = Workout.objects.create(name='Push', user=self.user)
+        Exercise.objects.create(name='Bench Press', workout=self.workout)
+
+    def log(self, days_ago, weight=100):
+        session = start_session(self.user, self.workout)
+        Session.objects.filter(id=session.id).update(date=timezone.localdate() - timezone.timedelta(days=days_ago))
+        Set.objects.filter(exercise_session__session=session).update(weight=weight, reps=5, completed=True)
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+        self.client.force_login(self.admin)
+        return session
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        urls = [f'/admin/workouts/{model}/' for model in (
+            'workout', 'exercise', 'session', 'exercisesession', 'set', 'exercisesummary', 'personalrecord',
+        )]
+        self.log(1)
+        small = [self.changelist_queries(url) for url in urls]
+        for days_ago in range(2, 8):
+            self.log(days_ago)
+        self.assertEqual([self.changelist_queries(url) for url in urls], small)
+
+    def test_period_filter_defaults_to_recent(self):
+        self.log(1)
+        old = self.log(400)
+        response = self.client.get('/admin/workouts/session/')
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get('/admin/workouts/session/?period=old')
+        self.assertEqual([session.id for session in response.context['cl'].result_list], [old.id])
+        response = self.client.get('/admin/workouts/set/?period=all')
+        self.assertEqual(response.context['cl'].result_count, 8)
+
+    def test_delete_old_sessions_in_chunks(self):
+        recent = self.log(1, weight=100)
+        old = [self.log(400 + i, weight=150) for i in range(3)]
+        url = '/admin/workouts/session/?period=old'
+        action = {'action': 'delete_in_chunks', 'select_across': '1', '_selected_action': [old[0].id]}
+
+        response = self.client.post(url, action)
+        self.assertContains(response, 'Delete 3 sessions')
+        self.assertEqual(Session.objects.count(), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {**action, 'confirm': 'yes'})
+        self.assertEqual(list(Session.objects.values_list('id', flat=True)), [recent.id])
+        # The records fall back to what is left
+        record = PersonalRecord.objects.get(user=self.user, kind='rep_max', rep_range=1)
+        self.assertEqual(record.weight, 100)
+        self.assertEqual(list(DailyActivity.objects.filter(user=self.user).values_list('date', flat=True)),
+                         [Session.objects.get(id=recent.id).date])
+
+
+class ExportHistoryTests(LifterMixin, TestCase):
+    exercise_names = ('Bench Press', 'Dips')
+    with_session = True
+
+    def setUp(self):
+        super().setUp()
+        Set.objects.filter(exercise_session__session=self.session).update(weight=60, reps=8, completed=True)
+        other = User.objects.create(username='other')
+        start_session(other, Workout.objects.create(name='Pull', user=other))
+
+    def test_csv_streams_every_set(self):
+        response = self.client.get('/history/export/?format=csv')
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[0]['exercise'], 'Bench Press')
+        self.assertEqual(rows[-1]['exercise'], 'Dips')
+        self.assertEqual({row['workout'] for row in rows}, {'Push'})
+
+    def test_jsonl_and_command_match(self):
+        response = self.client.get('/history/export/?format=jsonl')
+        lines = b''.join(response.streaming_content).decode()
+        out = io.StringIO()
+        call_command('export_history', 'lifter', '--format', 'jsonl', '--chunk-size', '3', stdout=out)
+        self.assertEqual(out.getvalue(), lines)
+        self.assertEqual(json.loads(lines.splitlines()[0])['weight'], 60)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get('/history/export/?format=xml').status_code, 400)
+
+    async def test_asgi_download_is_streamed_asynchronously(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get('/history/export/?format=csv')
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.decode().splitlines()), 9)
+
+
+STRONG_CSV = """Date,Workout Name,Exercise Name,Set Order,Weight,Reps,Notes
+2024-03-01 18:00:00,Push,Bench Press,1,60,8,
+2024-03-01 18:00:00,Push,Bench Press,2,62.5,6,
+2024-03-01 18:00:00,Push,Dips,1,0,12,
+2024-03-04 18:00:00,Push,Bench Press,1,62.5,8,
+not a date,Push,Bench Press,1,60,8,
+"""
+
+
+HEVY_CSV = """"title","start_time","end_time","description","exercise_title","superset_id","exercise_notes","set_index","set_type","weight_kg","reps","distance_km","duration_seconds","rpe"
+"Push","15 Mar 2024, 18:00","15 Mar 2024, 19:05","","Bench Press (Barbell)",,"Paused reps",0,"warmup",40,10,,,
+"Push","15 Mar 2024, 18:00","15 Mar 2024, 19:05","","Bench Press (Barbell)",,"Paused reps",1,"normal",80,5,,,8
+"""
+
+STRONG_SET_TYPES_CSV = """Date,Workout Name,Exercise Name,Set Order,Weight,Reps,Notes
+2024-03-01 18:00:00,Push,Bench Press,W,40,10,
+2024-03-01 18:00:00,Push,Bench Press,1,80,5,
+2024-03-01 18:00:00,Push,Bench Press,2,80,5,
+2024-03-01 18:00:00,Push,Bench Press,D,60,8,
+"""
+
+STRONG_DURATION_CSV = """Date,Workout Name,Duration,Exercise Name,Set Order,Weight,Reps,Distance,Seconds,Notes,Workout Notes,RPE
+2024-03-01 18:00:00,Legs,1h 5m,Squat,1,100,5,0,0,,,
+"""
+
+
+class ImportHistoryTests(LifterMixin, TestCase):
+    workout_name = None
+
+    def run_import(self, text, chunk_size=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_history(self.user, io.StringIO(text), chunk_size=chunk_size)
+
+    def test_import_is_idempotent(self):
+        result = self.run_import(STRONG_CSV)
+        self.assertEqual((result['sessions'], result['sets'], result['invalid_rows']), (2, 4, 1))
+        self.assertEqual(Workout.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            list(Exercise.objects.filter(workout__user=self.user).values_list('name', 'order')),
+            [('Bench Press', 0), ('Dips', 1)],
+        )
+        self.assertEqual(ExerciseSummary.objects.filter(user=self.user, finished=True).count(), 3)
+        self.assertEqual(DailyActivity.objects.get(user=self.user, date=date(2024, 3, 1)).sets, 3)
+
+        again = self.run_import(STRONG_CSV, chunk_size=100)
+        self.assertEqual((again['sessions'], again['sets'], again['skipped_sessions']), (0, 0, 2))
+        self.assertEqual(Set.objects.filter(exercise_session__session__user=self.user).count(), 4)
+
+    def test_hevy_export(self):
+        result = self.run_import(HEVY_CSV)
+        self.assertEqual((result['sessions'], result['sets'], result['invalid_rows']), (1, 2, 0))
+        exercise_session = ExerciseSession.objects.get(session__user=self.user)
+        self.assertEqual(exercise_session.notes, 'Paused reps')
+        self.assertEqual(list(exercise_session.sets.values_list('set_number', 'weight')), [(1, 40), (2, 80)])
+        session = exercise_session.session
+        self.assertEqual(session.end_time - session.start_time, timezone.timedelta(hours=1, minutes=5))
+
+    def test_strong_warm_up_and_drop_sets(self):
+        result = self.run_import(STRONG_SET_TYPES_CSV)
+        self.assertEqual((result['sets'], result['invalid_rows']), (4, 0))
+        self.assertEqual(
+            list(Set.objects.filter(exercise_session__session__user=self.user).values_list('set_number', 'weight')),
+            [(1, 40), (2, 80), (3, 80), (4, 60)],
+        )
+
+    def test_strong_duration_sets_the_end_time(self):
+        self.run_import(STRONG_DURATION_CSV)
+        session = Session.objects.get(user=self.user)
+        self.assertEqual(session.end_time - session.start_time, timezone.timedelta(hours=1, minutes=5))
+
+    def export_rows(self):
+        content = b''.join(self.client.get('/history/export/?format=csv').streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        for row in rows:
+            del row['session_id']
+        return content, rows
+
+    def test_export_round_trips(self):
+        self.run_import(STRONG_CSV)
+        exported, rows = self.export_rows()
+
+        copy = User.objects.create(username='copy')
+        with self.captureOnCommitCallbacks(execute=True):
+            result = import_history(copy, io.StringIO(exported))
+        self.assertEqual((result['sessions'], result['sets'], result['invalid_rows']), (2, 4, 0))
+        self.client.force_login(copy)
+        self.assertEqual(self.export_rows()[1], rows)
+
+    def test_upload_view(self):
+        upload = SimpleUploadedFile('strong.csv', STRONG_CSV.encode(), content_type='text/csv')
+        response = self.client.post('/history/import/', {'file': upload})
+        self.assertEqual(response.context['result']['sets'], 4)
+
+        upload = SimpleUploadedFile('other.csv', b'foo,bar\n1,2\n', content_type='text/csv')
+        response = self.client.post('/history/import/', {'file': upload})
+        self.assertIn('Missing column', response.context['error'])
+
+
+class AsyncSetEndpointTests(LifterMixin, TransactionTestCase):
+    """The set logging endpoints run as coroutines under ASGI"""
+
+    with_session = True
+
+    def setUp(self):
+        super().setUp()
+        self.set = self.exercise_session.sets.first()
+
+    def test_views_are_async(self):
+        for view in (views.update_set, views.update_notes, views.add_set):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_update_and_add_over_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.post(
+            '/api/set/update/',
+            {'set_id': self.set.id, 'weight': 80, 'reps': 5, 'completed': True},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        summary = await ExerciseSummary.objects.aget(exercise_session=self.exercise_session)
+        self.assertEqual(summary.top_weight, 80)
+
+        response = await client.post(
+            '/api/set/add/', {'exercise_session_id': self.exercise_session.id},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['set_number'], 5)
+
+        other = await User.objects.acreate(username='other')
+        await client.aforce_login(other)
+        response = await client.post(
+            '/api/notes/update/', {'exercise_session_id': self.exercise_session.id, 'notes': 'Mine'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class LiveSyncTests(LifterMixin, TransactionTestCase):
+    with_session = True
+
+    def setUp(self):
+        super().setUp()
+        self.set = self.exercise_session.sets.first()
+
+    async def test_changes_reach_other_pages(self):
+        tablet = AsyncClient()
+        await tablet.aforce_login(self.user)
+        response = await tablet.get('/api/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 3000\n\n')
+
+        phone = AsyncClient()
+        await phone.aforce_login(self.user)
+        await phone.post(
+            '/api/set/update/',
+            {'set_id': self.set.id, 'weight': 80, 'reps': 5, 'completed': True},
+            content_type='application/json',
+            headers={'X-Client-Id': 'phone'},
+        )
+        await phone.post('/api/sync/replay/', {'operations': [
+            {'op_id': 'a', 'type': 'notes', 'exercise_session_id': self.exercise_session.id, 'notes': 'Easy'},
+        ]}, content_type='application/json', headers={'X-Client-Id': 'phone'})
+
+        message = json.loads((await anext(events)).decode().removeprefix('data: '))
+        self.assertEqual(
+            {key: message[key] for key in ('type', 'session_id', 'origin', 'set_id', 'weight')},
+            {'type': 'set', 'session_id': self.session.id, 'origin': 'phone', 'set_id': self.set.id, 'weight': 80},
+        )
+        message = json.loads((await anext(events)).decode().removeprefix('data: '))
+        self.assertEqual((message['type'], message['notes']), ('notes', 'Easy'))
+        await events.aclose()
+
+    def test_wsgi_clients_are_told_not_to_reconnect(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/live/').status_code, 204)
+
+
+class SessionPayloadTests(LifterMixin, TestCase):
+    workout_name = None
+
+    def start(self, exercise_count):
+        workout = Workout.objects.create(name=f'{exercise_count} exercises', user=self.user)
+        Exercise.objects.bulk_create([
+            Exercise(name=f'Exercise {i}', workout=workout, order=i) for i in range(exercise_count)
+        ])
+        return start_session(self.user, workout)
+
+    def get_payload(self, session):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/session/{session.id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_query_count_independent_of_exercise_count(self):
+        small = self.start(1)
+        Session.objects.filter(id=small.id).update(end_time=timezone.now())
+        large = self.start(8)
+        _, small_queries = self.get_payload(small)
+        payload, large_queries = self.get_payload(large)
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual([exercise['order'] for exercise in payload['exercises']], list(range(1, 9)))
+        self.assertEqual(len(payload['exercises'][7]['sets']), 4)
+
+    def test_payload_includes_previous_values_and_new_exercises(self):
+        session = self.start(1)
+        Set.objects.filter(exercise_session__session=session).update(weight=60, reps=8, completed=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/session/{session.id}/finish/')
+
+        workout = session.workout
+        session = start_session(self.user, workout)
+        Exercise.objects.create(name='Added later', workout=workout, order=5)
+        ExerciseSession.objects.create(session=session, exercise=workout.exercises.last())
+
+        payload, _ = self.get_payload(session)
+        first, added = payload['exercises']
+        self.assertEqual(first['previous'], [{'weight': 60, 'reps': 8}] * 4)
+        self.assertEqual(len(added['sets']), 4)
+
+        response = self.client.get(f'/session/{session.id}/exercise/2/')
+        self.assertContains(response, 'id="session-payload"')
+        self.assertEqual(response.context['current_exercise']['name'], 'Added later')
+
+    def test_other_users_session_is_not_found(self):
+        other = User.objects.create(username='other')
+        session = start_session(other, Workout.objects.create(name='Pull', user=other))
+        self.assertEqual(self.client.get(f'/api/session/{session.id}/').status_code, 404)
+
+
+class DatabaseProfileTests(TransactionTestCase):
+    """The connection-init hooks apply the configured database profile"""
+
+    def test_sqlite_profile_pragmas(self):
+        if connection.vendor != 'sqlite' or 'init_command' not in connection.settings_dict['OPTIONS']:
+            self.skipTest('Tuned SQLite profile not in use')
+        profile = database_profile()
+        self.assertEqual(profile['journal_mode'], 'wal')
+        self.assertEqual(profile['synchronous'], 1)
+        self.assertEqual(profile['busy_timeout'], settings.SQLITE_TIMEOUT * 1000)
+        self.assertEqual(profile['transaction_mode'], 'IMMEDIATE')
+
+    def test_parallel_writers(self):
+        result = run_stress(writers=4, writes=10)
+        self.assertEqual(result['writes'], 40)
+        self.assertEqual(result['errors'], 0, result['error_messages'])
+
+
+class PersonalRecordTests(LifterMixin, TestCase):
+    def log(self, *sets, finish=True, workout=None):
+        """Run a session through the set update endpoint; sets are (weight, reps)"""
+        session = start_session(self.user, workout or self.workout)
+        set_ids = list(Set.objects.filter(exercise_session__session=session).values_list('id', flat=True))
+        for set_id, (weight, reps) in zip(set_ids, sets):
+            self.update(set_id, weight, reps)
+        if finish:
+            self.client.post(f'/session/{session.id}/finish/')
+        return set_ids
+
+    def update(self, set_id, weight, reps, completed=True):
+        response = self.client.post(
+            '/api/set/update/', {'set_id': set_id, 'weight': weight, 'reps': reps, 'completed': completed},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def records(self):
+        return {
+            (record.kind, record.rep_range): record.value
+            for record in PersonalRecord.objects.filter(user=self.user, definition=self.exercise.definition)
+        }
+
+    def test_estimate_formulas(self):
+        self.assertEqual(estimate_1rm(100, 1), 100)
+        self.assertAlmostEqual(estimate_1rm(100, 5), 116.67, places=2)
+        with override_settings(PR_1RM_FORMULA='brzycki'):
+            self.assertAlmostEqual(estimate_1rm(100, 5), 112.5)
+            self.log((100, 5))
+        summary = ExerciseSummary.objects.get(user=self.user)
+        self.assertAlmostEqual(summary.estimated_1rm, 112.5)
+
+    def test_records_follow_set_updates(self):
+        self.log((100, 5), (90, 8))
+        self.assertEqual(self.records(), {
+            ('e1rm', 0): 100 * (1 + 5 / 30),
+            ('rep_max', 1): 100, ('rep_max', 3): 100, ('rep_max', 5): 100, ('rep_max', 8): 90,
+            ('volume', 0): 1220,
+        })
+
+        set_ids = self.log((95, 8), finish=False)
+        records = self.records()
+        self.assertEqual(records[('rep_max', 8)], 95)
+        self.assertEqual(records[('e1rm', 0)], 95 * (1 + 8 / 30))
+
+        # Un-completing the set falls back to the best from history
+        self.update(set_ids[0], 95, 8, completed=False)
+        records = self.records()
+        self.assertEqual(records[('rep_max', 8)], 90)
+        self.assertEqual(records[('e1rm', 0)], 100 * (1 + 5 / 30))
+
+    def test_deleting_a_session_drops_its_records(self):
+        self.log((100, 5))
+        self.log((110, 3))
+        session = Session.objects.filter(user=self.user).latest('start_time')
+        self.client.post(f'/history/session/{session.id}/delete/')
+        self.assertEqual(self.records()[('rep_max', 1)], 100)
+
+    def test_deleting_an_exercise_falls_back_to_other_workouts(self):
+        self.log((100, 1))
+        push_b = Workout.objects.create(name='Push B', user=self.user)
+        bench_b = Exercise.objects.create(name='Bench Press', workout=push_b)
+        self.log((110, 1), workout=push_b)
+        self.client.post(f'/workouts/edit/{push_b.id}/', {'action': 'delete_exercise', 'exercise_id': bench_b.id})
+        self.assertEqual(self.records()[('rep_max', 1)], 100)
+
+        # A lighter session is not a record
+        self.log((90, 1))
+        self.assertEqual(self.records()[('rep_max', 1)], 100)
+
+    def test_endpoint_reads_the_index_in_one_query(self):
+        self.log((100, 5))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/records/')
+        self.assertEqual(sum('workouts_personalrecord' in query['sql'] for query in queries), 1)
+        records = response.json()['records']
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]['exercise'], 'Bench Press')
+        self.assertEqual(self.client.get('/api/records/?exercise=x').status_code, 400)
+
+
+class AnalyticsTests(LifterMixin, TestCase):
+    exercise_names = ('Bench Press', 'Dips')
+
+    def setUp(self):
+        super().setUp()
+        self.bench, self.dips = self.exercises
+
+    def log(self, day, sets):
+        """Log a finished session; sets are (exercise, weight, reps)"""
+        start = timezone.make_aware(timezone.datetime.combine(day, timezone.datetime.min.time()))
+        session = Session.objects.create(
+            user=self.user, workout=self.workout, date=day, start_time=start, end_time=start,
+        )
+        for exercise, weight, reps in sets:
+            exercise_session, _ = ExerciseSession.objects.get_or_create(session=session, exercise=exercise)
+            Set.objects.create(
+                exercise_session=exercise_session, set_number=exercise_session.sets.count() + 1,
+                weight=weight, reps=reps, completed=True,
+            )
+        Set.objects.create(exercise_session=exercise_session, set_number=99, weight=500, reps=1)
+        return session
+
+    def test_series_trends_and_rates(self):
+        for week in range(4):
+            self.log(date(2026, 3, 2 + week * 7), [(self.bench, 100 + week * 2.5, 1), (self.bench, 80, 5), (self.dips, 20, 10)])
+
+        with CaptureQueriesContext(connection) as queries:
+            sets = analytics.load_sets(self.user)
+        self.assertEqual(len(queries), 1)
+        # Incomplete sets are left out
+        self.assertEqual(len(sets), 12)
+
+        daily = analytics.daily_series(sets.for_definition(self.bench.definition_id))
+        self.assertEqual(analytics.to_dates(daily['day'])[0], date(2026, 3, 2))
+        self.assertEqual(daily['max_weight'].tolist(), [100, 102.5, 105, 107.5])
+        self.assertEqual(daily['total_volume'][0], 500)
+
+        rates = analytics.progression_rates(sets)
+        self.assertAlmostEqual(rates[self.bench.definition_id], 2.5)
+        self.assertAlmostEqual(rates[self.dips.definition_id], 0)
+
+        tonnage = analytics.weekly_tonnage(sets)
+        self.assertEqual(analytics.to_dates(tonnage['week'][:1]), [date(2026, 3, 2)])
+        self.assertEqual(tonnage['tonnage'][:, 0].tolist(), [700, 702.5, 705, 707.5])
+
+        trends = analytics.rolling_trends(sets, window=7)
+        self.assertEqual(trends['volume'][0], 700)
+        self.assertAlmostEqual(trends['intensity'][0], 700 / 16)
+
+        ratio = analytics.acute_chronic_ratio(sets)['ratio']
+        self.assertAlmostEqual(ratio[0], 4)
+        self.assertAlmostEqual(ratio[-1], (707.5 / 7) / (2815 / 28))
+
+    def test_daily_progress_combines_the_days_sessions(self):
+        self.log(date(2026, 3, 2), [(self.bench, 100, 5)])
+        self.log(date(2026, 3, 2), [(self.bench, 80, 10), (self.dips, 20, 10)])
+        Session.objects.create(user=self.user, workout=self.workout, date=date(2026, 3, 3))
+
+        days, daily, _ = progress.daily_progress(self.user, self.bench.definition)
+        # Incomplete sets and unfinished sessions are left out
+        self.assertEqual(analytics.to_dates(days), [date(2026, 3, 2)])
+        self.assertEqual(daily['max_weight'].tolist(), [100])
+        self.assertEqual(daily['avg_weight'].tolist(), [90])
+        self.assertEqual(daily['total_reps'].tolist(), [15])
+        self.assertEqual(daily['total_volume'].tolist(), [1300])
+
+    def test_training_load(self):
+        ExerciseDefinition.objects.filter(id=self.bench.definition_id).update(muscle_group='chest')
+        ExerciseDefinition.objects.filter(id=self.dips.definition_id).update(muscle_group='')
+        for week in range(4):
+            self.log(date(2026, 3, 2 + week * 7), [(self.bench, 100, 5), (self.dips, 20, 10)])
+        self.client.force_login(self.user)
+
+        data = self.client.get('/api/charts/load/').json()
+        self.assertEqual(data['weeks'], ['2026-03-02', '2026-03-09', '2026-03-16', '2026-03-23'])
+        self.assertEqual(data['muscle_groups'], [
+            {'key': '', 'label': 'Other', 'tonnage': [200] * 4},
+            {'key': 'chest', 'label': 'Chest', 'tonnage': [500] * 4},
+        ])
+        self.assertEqual(data['ratio']['labels'][0], '2026-03-02')
+        self.assertAlmostEqual(data['ratio']['values'][-1], round((700 / 7) / (2800 / 28), 2))
+
+        # The ratio at the start of a range still counts the weeks before it
+        data = self.client.get('/api/charts/load/?start=2026-03-23&max_points=10').json()
+        self.assertEqual(data['weeks'], ['2026-03-23'])
+        self.assertEqual(data['ratio']['values'][0], round((700 / 7) / (2800 / 28), 2))
+        self.assertEqual(self.client.get('/api/charts/load/?start=March').status_code, 400)
+
+    def test_chart_series(self):
+        self.log(date(2026, 3, 2), [(self.bench, 100, 5)])
+        self.log(date(2026, 3, 9), [(self.bench, 110, 5)])
+        self.client.force_login(self.user)
+
+        # The page itself only lists the exercises; the series are fetched
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/charts/?exercise={self.bench.definition_id}')
+        self.assertFalse(any('workouts_set' in query['sql'] for query in queries))
+
+        url = f'/api/charts/series/?exercise={self.bench.definition_id}'
+        data = self.client.get(url).json()
+        self.assertEqual(data['series']['max_weight'], {'labels': ['2026-03-02', '2026-03-09'], 'values': [100, 110]})
+        self.assertEqual(data['series']['volume_trend']['values'], [500, 525])
+        self.assertAlmostEqual(data['progression_rate'], 110 * (1 + 5 / 30) - 100 * (1 + 5 / 30))
+        self.assertIsNone(data['downsampled'])
+
+        # The trend at the start of a range still averages the weeks before it
+        data = self.client.get(f'{url}&metric=volume_trend&start=2026-03-05').json()
+        self.assertEqual(data['series'], {'volume_trend': {'labels': ['2026-03-09'], 'values': [525]}})
+        self.assertIsNone(data['progression_rate'])
+
+        for query in ('metric=nope', 'start=March', 'max_points=x', 'downsample=zip'):
+            self.assertEqual(self.client.get(f'{url}&{query}').status_code, 400, query)
+        self.assertEqual(self.client.get('/api/charts/series/?exercise=0').status_code, 404)
+
+    def test_chart_series_is_scoped_to_the_user(self):
+        other = User.objects.create(username='other')
+        workout = Workout.objects.create(name='Secret', user=other)
+        secret = Exercise.objects.create(name='Grandma Carry', workout=workout)
+        self.client.force_login(self.user)
+
+        response = self.client.get(f'/api/charts/series/?exercise={secret.definition_id}')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('Grandma', response.content.decode())
+        # Shared catalogue movements resolve once the user has them in a workout
+        Exercise.objects.create(name='Grandma Carry', workout=self.workout, order=2)
+        response = self.client.get(f'/api/charts/series/?exercise={secret.definition_id}')
+        self.assertEqual(response.json()['exercise']['name'], 'Grandma Carry')
+
+    def test_long_series_are_downsampled(self):
+        days = np.arange(date(2024, 1, 1).toordinal(), date(2026, 1, 1).toordinal())
+        weights = 100 + np.sin(np.arange(len(days)) / 20) * 10
+        weights[400] = 200
+        self.assertLessEqual(len(analytics.lttb(days, weights, 100)), 100)
+        kept = analytics.lttb(days, weights, 100)
+        self.assertEqual((kept[0], kept[-1]), (0, len(days) - 1))
+        # Peaks survive
+        self.assertIn(400, kept)
+
+        weeks, weekly = analytics.weekly_buckets(days, weights, 'max')
+        self.assertEqual(len(weeks), 105)
+        self.assertEqual(weekly.max(), 200)
+
+        for day in days[::7]:
+            self.log(date.fromordinal(int(day)), [(self.bench, 100, 5)])
+        self.client.force_login(self.user)
+        url = f'/api/charts/series/?exercise={self.bench.definition_id}&metric=max_weight&max_points=20'
+        data = self.client.get(url).json()
+        self.assertEqual(data['downsampled'], 'lttb')
+        self.assertEqual(data['training_days'], 105)
+        self.assertEqual(len(data['series']['max_weight']['values']), 20)
+        data = self.client.get(f'{url}&downsample=weekly').json()
+        self.assertEqual(len(data['series']['max_weight']['labels']), 20)
+
+    def test_benchmark(self):
+        report = run_analytics_benchmark(sets=2000, repeat=1)
+        self.assertEqual(report['sets'], 2000)
+        self.assertAlmostEqual(report['total_median_ms'], report['load_median_ms'] + report['compute_median_ms'], places=1)
+        self.assertTrue(report['load_within_budget'] and report['compute_within_budget'])
+        self.assertTrue(report['within_budget'])
@@ -16,10 +16,23 @@ urlpatterns = [
     path('history/', views.history, name='history'),
     path('history/<int:year>/<int:month>/<int:day>/', views.history_day, name='history_day'),
     path('history/session/<int:session_id>/delete/', views.session_delete, name='session_delete'),
+    path('history/export/', views.export_history, name='export_history'),
+    path('history/import/', views.import_history_view, name='import_history'),
     path('charts/', views.charts, name='charts'),
+    path('api/activity/heatmap/', views.activity_heatmap, name='activity_heatmap'),
+    path('api/records/', views.records, name='records'),
+    path('api/charts/series/', views.chart_series, name='chart_series'),
+    path('api/charts/load/', views.chart_load, name='chart_load'),
     
     # AJAX endpoints
     path('api/set/update/', views.update_set, name='update_set'),
     path('api/notes/update/', views.update_notes, name='update_notes'),
     path('api/set/add/', views.add_set, name='add_set'),
+    path('api/sets/batch/', views.batch_update, name='batch_update'),
+    path('api/session/<int:session_id>/', views.session_payload_view, name='session_payload'),
+    path('api/sync/replay/', views.replay_operations_view, name='replay_operations'),
+    path('api/live/', views.live_events, name='live_events'),
+    
+    # Offline support
+    path('sw.js', views.service_worker, name='service_worker'),
 ]
@@ -0,0 +1,63 @@
+"""Per-user data versions and conditional GETs.
+
+Every write to a user's sessions, sets, notes or workouts calls
+:func:`bump_data_version`, which increments their ``DataVersion`` row in the
+writer's transaction. :func:`conditional_on_data` wraps read-heavy views with
+Django's ``condition`` decorator: the ETag is the user's version (plus the
+date, as pages highlight today) and Last-Modified the time of the last
+write, so a repeat fetch of an unchanged page costs one primary-key lookup
+and returns 304 Not Modified.
+"""
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+
+def bump_data_version(user):
+    """Mark the user's data as changed"""
+    now = timezone.now()
+    if DataVersion.objects.filter(user=user).update(version=F('version') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(user=user, version=1, updated_at=now)
+    except IntegrityError:
+        # A concurrent first write created the row
+        DataVersion.objects.filter(user=user).update(version=F('version') + 1, updated_at=now)
+
+
+def request_version(request):
+    """The requesting user's ``(version, updated_at)``, looked up once per request"""
+    if not hasattr(request, '_data_version'):
+        request._data_version = DataVersion.objects.filter(user=request.user).values_list(
+            'version', 'updated_at'
+        ).first() or (0, None)
+    return request._data_version
+
+
+def data_etag(request, *args, **kwargs):
+    version, _ = request_version(request)
+    return f'{request.user.pk}-{version}-{timezone.localdate().isoformat()}'
+
+
+def data_last_modified(request, *args, **kwargs):
+    # Pages change at midnight too, when "today" moves on
+    midnight = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    _, updated_at = request_version(request)
+    return max(updated_at, midnight) if updated_at else midnight
+
+
+def conditional_on_data(view):
+    """Answer unchanged GETs of ``view`` with 304 Not Modified.
+
+    Responses are marked private and must be revalidated, so browsers never
+    show a stale page from their cache without asking first.
+    """
+    view = condition(etag_func=data_etag, last_modified_func=data_last_modified)(view)
+    return cache_control(private=True, no_cache=True)(view)
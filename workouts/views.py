@@ -1,15 +1,35 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db.models import Max
-from django.db import models
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Prefetch, Sum
+from django.db.models.functions import Coalesce
+import asyncio
+import io
 import json
-
-from .models import Workout, Exercise, Session, ExerciseSession, Set
+from datetime import date
+
+from .models import Workout, Exercise, ExerciseDefinition, Session, ExerciseSession, Set
+from .activity import heatmap, refresh_days, refresh_days_for_summaries, year_range
+from .batch import apply_operations, replay_operations
+from .bootstrap import add_exercises_to_session, start_session
+from .export import EXPORT_FORMATS, astream_history, stream_history
+from .fragments import FRAGMENT_TIMEOUT, listing_version
+from .history_calendar import get_month, invalidate_months, is_valid_month
+from .importer import ImportFormatError, import_history
+from .last_performance import invalidate_last_sets, refresh_last_sets
+from .live import publish, publish_notes, publish_set, subscribe
+from .progress import DOWNSAMPLING, METRICS, progress_series, training_load
+from .records import current_records, rebuild_records, update_records
+from .session_payload import session_payload
+from .summaries import refresh_exercise_summaries, refresh_session_summaries, with_session_totals
+from .versioning import bump_data_version, conditional_on_data
 
 
 def login_view(request):
@@ -29,12 +49,15 @@ def login_view(request):
 @login_required
 def dashboard(request):
     """Main dashboard showing user's workouts"""
-    workouts = Workout.objects.filter(user=request.user)
-    active_session = Session.objects.filter(user=request.user, end_time__isnull=True).first()
+    # Lazy querysets: only evaluated when the cached fragment is out of date
+    workouts = Workout.objects.filter(user=request.user).annotate(exercise_count=Count('exercises'))
+    active_sessions = Session.objects.filter(user=request.user, end_time__isnull=True).select_related('workout')
     
     context = {
         'workouts': workouts,
-        'active_session': active_session,
+        'active_sessions': active_sessions,
+        'listing_version': listing_version(request),
+        'fragment_timeout': FRAGMENT_TIMEOUT,
     }
     return render(request, 'workouts/dashboard.html', context)
 
@@ -42,8 +65,12 @@ def dashboard(request):
 @login_required
 def workout_list(request):
     """List all workouts for the user"""
-    workouts = Workout.objects.filter(user=request.user)
-    return render(request, 'workouts/workout_list.html', {'workouts': workouts})
+    workouts = Workout.objects.filter(user=request.user).prefetch_related('exercises')
+    return render(request, 'workouts/workout_list.html', {
+        'workouts': workouts,
+        'listing_version': listing_version(request),
+        'fragment_timeout': FRAGMENT_TIMEOUT,
+    })
 
 
 @login_required
@@ -53,6 +80,7 @@ def workout_create(request):
         name = request.POST.get('name', '').strip()
         if name:
             workout = Workout.objects.create(name=name, user=request.user)
+            bump_data_version(request.user)
             return redirect('workout_edit', workout_id=workout.id)
     
     return render(request, 'workouts/workout_create.html')
@@ -84,14 +112,18 @@ def workout_edit(request, workout_id):
                 ).first()
                 
                 if active_session:
-                    ExerciseSession.objects.create(
-                        exercise=new_exercise,
-                        session=active_session
-                    )
+                    add_exercises_to_session(active_session, [new_exercise])
         
         elif action == 'delete_exercise':
-            exercise_id = request.POST.get('exercise_id')
-            Exercise.objects.filter(id=exercise_id, workout=workout).delete()
+            exercise = get_object_or_404(Exercise, id=request.POST.get('exercise_id'), workout=workout)
+            days = set(exercise.exercise_sessions.values_list('session__date', flat=True))
+            with transaction.atomic():
+                exercise.delete()
+                # Its exercise sessions took their records with them; other workouts may hold the next best
+                rebuild_records(request.user, [exercise.definition_id])
+                refresh_days(request.user, days)
+                bump_data_version(request.user)
+            invalidate_last_sets(request.user, [exercise.definition_id])
         
         elif action == 'reorder':
             exercise_id = request.POST.get('exercise_id')
@@ -114,6 +146,7 @@ def workout_edit(request, workout_id):
                     exercise.save()
                     next_exercise.save()
         
+        bump_data_version(request.user)
         return redirect('workout_edit', workout_id=workout.id)
     
     exercises = workout.exercises.all()
@@ -133,18 +166,14 @@ def session_start(request, workout_id):
     if active_session:
         return redirect('exercise_session', session_id=active_session.id, order=1)
     
-    # Create new session
-    session = Session.objects.create(
-        workout=workout,
-        user=request.user
-    )
-    
-    # Create ExerciseSession for each exercise in the workout
-    for exercise in workout.exercises.all():
-        ExerciseSession.objects.create(
-            exercise=exercise,
-            session=session
-        )
+    try:
+        # Create the session with every exercise and its pre-filled sets
+        session = start_session(request.user, workout)
+    except IntegrityError:
+        # A concurrent request started a session first (one active session per user)
+        active_session = Session.objects.get(user=request.user, end_time__isnull=True)
+        return redirect('exercise_session', session_id=active_session.id, order=1)
+    bump_data_version(request.user)
     
     # Redirect to first exercise
     return redirect('exercise_session', session_id=session.id, order=1)
@@ -155,73 +184,81 @@ def exercise_session(request, session_id, order):
     """Main exercise logging screen"""
     session = get_object_or_404(Session, id=session_id, user=request.user)
     
-    # Get all exercise sessions for this workout session
-    exercise_sessions = list(session.exercise_sessions.all())
+    # The whole session is embedded so the page can switch exercises client-side
+    payload = session_payload(session)
+    exercises = payload['exercises']
     
-    if not exercise_sessions:
+    if not exercises:
         return redirect('session_finish', session_id=session.id)
     
     # Get the exercise at the specified order (1-indexed)
-    if order < 1 or order > len(exercise_sessions):
+    if order < 1 or order > len(exercises):
         order = 1
     
-    current_exercise_session = exercise_sessions[order - 1]
-    
-    # Get or create sets for this exercise session
-    existing_sets = current_exercise_session.sets.all()
-    
-    # If no sets exist, create 4 empty sets with data from previous session
-    if not existing_sets:
-        previous_sets = current_exercise_session.get_previous_sets()
-        if previous_sets:
-            for i, prev_set in enumerate(previous_sets[:4], 1):
-                Set.objects.create(
-                    exercise_session=current_exercise_session,
-                    set_number=i,
-                    weight=prev_set.weight,
-                    reps=prev_set.reps,
-                    completed=False
-                )
-        else:
-            for i in range(1, 5):
-                Set.objects.create(
-                    exercise_session=current_exercise_session,
-                    set_number=i,
-                    weight=0,
-                    reps=0,
-                    completed=False
-                )
-        existing_sets = current_exercise_session.sets.all()
+    current_exercise = exercises[order - 1]
     
     context = {
         'session': session,
-        'current_exercise_session': current_exercise_session,
-        'sets': existing_sets,
+        'payload': payload,
+        'current_exercise': current_exercise,
+        'sets': current_exercise['sets'],
         'current_order': order,
-        'total_exercises': len(exercise_sessions),
+        'total_exercises': len(exercises),
         'has_previous': order > 1,
-        'has_next': order < len(exercise_sessions),
+        'has_next': order < len(exercises),
     }
     
     return render(request, 'workouts/exercise_session.html', context)
 
 
+@login_required
+def session_payload_view(request, session_id):
+    """JSON of every exercise, set, note and previous-session value of a session"""
+    session = get_object_or_404(Session, id=session_id, user=request.user)
+    return JsonResponse(session_payload(session))
+
+
+# Seconds between keep-alive comments on the live event stream
+LIVE_HEARTBEAT = 20
+
+
+def _client_id(request):
+    """Id of the page that sent a write, echoed in live sync messages"""
+    return request.headers.get('X-Client-Id', '')[:64]
+
+
+def _after_set_change(user, set_obj, origin, message_type='set'):
+    """Bring summaries, cached last sets and the activity rollup up to date"""
+    bump_data_version(user)
+    summaries = refresh_exercise_summaries([set_obj.exercise_session_id])
+    update_records(user, summaries)
+    for summary in summaries:
+        if summary.finished:
+            invalidate_last_sets(user, [summary.definition_id])
+        publish_set(user.pk, summary.session_id, set_obj, message_type, origin)
+    refresh_days_for_summaries(user, summaries)
+
+
+# The set logging endpoints are async so that, when served over ASGI, a worker
+# is not tied up for the whole round trip of a tiny write
 @login_required
 @require_http_methods(["POST"])
-def update_set(request):
+async def update_set(request):
     """AJAX endpoint to update a set"""
     try:
+        user = await request.auser()
         data = json.loads(request.body)
         set_id = data.get('set_id')
         weight = float(data.get('weight', 0))
         reps = int(data.get('reps', 0))
         completed = data.get('completed', False)
         
-        set_obj = get_object_or_404(Set, id=set_id, exercise_session__session__user=request.user)
+        set_obj = await aget_object_or_404(Set, id=set_id, exercise_session__session__user=user)
         set_obj.weight = weight
         set_obj.reps = reps
         set_obj.completed = completed
-        set_obj.save()
+        await set_obj.asave(update_fields=['weight', 'reps', 'completed'])
+        await sync_to_async(_after_set_change)(user, set_obj, _client_id(request))
         
         return JsonResponse({'status': 'success'})
     except Exception as e:
@@ -230,20 +267,23 @@ def update_set(request):
 
 @login_required
 @require_http_methods(["POST"])
-def update_notes(request):
+async def update_notes(request):
     """AJAX endpoint to update exercise notes"""
     try:
+        user = await request.auser()
         data = json.loads(request.body)
         exercise_session_id = data.get('exercise_session_id')
         notes = data.get('notes', '')
         
-        exercise_session = get_object_or_404(
+        exercise_session = await aget_object_or_404(
             ExerciseSession,
             id=exercise_session_id,
-            session__user=request.user
+            session__user=user
         )
         exercise_session.notes = notes
-        exercise_session.save()
+        await exercise_session.asave(update_fields=['notes'])
+        await sync_to_async(bump_data_version)(user)
+        await sync_to_async(publish_notes)(user.pk, exercise_session, _client_id(request))
         
         return JsonResponse({'status': 'success'})
     except Exception as e:
@@ -252,27 +292,29 @@ def update_notes(request):
 
 @login_required
 @require_http_methods(["POST"])
-def add_set(request):
+async def add_set(request):
     """AJAX endpoint to add a new set"""
     try:
+        user = await request.auser()
         data = json.loads(request.body)
         exercise_session_id = data.get('exercise_session_id')
         
-        exercise_session = get_object_or_404(
+        exercise_session = await aget_object_or_404(
             ExerciseSession,
             id=exercise_session_id,
-            session__user=request.user
+            session__user=user
         )
         
         # Get the next set number
-        max_set = exercise_session.sets.aggregate(Max('set_number'))['set_number__max'] or 0
-        new_set = Set.objects.create(
+        max_set = (await exercise_session.sets.aaggregate(Max('set_number')))['set_number__max'] or 0
+        new_set = await Set.objects.acreate(
             exercise_session=exercise_session,
             set_number=max_set + 1,
             weight=0,
             reps=0,
             completed=False
         )
+        await sync_to_async(_after_set_change)(user, new_set, _client_id(request), 'add')
         
         return JsonResponse({
             'status': 'success',
@@ -283,17 +325,93 @@ def add_set(request):
         return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
 
+@login_required
+@require_http_methods(["POST"])
+def batch_update(request):
+    """AJAX endpoint applying many set, notes and add-set operations at once"""
+    try:
+        data = json.loads(request.body)
+        results = apply_operations(request.user, data.get('operations', []), _client_id(request))
+        return JsonResponse({'status': 'success', 'results': results})
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+
+@login_required
+@require_http_methods(["POST"])
+def replay_operations_view(request):
+    """AJAX endpoint replaying the offline outbox; safe to call repeatedly"""
+    try:
+        data = json.loads(request.body)
+        results = replay_operations(request.user, data.get('operations', []), _client_id(request))
+        return JsonResponse({'status': 'success', 'results': results})
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+
+@login_required
+async def live_events(request):
+    """Server-Sent Events stream of changes made on the user's other pages.
+
+    Needs the ASGI server; under WSGI a 204 tells EventSource not to retry.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    
+    async def stream():
+        async with subscribe(user.pk) as subscription:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f'data: {message}\n\n'
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def service_worker(request):
+    """Serve the service worker from the site root so it can control every page"""
+    response = render(request, 'workouts/sw.js', content_type='application/javascript')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 @login_required
 def session_finish(request, session_id):
     """Finish the workout session"""
-    session = get_object_or_404(Session, id=session_id, user=request.user)
+    sessions = Session.objects.filter(user=request.user)
+    if request.method != 'POST':
+        # The summary on the finish screen comes with the session, in one query
+        sessions = with_session_totals(sessions.select_related('workout'))
+    session = get_object_or_404(sessions, id=session_id)
     
     if request.method == 'POST':
-        session.end_time = timezone.now()
-        session.save()
+        with transaction.atomic():
+            session.end_time = timezone.now()
+            session.save()
+            bump_data_version(request.user)
+            summaries = refresh_session_summaries(session)
+            update_records(request.user, summaries)
+            refresh_days(request.user, [session.date])
+            invalidate_months(request.user, [session.date])
+            definition_ids = [summary.definition_id for summary in summaries]
+            # This session is now the "last performance" for its exercises
+            transaction.on_commit(lambda: refresh_last_sets(request.user, definition_ids))
+            publish(request.user.pk, session.id, 'session_ended')
         return redirect('dashboard')
     
-    return render(request, 'workouts/session_finish.html', {'session': session})
+    return render(request, 'workouts/session_finish.html', {
+        'session': session,
+        'duration': (session.end_time or timezone.now()) - session.start_time,
+    })
 
 
 @login_required
@@ -302,117 +420,65 @@ def session_cancel(request, session_id):
     session = get_object_or_404(Session, id=session_id, user=request.user, end_time__isnull=True)
     
     if request.method == 'POST':
-        # Delete the session and all related data
-        session.delete()
+        # Delete the session and all related data (summaries cascade with it)
+        publish(request.user.pk, session.id, 'session_ended')
+        definition_ids = list(session.exercise_sessions.values_list('exercise__definition_id', flat=True))
+        with transaction.atomic():
+            session.delete()
+            # Records set during the session went with it
+            rebuild_records(request.user, definition_ids)
+            bump_data_version(request.user)
         return redirect('dashboard')
     
     return render(request, 'workouts/session_cancel.html', {'session': session})
 
 
 @login_required
+@conditional_on_data
 def history(request):
     """Show workout history with calendar view"""
-    from datetime import date, timedelta
-    from calendar import monthrange
+    today = timezone.localdate()
     
     # Get current month or requested month
-    year = int(request.GET.get('year', date.today().year))
-    month = int(request.GET.get('month', date.today().month))
-    
-    # Get all sessions for this month
-    sessions = Session.objects.filter(
-        user=request.user,
-        date__year=year,
-        date__month=month,
-        end_time__isnull=False
-    ).order_by('-date')
-    
-    # Create calendar data
-    first_day = date(year, month, 1)
-    last_day = date(year, month, monthrange(year, month)[1])
-    
-    # Get dates with sessions
-    session_dates = set(sessions.values_list('date', flat=True))
-    
-    # Calculate calendar grid
-    start_weekday = first_day.weekday()
-    days_in_month = monthrange(year, month)[1]
-    
-    # Previous month days
-    if month == 1:
-        prev_month = 12
-        prev_year = year - 1
-    else:
-        prev_month = month - 1
-        prev_year = year
-    prev_month_days = monthrange(prev_year, prev_month)[1]
-    
-    calendar_days = []
-    
-    # Add previous month days
-    for i in range(start_weekday):
-        day_num = prev_month_days - start_weekday + i + 1
-        calendar_days.append({
-            'day': day_num,
-            'date': date(prev_year, prev_month, day_num),
-            'other_month': True,
-            'has_session': False
-        })
-    
-    # Add current month days
-    for day in range(1, days_in_month + 1):
-        day_date = date(year, month, day)
-        calendar_days.append({
-            'day': day,
-            'date': day_date,
-            'other_month': False,
-            'has_session': day_date in session_dates,
-            'is_today': day_date == date.today()
-        })
-    
-    # Add next month days to complete the grid
-    remaining_days = 42 - len(calendar_days)  # 6 weeks * 7 days
-    next_month = month + 1 if month < 12 else 1
-    next_year = year if month < 12 else year + 1
-    
-    for day in range(1, remaining_days + 1):
-        calendar_days.append({
-            'day': day,
-            'date': date(next_year, next_month, day),
-            'other_month': True,
-            'has_session': False
-        })
-    
-    # Navigation dates
-    prev_month_date = first_day - timedelta(days=1)
-    next_month_date = last_day + timedelta(days=1)
-    
-    context = {
-        'year': year,
-        'month': month,
-        'month_name': first_day.strftime('%B %Y'),
-        'calendar_days': calendar_days,
-        'prev_month': prev_month_date.month,
-        'prev_year': prev_month_date.year,
-        'next_month': next_month_date.month,
-        'next_year': next_month_date.year,
-        'sessions_this_month': sessions.count(),
-    }
-    
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+    except ValueError:
+        raise Http404('Invalid month')
+    if not is_valid_month(year, month):
+        raise Http404('Invalid month')
+    
+    context = dict(get_month(request.user, year, month), today=today)
     return render(request, 'workouts/history.html', context)
 
 
 @login_required
+@conditional_on_data
 def history_day(request, year, month, day):
     """Show workout details for a specific day"""
     from datetime import date
     
-    target_date = date(year, month, day)
+    try:
+        target_date = date(year, month, day)
+    except ValueError:
+        raise Http404('Invalid date')
     sessions = Session.objects.filter(
         user=request.user,
         date=target_date,
         end_time__isnull=False
-    ).prefetch_related('exercise_sessions__exercise', 'exercise_sessions__sets')
+    ).select_related('workout').annotate(
+        duration=ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField()),
+        total_volume=Coalesce(Sum('exercise_summaries__volume'), 0.0),
+        completed_set_count=Coalesce(Sum('exercise_summaries__completed_sets'), 0),
+    ).prefetch_related(
+        Prefetch(
+            'exercise_sessions',
+            queryset=ExerciseSession.objects.select_related('exercise').prefetch_related(
+                Prefetch('sets', queryset=Set.objects.filter(completed=True), to_attr='completed_sets')
+            ),
+            to_attr='exercise_list',
+        )
+    )
     
     return render(request, 'workouts/history_day.html', {
         'date': target_date,
@@ -427,7 +493,15 @@ def session_delete(request, session_id):
     
     if request.method == 'POST':
         session_date = session.date
-        session.delete()
+        definition_ids = list(session.exercise_sessions.values_list('exercise__definition_id', flat=True))
+        # Summaries and records cascade with the session's exercise sessions
+        with transaction.atomic():
+            session.delete()
+            rebuild_records(request.user, definition_ids)
+            bump_data_version(request.user)
+        invalidate_last_sets(request.user, definition_ids)
+        refresh_days(request.user, [session_date])
+        invalidate_months(request.user, [session_date])
         return redirect('history_day', year=session_date.year, month=session_date.month, day=session_date.day)
     
     return render(request, 'workouts/session_delete.html', {'session': session})
@@ -441,52 +515,165 @@ def session_delete(request, session_id):
 
 
 @login_required
-def charts(request):
-    """Show exercise progress charts"""
-    # Get all exercises the user has done
-    exercises = Exercise.objects.filter(
-        workout__user=request.user,
-        exercise_sessions__session__end_time__isnull=False
-    ).distinct().order_by('name')
+@conditional_on_data
+def activity_heatmap(request):
+    """JSON daily activity for the year heatmap, read from the daily rollup"""
+    today = timezone.localdate()
+    try:
+        year = int(request.GET.get('year', today.year))
+        years = min(max(int(request.GET.get('years', 1)), 1), 5)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid year'}, status=400)
+    if not is_valid_month(year - years + 1, 1) or not is_valid_month(year, 12):
+        return JsonResponse({'status': 'error', 'message': 'Invalid year'}, status=400)
+    
+    start, end = year_range(year, years)
+    return JsonResponse(heatmap(request.user, start, end))
+
+
+@login_required
+@conditional_on_data
+def records(request):
+    """JSON list of the user's current personal records, optionally for one exercise"""
+    records = current_records(request.user)
+    definition_id = request.GET.get('exercise')
+    if definition_id:
+        if not definition_id.isdigit():
+            return JsonResponse({'status': 'error', 'message': 'Invalid exercise'}, status=400)
+        records = records.filter(definition_id=definition_id)
+    
+    return JsonResponse({
+        'records': [
+            {
+                'definition_id': record.definition_id,
+                'exercise': record.definition.name,
+                'kind': record.kind,
+                'kind_display': record.get_kind_display(),
+                'rep_range': record.rep_range,
+                'value': round(record.value, 2),
+                'weight': record.weight,
+                'reps': record.reps,
+                'date': record.date.isoformat(),
+                'session_id': record.exercise_session.session_id,
+            }
+            for record in records
+        ],
+    })
+
+
+@login_required
+def export_history(request):
+    """Download the user's full set history as CSV or JSON Lines"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'status': 'error', 'message': 'Unknown export format'}, status=400)
+    
+    # An async iterator keeps the download streaming under ASGI too
+    stream = astream_history if isinstance(request, ASGIRequest) else stream_history
+    response = StreamingHttpResponse(
+        stream(request.user, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    filename = f"gym-history-{timezone.localdate().isoformat()}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def import_history_view(request):
+    """Upload a CSV export from another tracker app"""
+    result = None
+    error = None
     
-    selected_exercise_id = request.GET.get('exercise')
-    chart_data = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            error = 'Choose a CSV file to import.'
+        else:
+            # Decode as the upload is read instead of loading the whole file
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_history(request.user, lines)
+            except (UnicodeDecodeError, ImportFormatError) as e:
+                error = str(e)
     
-    if selected_exercise_id:
-        exercise = get_object_or_404(Exercise, id=selected_exercise_id, workout__user=request.user)
-        
-        # Get all completed sessions for this exercise
-        exercise_sessions = ExerciseSession.objects.filter(
-            exercise=exercise,
-            session__end_time__isnull=False,
-            session__user=request.user
-        ).order_by('session__date').prefetch_related('sets')
-        
-        # Prepare chart data
-        chart_data = {
-            'labels': [],
-            'max_weight': [],
-            'avg_weight': [],
-            'total_reps': [],
-            'total_volume': [],
-        }
-        
-        for ex_session in exercise_sessions:
-            sets = ex_session.sets.filter(completed=True)
-            if sets.exists():
-                chart_data['labels'].append(ex_session.session.date.strftime('%Y-%m-%d'))
-                chart_data['max_weight'].append(float(sets.order_by('-weight').first().weight))
-                chart_data['avg_weight'].append(float(sets.aggregate(avg=models.Avg('weight'))['avg'] or 0))
-                chart_data['total_reps'].append(sets.aggregate(total=models.Sum('reps'))['total'] or 0)
-                
-                # Volume = sum of (weight * reps) for all sets
-                volume = sum(s.weight * s.reps for s in sets)
-                chart_data['total_volume'].append(float(volume))
+    return render(request, 'workouts/import_history.html', {'result': result, 'error': error})
+
+
+@login_required
+@conditional_on_data
+def charts(request):
+    """Show exercise progress charts; the series are fetched from chart_series"""
+    # Catalogue entries the user has finished at least once
+    exercises = ExerciseDefinition.objects.filter(
+        summaries__user=request.user,
+        summaries__finished=True,
+    ).distinct().order_by('name')
     
     context = {
         'exercises': exercises,
-        'selected_exercise_id': selected_exercise_id,
-        'chart_data': chart_data,
+        'selected_exercise_id': request.GET.get('exercise', ''),
     }
     
     return render(request, 'workouts/charts.html', context)
+
+
+# Bounds of the max_points parameter of chart_series
+MIN_CHART_POINTS = 10
+MAX_CHART_POINTS = 2000
+
+
+@login_required
+@conditional_on_data
+def chart_series(request):
+    """JSON progress series of one exercise, combining every workout it is in.
+
+    Takes the exercise (catalogue definition id), any number of ``metric``
+    parameters (all by default), an optional ``start``/``end`` date range and
+    ``max_points``; longer series are downsampled (``downsample=lttb`` or
+    ``weekly``).
+    """
+    try:
+        definition_id = int(request.GET.get('exercise', ''))
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        max_points = int(request.GET.get('max_points', 500))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid parameters'}, status=400)
+    metrics = request.GET.getlist('metric') or list(METRICS)
+    if any(metric not in METRICS for metric in metrics):
+        return JsonResponse({'status': 'error', 'message': 'Unknown metric'}, status=400)
+    downsample = request.GET.get('downsample', 'lttb')
+    if downsample not in DOWNSAMPLING:
+        return JsonResponse({'status': 'error', 'message': 'Unknown downsampling method'}, status=400)
+    # Definitions are shared, but a custom one is named after someone's exercise
+    definition = ExerciseDefinition.objects.filter(id=definition_id, exercises__workout__user=request.user).first()
+    if definition is None:
+        return JsonResponse({'status': 'error', 'message': 'Exercise not found'}, status=404)
+    
+    max_points = min(max(max_points, MIN_CHART_POINTS), MAX_CHART_POINTS)
+    data = progress_series(request.user, definition, metrics, start, end, max_points, downsample)
+    return JsonResponse({
+        'status': 'success',
+        'exercise': {'id': definition.id, 'name': definition.name},
+        **data,
+    })
+
+
+@login_required
+@conditional_on_data
+def chart_load(request):
+    """JSON weekly tonnage per muscle group and acute:chronic workload ratio.
+
+    Takes an optional ``start``/``end`` date range and ``max_points`` for
+    the daily ratio series.
+    """
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        max_points = int(request.GET.get('max_points', 500))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid parameters'}, status=400)
+    
+    max_points = min(max(max_points, MIN_CHART_POINTS), MAX_CHART_POINTS)
+    return JsonResponse({'status': 'success', **training_load(request.user, start, end, max_points)})